@@ -1,48 +1,375 @@
 #!/usr/bin/env python3
 """
 Script to optimize the Magic Patterns prompt to fit within character limits
+
+The prompt is parsed once into a tree of heading sections (see
+parse_sections). The analysis reads character counts off the tree, and each
+reduction is an edit to a span of the original text. The optimized prompt is
+assembled from those edits in a single pass.
+
+The reductions are rules in optimize-prompt-rules.json. A rule names a
+`find` string (or a list of them) and an `action`: condense, simplify,
+remove_section, merge or bulletize (see ACTIONS). All `find` strings are
+compiled into one matcher that the parser runs once per line, so adding
+rules does not add passes over the prompt.
 """
 
+import json
+import os
+import re
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'optimize-prompt-rules.json')
+
+class Block:
+    """A bold label line (e.g. `**ChatResponse_Table**`) and the lines under it.
+
+    A rule matching an ordinary line gets a Block too: its label is the line
+    up to the end of the match, and it ends with the paragraph.
+    """
+
+    __slots__ = ('label', 'start', 'label_end', 'end')
+
+    def __init__(self, label, start, label_end):
+        self.label = label
+        self.start = start
+        self.label_end = label_end
+        self.end = label_end
+
+    @property
+    def body_start(self):
+        return self.label_end
+
+    @property
+    def body_end(self):
+        return self.end
+
+class Section:
+    """A heading and everything up to the next heading of the same or a higher level.
+
+    Offsets are character positions in the parsed text (byte_* are positions
+    in its UTF-8 encoding). The body is the text between the heading line and
+    the first child heading; its bold-label blocks are in `blocks`. The root
+    also collects the parser's rule matches in `hits`.
+    """
+
+    __slots__ = ('level', 'title', 'start', 'body_start', 'end', 'byte_start', 'byte_end',
+                 'children', 'blocks', 'hits')
+
+    def __init__(self, level, title, start, byte_start, body_start):
+        self.level = level
+        self.title = title
+        self.start = start
+        self.byte_start = byte_start
+        self.body_start = body_start
+        self.end = start
+        self.byte_end = byte_start
+        self.children = []
+        self.blocks = []
+        self.hits = []
+
+    @property
+    def chars(self):
+        return self.end - self.start
+
+    @property
+    def bytes(self):
+        return self.byte_end - self.byte_start
+
+    @property
+    def body_end(self):
+        return self.children[0].start if self.children else self.end
+
+    def walk(self):
+        """Yield this section and all sections below it in document order."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+def _trie_pattern(words):
+    """Return a regex matching any of `words`, factored into a trie by shared prefixes.
+
+    Each position of a line is then tried against one branch per distinct
+    next character instead of once per word, so the cost of a scan hardly
+    depends on how many words there are.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        # Optional when a word ends here; greedy, so the longest word wins
+        return group + '?' if '' in node else group
+
+    return build(trie)
+
+class RuleMatcher:
+    """All `find` strings of a rule list, compiled into one regex.
+
+    The regex is a lookahead, so it matches at every position where some
+    `find` starts, and finds that overlap each other are all reported.
+    """
+
+    def __init__(self, rules):
+        self.rules_by_find = {}
+        for rule in rules:
+            finds = rule['find'] if isinstance(rule['find'], list) else [rule['find']]
+            for find in finds:
+                self.rules_by_find.setdefault(find, []).append(rule)
+        # The trie matches the longest find at a position; the shorter finds
+        # starting there are its prefixes, shortest first
+        self.prefixes = {find: [find[:end] for end in range(1, len(find) + 1) if find[:end] in self.rules_by_find]
+                         for find in self.rules_by_find}
+        self.pattern = (re.compile('(?=(' + _trie_pattern(self.rules_by_find) + '))')
+                        if self.rules_by_find else None)
+
+    def scan(self, line):
+        """Yield (rule, match end) for each rule with a `find` string in `line`, once per rule."""
+        if self.pattern is None:
+            return
+        seen = set()
+        for match in self.pattern.finditer(line):
+            for find in self.prefixes[match.group(1)]:
+                for rule in self.rules_by_find[find]:
+                    if id(rule) not in seen:
+                        seen.add(id(rule))
+                        yield rule, match.start() + len(find)
+
+def heading_level(line):
+    """Return the level of an ATX heading line (`## Title`), or 0."""
+    level = len(line) - len(line.lstrip('#'))
+    if 1 <= level <= 6 and (len(line) == level or line[level] in ' \t\r\n'):
+        return level
+    return 0
+
+def _close(section, end, byte_end):
+    """Fix a section's end and the ends of its body's blocks."""
+    section.end = end
+    section.byte_end = byte_end
+    body_end = section.body_end
+    for block, following in zip(section.blocks, section.blocks[1:] + [None]):
+        block.end = following.start if following else body_end
+
+def parse_sections(content, matcher=None):
+    """Parse `content` into a tree of heading sections in one pass over its lines.
+
+    The root (level 0, titled "Header") spans the whole text. Lines inside
+    ``` fences are never headings or labels, and are not matched.
+
+    With a RuleMatcher, each line is scanned once for all rules and the root's
+    `hits` gets a (rule, target) pair per match. The target is the Section
+    of a heading line, the Block of a label line or, for any other line, a
+    Block running from that line to the end of its paragraph.
+    """
+    root = Section(0, "Header", 0, 0, 0)
+    hits = root.hits
+    stack = [root]
+    offset = byte_offset = 0
+    in_fence = False
+    paragraph = []
+    for line in content.splitlines(keepends=True):
+        line_end = offset + len(line)
+        fence = line.lstrip().startswith('```')
+        level = heading_level(line) if not (fence or in_fence) else 0
+        label = not (fence or in_fence or level) and line.startswith('**')
+        if paragraph and (fence or level or label or not line.strip()):
+            for target in paragraph:
+                target.end = offset
+            paragraph = []
+        if fence:
+            in_fence = not in_fence
+        elif not in_fence:
+            target = None
+            if level:
+                while stack[-1].level >= level:
+                    _close(stack.pop(), offset, byte_offset)
+                target = Section(level, line[level:].strip(), offset, byte_offset, line_end)
+                stack[-1].children.append(target)
+                stack.append(target)
+            elif label:
+                target = Block(line.rstrip('\r\n'), offset, line_end)
+                stack[-1].blocks.append(target)
+            if matcher is not None:
+                for rule, match_end in matcher.scan(line):
+                    where = rule.get('in')
+                    if level or label:
+                        if where in (None, 'heading' if level else 'label'):
+                            hits.append((rule, target))
+                    elif where in (None, 'line'):
+                        matched = Block(line[:match_end], offset, offset + match_end)
+                        paragraph.append(matched)
+                        hits.append((rule, matched))
+        offset = line_end
+        byte_offset += len(line) if line.isascii() else len(line.encode('utf-8'))
+    for target in paragraph:
+        target.end = offset
+    while stack:
+        _close(stack.pop(), offset, byte_offset)
+    return root
+
 def count_characters(file_path):
     """Count total characters in a file"""
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
     return len(content), content
 
-def analyze_sections(content):
-    """Analyze character count by major sections"""
-    sections = {}
-    current_section = "Header"
-    current_content = []
-    
-    for line in content.split('\n'):
-        if line.startswith('## ') and not line.startswith('### '):
-            if current_content:
-                sections[current_section] = '\n'.join(current_content)
-            current_section = line[3:]
-            current_content = [line]
-        else:
-            current_content.append(line)
-    
-    if current_content:
-        sections[current_section] = '\n'.join(current_content)
-    
+def analyze_sections(tree):
+    """Analyze character count by major sections
+
+    The major sections are the `## ` headings; "Header" is everything before
+    the first one. Returns (title, chars, bytes) for each.
+    """
+    major = [section for section in tree.walk() if section.level == 2]
+    bounds = [(section.title, section.start, section.byte_start) for section in major]
+    if not major or major[0].start > 0:
+        bounds.insert(0, ("Header", 0, 0))
+    bounds.append((None, tree.end, tree.byte_end))
+    sections = [(title, end - start, byte_end - byte_start)
+                for (title, start, byte_start), (_, end, byte_end) in zip(bounds, bounds[1:])]
+
     # Print section analysis
     print("\nSection Analysis:")
     print("-" * 60)
-    total = 0
-    for section, text in sections.items():
-        char_count = len(text)
-        total += char_count
-        percentage = (char_count / len(content)) * 100
-        print(f"{section[:40]:<40} {char_count:>7,} chars ({percentage:>5.1f}%)")
+    for title, char_count, _ in sections:
+        percentage = (char_count / tree.chars) * 100 if tree.chars else 0.0
+        print(f"{title[:40]:<40} {char_count:>7,} chars ({percentage:>5.1f}%)")
     print("-" * 60)
-    print(f"{'TOTAL':<40} {total:>7,} chars")
-    
+    print(f"{'TOTAL':<40} {tree.chars:>7,} chars ({tree.bytes:,} bytes)")
+
     return sections
 
-def optimize_content(content, target_chars=50000):
-    """Optimize content to fit within character limit"""
+# Optimization strategies: each action turns one matched target (a Section
+# or a Block) into (start, end, replacement) edits of the original text.
+
+def _content_end(content, start, end):
+    """Return where the blank lines that end content[start:end] begin.
+
+    Edits stop there, so the blank line before the next heading or label stays.
+    """
+    while end > start:
+        line_start = max(start, content.rfind('\n', start, end - 1) + 1)
+        if content[line_start:end].strip():
+            break
+        end = line_start
+    return end
+
+def condense(content, target, rule):
+    """Replace everything under the heading or label with the rule's `replacement`."""
+    return [(target.body_start, _content_end(content, target.body_start, target.end), rule.get('replacement', ''))]
+
+def simplify(content, target, rule):
+    """Keep the heading or label and the first `keep` lines (default 1) under it.
+
+    Only lines outside ``` fences count; fenced blocks are dropped whole, so
+    no fence is left open.
+    """
+    keep = rule.get('keep', 1)
+    end = _content_end(content, target.body_start, target.end)
+    edits = []
+    fence_start = None
+    position = target.body_start
+    while position < end:
+        newline = content.find('\n', position, end)
+        line_end = newline + 1 if newline >= 0 else end
+        text = content[position:line_end].strip()
+        if text.startswith('```'):
+            if fence_start is None:
+                fence_start = position
+            else:
+                edits.append((fence_start, line_end, ''))
+                fence_start = None
+        elif fence_start is None and text:
+            if not keep:
+                edits.append((position, end, ''))
+                return edits
+            keep -= 1
+        position = line_end
+    if fence_start is not None:
+        edits.append((fence_start, end, ''))
+    return edits
+
+def remove_section(content, target, rule):
+    """Drop the heading or label and everything under it."""
+    return [(target.start, target.end, '')]
+
+def merge(content, target, rule):
+    """Replace the body of every match with one shared `replacement`; subsections stay."""
+    return [(target.body_start, _content_end(content, target.body_start, target.body_end),
+             rule.get('replacement', ''))]
+
+LIST_ITEM = re.compile(r'([-*+]|\d+[.)])\s')
+SENTENCE_END = re.compile(r'(?<=[.!?;])\s+')
+
+def bulletize(content, target, rule):
+    """Rewrite the prose of a body as one bullet per sentence.
+
+    List items, blank lines and fenced code stay as they are.
+    """
+    lines = []
+    prose = []
+
+    def flush():
+        for sentence in SENTENCE_END.split(' '.join(prose).strip(' *:')):
+            sentence = sentence.strip().rstrip('.;')
+            if sentence:
+                lines.append('- ' + sentence)
+        prose.clear()
+
+    in_fence = False
+    for line in content[target.body_start:target.body_end].splitlines():
+        text = line.strip()
+        if text.startswith('```'):
+            in_fence = not in_fence
+        elif not in_fence and text and not LIST_ITEM.match(text):
+            prose.append(text)
+            continue
+        flush()
+        lines.append(line.rstrip())
+    flush()
+    # A match in the middle of a line keeps the line up to the match
+    prefix = '' if target.body_start == 0 or content[target.body_start - 1] == '\n' else '\n'
+    return [(target.body_start, target.body_end, prefix + ''.join(line + '\n' for line in lines))]
+
+ACTIONS = {
+    'condense': condense,
+    'simplify': simplify,
+    'remove_section': remove_section,
+    'merge': merge,
+    'bulletize': bulletize,
+}
+
+def load_rules(path=RULES_PATH):
+    """Load the optimization rules from a JSON file (see optimize-prompt-rules.json).
+
+    Each rule has a `name`, a `find` string or list of strings, an `action`
+    from ACTIONS and optionally `in` (heading, label or line) to limit where
+    `find` may match. condense and merge take a `replacement`, which may be
+    a list of lines; simplify takes `keep`.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)['rules']
+    for rule in rules:
+        if rule.get('action') not in ACTIONS:
+            raise ValueError(f"Rule {rule.get('name')!r}: unknown action {rule.get('action')!r}")
+        if rule.get('in') not in (None, 'heading', 'label', 'line'):
+            raise ValueError(f"Rule {rule.get('name')!r}: 'in' must be heading, label or line")
+        if isinstance(rule.get('replacement'), list):
+            rule['replacement'] = ''.join(line + '\n' for line in rule['replacement'])
+    return rules
+
+def optimize_content(content, target_chars=50000, rules_path=RULES_PATH):
+    """Optimize content to fit within character limit
+
+    Prints the reduction needed and returns the optimization rules.
+    """
     current_chars = len(content)
     reduction_needed = current_chars - target_chars
     
@@ -50,120 +377,38 @@ def optimize_content(content, target_chars=50000):
     print(f"Target:  {target_chars:,} characters")
     print(f"Need to reduce: {reduction_needed:,} characters")
     
-    # Optimization strategies
-    optimizations = []
-    
-    # 1. Remove excessive code examples in Task Management section
-    optimizations.append({
-        'name': 'Reduce Task Management code examples',
-        'find': 'TaskParser_EditModal - shadcn Form implementation',
-        'action': 'condense'
-    })
-    
-    # 2. Condense Brain Bot Chat examples
-    optimizations.append({
-        'name': 'Condense Brain Bot examples',
-        'find': 'ChatResponse_',
-        'action': 'simplify'
-    })
-    
-    # 3. Remove redundant shadcn implementation details
-    optimizations.append({
-        'name': 'Remove duplicate shadcn patterns',
-        'find': 'shadcn/ui Component Usage Guide',
-        'action': 'remove_section'
-    })
-    
-    # 4. Consolidate mobile patterns
-    optimizations.append({
-        'name': 'Consolidate mobile patterns',
-        'find': 'Mobile Optimizations',
-        'action': 'merge'
-    })
-    
-    # 5. Streamline component descriptions
-    optimizations.append({
-        'name': 'Streamline verbose descriptions',
-        'find': 'Visual Design:',
-        'action': 'bulletize'
-    })
-    
-    return optimizations
+    return load_rules(rules_path)
 
-def apply_optimizations(content):
-    """Apply specific optimizations to reduce content size"""
-    
-    # Read the full content
-    lines = content.split('\n')
-    optimized_lines = []
-    skip_until = None
-    in_verbose_section = False
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        
-        # Skip the entire shadcn/ui Component Usage Guide section
-        if '## shadcn/ui Component Usage Guide' in line:
-            skip_until = '## '
-            i += 1
-            continue
-            
-        # Skip until we hit the next major section
-        if skip_until and line.startswith(skip_until):
-            skip_until = None
-            
-        if skip_until:
-            i += 1
-            continue
-            
-        # Condense the TaskParser_EditModal section
-        if 'TaskParser_EditModal - shadcn Form implementation' in line:
-            optimized_lines.append(line)
-            optimized_lines.append('```tsx')
-            optimized_lines.append('// Comprehensive edit form with:')
-            optimized_lines.append('// - Assignee selector with avatars')
-            optimized_lines.append('// - Date/time pickers')
-            optimized_lines.append('// - Priority radio group')
-            optimized_lines.append('// - Location selector')
-            optimized_lines.append('// - Full validation')
-            optimized_lines.append('// See shadcn Form docs for implementation')
-            optimized_lines.append('```')
-            # Skip the original verbose implementation
-            while i < len(lines) and not (lines[i].startswith('**') or lines[i].startswith('###')):
-                i += 1
-            continue
-            
-        # Condense verbose Mobile Optimization sections
-        if 'Mobile Optimizations' in line or 'Mobile-First Considerations' in line:
-            optimized_lines.append(line)
-            optimized_lines.append('- Thumb-friendly actions, voice-first input')
-            optimized_lines.append('- Offline mode with sync queue')
-            optimized_lines.append('- Bottom sheet modals, swipe gestures')
-            optimized_lines.append('- 48px minimum touch targets')
-            # Skip detailed implementation
-            while i < len(lines) and not (lines[i].startswith('##') or lines[i].startswith('###')):
-                i += 1
-            continue
-            
-        # Condense Chat Response examples
-        if line.startswith('**ChatResponse_'):
-            # Just show the component name and brief description
-            optimized_lines.append(line)
-            if i + 1 < len(lines):
-                # Add one line description
-                i += 1
-                optimized_lines.append(lines[i])
-            # Skip the detailed example
-            while i < len(lines) and not lines[i].startswith('**'):
-                i += 1
+def render(content, edits):
+    """Return `content` with edits, sorted by position, applied.
+
+    An edit that starts inside the span of an earlier one is dropped, so a
+    removed or condensed section wins over the rules matched inside it.
+    """
+    pieces = []
+    position = 0
+    for start, end, replacement in edits:
+        if start < position:
             continue
-            
-        # Keep the line as-is
-        optimized_lines.append(line)
-        i += 1
-    
-    return '\n'.join(optimized_lines)
+        pieces.append(content[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(content[position:])
+    return ''.join(pieces)
+
+def apply_optimizations(content, tree=None):
+    """Apply specific optimizations to reduce content size
+
+    `tree` is parsed with a RuleMatcher, which puts the rule hits on it. If it
+    is omitted, the content is parsed with the rules from RULES_PATH.
+    """
+    if tree is None:
+        tree = parse_sections(content, RuleMatcher(load_rules()))
+    edits = [edit for rule, target in tree.hits
+             for edit in ACTIONS[rule['action']](content, target, rule)]
+    # Outer spans first where edits start at the same position
+    edits.sort(key=lambda edit: (edit[0], -edit[1]))
+    return render(content, edits)
 
 def main():
     file_path = '/Users/colinaulds/Desktop/projects/bbui/magic-patterns-prompt.md'
@@ -172,12 +417,16 @@ def main():
     char_count, content = count_characters(file_path)
     print(f"Original file: {char_count:,} characters")
     
+    # Load the optimization rules
+    rules = optimize_content(content)
+    
     # Analyze sections
-    sections = analyze_sections(content)
+    tree = parse_sections(content, RuleMatcher(rules))
+    sections = analyze_sections(tree)
     
     # Apply optimizations
     print("\nApplying optimizations...")
-    optimized_content = apply_optimizations(content)
+    optimized_content = apply_optimizations(content, tree)
     
     # Count optimized characters
     optimized_count = len(optimized_content)
@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for scripts/update-devlog.py.
+
+Subcommands:
+- memory: memory held by a synthetic commit history, comparing the original
+  per-commit dict layout with the slotted/columnar records
+- phases: build local synthetic git repositories and time each phase of the
+  generator (collection, per-commit stats, entry formatting, statistics,
+  Markdown and HTML output)
+- compare: print per-phase ratios between two saved `phases` results
+- classify: micro-benchmark of the compiled commit classifier against the
+  original keyword-scanning categorize_commit()
+
+Everything runs offline; the synthetic repositories are written with
+`git fast-import` into a temporary directory (or --workdir to keep them).
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+
+
+def import_devlog(module: str):
+    """Import a module of the generator's scripts/devlog package."""
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    return importlib.import_module(f'devlog.{module}')
+
+
+def synthetic_history(commits: int, files_per_commit: int, seed: int = 1):
+    """Yield (hash, date, subject, author, [(filename, ins, del)]) tuples."""
+    rng = random.Random(seed)
+    paths = [f"src/module_{i // 50}/file_{i}.py" for i in range(max(100, commits // 20))]
+    authors = [f"Developer {i}" for i in range(12)]
+    start = datetime(2024, 1, 1)
+    for i in range(commits):
+        files = [(rng.choice(paths), rng.randint(0, 200), rng.randint(0, 120))
+                 for _ in range(rng.randint(1, files_per_commit * 2 - 1))]
+        yield (f"{rng.getrandbits(160):040x}", start + timedelta(minutes=7 * i),
+               f"feat: synthetic change number {i}", rng.choice(authors), files)
+
+
+def build_dict_layout(history, repo_name: str, repo_config: Dict) -> List[Dict]:
+    """Build commits the way get_commit_info() did before the record types."""
+    commits = []
+    for hash_full, date, subject, author, files in history:
+        files_list = [{
+            'filename': filename,
+            'insertions': ins,
+            'deletions': dels,
+            'total_changes': ins + dels
+        } for filename, ins, dels in files]
+        total_insertions = sum(f['insertions'] for f in files_list)
+        total_deletions = sum(f['deletions'] for f in files_list)
+        commits.append({
+            'hash': hash_full,
+            'hash_short': hash_full[:7],
+            'date': date,
+            # Parsing produced fresh strings per commit, so do the same here
+            'subject': ''.join(subject),
+            'author': ''.join(author),
+            'repo': repo_name,
+            'repo_description': ''.join(repo_config['description']),
+            'github_url': ''.join(repo_config['github_url']),
+            'emoji': repo_config['emoji'],
+            'stats': {
+                'files_changed': len(files_list),
+                'files_list': files_list,
+                'total_insertions': total_insertions,
+                'total_deletions': total_deletions,
+                'total_changes': total_insertions + total_deletions
+            }
+        })
+    return commits
+
+
+def build_record_layout(history_module, history, repo_name: str, repo_config: Dict, top_files=None) -> List:
+    """Build commits with RepoInfo/Commit as the collectors do now, keeping `top_files` changes per commit."""
+    repo = history_module.RepoInfo(repo_name, repo_config, top_files=top_files)
+    commits = []
+    for hash_full, date, subject, author, files in history:
+        files_start = repo.file_count
+        kept = history_module.top_file_changes(files, top_files)
+        for filename, ins, dels in kept:
+            repo.add_file(''.join(filename), ins, dels)
+        totals = None
+        if len(kept) < len(files):
+            totals = (len(files), sum(change[1] for change in files), sum(change[2] for change in files))
+        commits.append(history_module.Commit(repo, hash_full, date, ''.join(subject), ''.join(author),
+                                             files_start, totals))
+    return commits
+
+
+def legacy_commit_stats(history_module, commit_hash: str, repo_path: str, stats: str = 'full',
+                        top_files=None) -> Dict:
+    """Stats of one commit from its own `git show`, as the generator read them before the streaming log.
+
+    Kept here only to time that per-commit path; unlike the original it runs
+    git without a shell.
+    """
+    if stats == 'none':
+        return {'files_changed': 0, 'files_list': [], 'total_insertions': 0, 'total_deletions': 0,
+                'total_changes': 0}
+    option = '--shortstat' if stats == 'summary' else '--numstat'
+    output = subprocess.run(['git', 'show', option, '--format=', commit_hash], cwd=repo_path,
+                            capture_output=True, text=True, check=True).stdout
+    if stats == 'summary':
+        files, insertions, deletions = history_module._parse_shortstat_line(output.strip()) or (0, 0, 0)
+        return {'files_changed': files, 'files_list': [], 'total_insertions': insertions,
+                'total_deletions': deletions, 'total_changes': insertions + deletions}
+    collector = history_module.NumstatCollector(top_files)
+    for line in output.split('\n'):
+        if line.strip():
+            collector.add(line)
+    files_list = [{'filename': filename, 'insertions': ins, 'deletions': dels, 'total_changes': ins + dels}
+                  for filename, ins, dels, _ in collector.kept()]
+    return {'files_changed': collector.files_changed, 'files_list': files_list,
+            'total_insertions': collector.insertions, 'total_deletions': collector.deletions,
+            'total_changes': collector.insertions + collector.deletions}
+
+
+def measure(build: Callable[[], object]) -> int:
+    """Return the bytes still allocated by what `build` returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def run_memory(args) -> Dict:
+    history_module = import_devlog('history')
+    repo_config = {
+        'path': '/tmp/synthetic',
+        'description': 'Synthetic repository used for benchmarking',
+        'github_url': 'https://github.com/example/synthetic',
+        'emoji': '📦'
+    }
+    # Materialize the input first so it is not counted against either layout
+    history = list(synthetic_history(args.commits, args.files_per_commit))
+
+    dict_bytes = measure(lambda: build_dict_layout(history, 'synthetic', repo_config))
+    record_bytes = measure(lambda: build_record_layout(history_module, history, 'synthetic', repo_config))
+    top_bytes = measure(lambda: build_record_layout(history_module, history, 'synthetic', repo_config,
+                                                    args.top_files))
+    file_changes = sum(len(files) for *_, files in history)
+
+    result = {
+        'benchmark': 'memory',
+        'commits': args.commits,
+        'file_changes': file_changes,
+        'dict_layout_bytes': dict_bytes,
+        'record_layout_bytes': record_bytes,
+        'top_files': args.top_files,
+        'top_files_bytes': top_bytes,
+        'reduction': 1 - record_bytes / dict_bytes if dict_bytes else 0.0,
+    }
+
+    print(f"Synthetic history: {args.commits:,} commits, {file_changes:,} file changes")
+    print("-" * 60)
+    print(f"{'Layout':<20} {'Total':>12} {'Per commit':>14}")
+    for name, size in (('dict (before)', dict_bytes), ('records (after)', record_bytes),
+                       (f'records, top {args.top_files}', top_bytes)):
+        print(f"{name:<20} {size / 1024 / 1024:>9.1f} MiB {size / args.commits:>10.0f} B")
+    print("-" * 60)
+    print(f"Reduction: {result['reduction']:.1%}")
+    return result
+
+
+def _fast_import_data(payload: bytes) -> bytes:
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def fast_import_stream(commits: int, files_per_commit: int, binary_ratio: float, seed: int,
+                       lockfile_lines: int = 0):
+    """Yield a deterministic `git fast-import` stream in chunks.
+
+    Text files are edited by deleting and inserting a few lines so numstat has
+    real work to do; a `binary_ratio` share of the changes rewrite binary files.
+    With `lockfile_lines`, a third of the commits also rewrite scattered lines
+    of a `package-lock.json` that size, as dependency bumps do.
+    """
+    rng = random.Random(seed)
+    lockfile = [b'    "dep-%d": "1.0.%d",\n' % (n, n) for n in range(lockfile_lines)]
+    text_paths = [f"src/module_{i // 40}/file_{i}.py" for i in range(max(50, commits // 10))]
+    binary_paths = [f"assets/image_{i}.bin" for i in range(max(5, commits // 200))]
+    contents: Dict[str, List[bytes]] = {}
+    authors = [(f"Developer {i}", f"dev{i}@example.com") for i in range(8)]
+    kinds = ['feat', 'fix', 'docs', 'refactor', 'test', 'chore', 'perf', 'style']
+    timestamp = int(datetime(2024, 1, 1, 9).timestamp())
+    mark = 0
+    for i in range(commits):
+        chunk = []
+        changes = []
+        for _ in range(rng.randint(1, files_per_commit * 2 - 1)):
+            mark += 1
+            if rng.random() < binary_ratio:
+                path = rng.choice(binary_paths)
+                payload = b"\0BIN" + rng.randbytes(rng.randint(64, 2048))
+            else:
+                path = rng.choice(text_paths)
+                lines = contents.setdefault(path, [])
+                for _ in range(min(len(lines), rng.randint(0, 5))):
+                    del lines[rng.randrange(len(lines))]
+                for _ in range(rng.randint(1, 20)):
+                    lines.insert(rng.randint(0, len(lines)), b"value_%d = %d\n" % (rng.getrandbits(32), i))
+                payload = b"".join(lines)
+            chunk.append(b"blob\nmark :%d\n" % mark + _fast_import_data(payload))
+            changes.append(b"M 100644 :%d %s\n" % (mark, path.encode()))
+        if lockfile and (i == 0 or rng.random() < 0.33):
+            for _ in range(max(1, lockfile_lines // 100)):
+                n = rng.randrange(lockfile_lines)
+                lockfile[n] = b'    "dep-%d": "1.%d.%d",\n' % (n, i, rng.getrandbits(16))
+            mark += 1
+            chunk.append(b"blob\nmark :%d\n" % mark + _fast_import_data(b"{\n" + b"".join(lockfile) + b"}\n"))
+            changes.append(b"M 100644 :%d package-lock.json\n" % mark)
+        name, email = rng.choice(authors)
+        timestamp += rng.randint(600, 6 * 3600)
+        ident = f"{name} <{email}> {timestamp} -0700".encode()
+        subject = f"{rng.choice(kinds)}: synthetic change {i}".encode()
+        chunk.append(b"commit refs/heads/main\n")
+        chunk.append(b"author %s\ncommitter %s\n" % (ident, ident))
+        chunk.append(_fast_import_data(subject))
+        chunk.extend(changes)
+        chunk.append(b"\n")
+        yield b"".join(chunk)
+
+
+def build_synthetic_repo(path: str, commits: int, files_per_commit: int, binary_ratio: float, seed: int,
+                         lockfile_lines: int = 0) -> None:
+    """Create a git repository at `path` holding a synthetic history."""
+    env = dict(os.environ, GIT_CONFIG_NOSYSTEM='1', HOME=path)
+    subprocess.run(['git', 'init', '-q', path], check=True, env=env)
+    importer = subprocess.Popen(['git', 'fast-import', '--quiet'], cwd=path, stdin=subprocess.PIPE, env=env)
+    for chunk in fast_import_stream(commits, files_per_commit, binary_ratio, seed, lockfile_lines):
+        importer.stdin.write(chunk)
+    importer.stdin.close()
+    if importer.wait() != 0:
+        raise RuntimeError(f"git fast-import failed in {path}")
+    subprocess.run(['git', 'symbolic-ref', 'HEAD', 'refs/heads/main'], cwd=path, check=True, env=env)
+
+
+def prepare_repositories(args, workdir: str) -> Dict[str, Dict]:
+    """Build (or reuse) the synthetic repositories and return a REPOS mapping."""
+    repos = {}
+    for n in range(args.repos):
+        name = f"synthetic-{n}"
+        path = os.path.join(workdir, f"{name}-c{args.commits}-f{args.files_per_commit}-b{args.binary_ratio}"
+                                     f"-l{args.lockfile_lines}-s{args.seed + n}")
+        if not os.path.isdir(os.path.join(path, '.git')):
+            shutil.rmtree(path, ignore_errors=True)
+            build_synthetic_repo(path, args.commits, args.files_per_commit, args.binary_ratio, args.seed + n,
+                                 args.lockfile_lines)
+        repos[name] = {
+            'path': path,
+            'description': f'Synthetic repository {n}',
+            'github_url': f'https://github.com/example/{name}',
+            'emoji': '📦'
+        }
+        if args.include:
+            repos[name]['include'] = args.include
+        if args.exclude:
+            repos[name]['exclude'] = args.exclude
+        if args.max_blob_size:
+            repos[name]['max_blob_size'] = args.max_blob_size
+    return repos
+
+
+def remove_commit_graph(repo_path: str) -> None:
+    """Delete a repository's commit-graph so runs without --commit-graph start from none."""
+    info = os.path.join(repo_path, '.git', 'objects', 'info')
+    shutil.rmtree(os.path.join(info, 'commit-graphs'), ignore_errors=True)
+    if os.path.exists(os.path.join(info, 'commit-graph')):
+        os.remove(os.path.join(info, 'commit-graph'))
+
+
+def write_commit_graphs(history, repos: Dict[str, Dict]) -> None:
+    """Write every repository's commit-graph (with Bloom filters) concurrently."""
+    async def write_all():
+        await asyncio.gather(*(history.CliRepository(history.RepoInfo(name, repo_config)).write_commit_graph()
+                               for name, repo_config in repos.items()))
+    asyncio.run(write_all())
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def timed(phases: Dict, name: str, items: int, fn: Callable[[], object]):
+    """Run `fn`, recording its wall time, throughput and the peak RSS afterwards."""
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    phases[name] = {
+        'seconds': elapsed,
+        'items': items,
+        'per_second': items / elapsed if elapsed else 0.0,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+    print(f"{name:<28} {elapsed:>9.3f}s {items:>9,} {phases[name]['per_second']:>12,.0f}/s "
+          f"{phases[name]['peak_rss_bytes'] / 1024 / 1024:>8.1f} MiB")
+    return result
+
+
+def devlog_version() -> str:
+    """Identify the generator being measured by the commit it was checked out at."""
+    try:
+        head = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--', 'scripts'], cwd=project_root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{head}-dirty" if dirty else head
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_phases(args) -> Dict:
+    workdir = args.workdir or tempfile.mkdtemp(prefix='devlog-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        repos = prepare_repositories(args, workdir)
+        setup_seconds = time.perf_counter() - start
+
+        builder_module = import_devlog('builder')
+        history = import_devlog('history')
+        config = import_devlog('config').DevlogConfig(repos)
+        config.concurrency = args.jobs or config.concurrency
+        config.backend = args.backend or config.backend
+        config.stats = args.stats
+        config.commit_graph = args.commit_graph
+        config.top_files = args.top_files
+        config.full_file_lists = args.full_file_lists
+        config.layout = args.layout
+        data_dir = os.path.join(workdir, 'data')
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+        def builder():
+            return builder_module.DevlogBuilder(config, data_dir)
+
+        total = args.commits * args.repos
+        print(f"Synthetic repositories: {args.repos} x {args.commits:,} commits "
+              f"(setup {setup_seconds:.1f}s, backend {config.backend}, stats {config.stats}"
+              f", files {'all' if config.stored_files is None else f'top {config.stored_files}'}"
+              f"{', commit-graph' if config.commit_graph else ''})")
+        print("-" * 76)
+        print(f"{'Phase':<28} {'Time':>10} {'Items':>9} {'Throughput':>14} {'Peak RSS':>12}")
+
+        phases = {}
+        for repo_config in repos.values():
+            remove_commit_graph(repo_config['path'])
+        if config.commit_graph:
+            # Written once up front; the collections below only find it up to date
+            timed(phases, 'write_commit_graph', total, lambda: write_commit_graphs(history, repos))
+        # A new builder per run, so the cached run only has the on-disk cache
+        commits = timed(phases, 'get_commit_info (cold)', total, lambda: builder().collect())
+        cached = builder()
+        timed(phases, 'get_commit_info (cached)', total, cached.collect)
+
+        sample = commits[-args.stats_sample:] if args.stats_sample else []
+        timed(phases, 'get_commit_stats', len(sample),
+              lambda: [legacy_commit_stats(history, c.hash, c.repo.path, config.stats, config.stored_files)
+                       for c in sample])
+        renderer = cached.renderer
+        timed(phases, 'format_commit_entry', len(commits),
+              lambda: [renderer.format_commit_entry(c, show_repo_badge=True) for c in commits])
+
+        commits_by_repo = {}
+        for commit in commits:
+            commits_by_repo.setdefault(commit.repo.name, []).append(commit)
+        timed(phases, 'generate_statistics', len(commits),
+              lambda: renderer.generate_statistics(commits, commits_by_repo))
+
+        output = os.path.join(workdir, 'DEVLOG.md')
+        for path in (output, f"{output}.cold"):
+            if os.path.exists(path):
+                os.remove(path)
+        # A fresh renderer with no earlier output: every entry and section is rendered
+        fresh = builder()
+        fresh.collect()
+        timed(phases, 'render_devlog (cold)', len(commits), lambda: fresh.render(f"{output}.cold", force=True))
+
+        def write_devlog():
+            # Collects again, like a normal run; entries are already memoized by now
+            cached.collect()
+            return cached.render(output, force=True)
+
+        timed(phases, 'write_devlog', len(commits), write_devlog)
+        site = os.path.join(workdir, 'site')
+        shutil.rmtree(site, ignore_errors=True)
+        timed(phases, 'write_html', len(commits), lambda: cached.render_html(site, force=True))
+        print("-" * 76)
+        for name in ('DEVLOG.md', 'site/index.json'):
+            print(f"{name}: {os.path.getsize(os.path.join(workdir, name)):,} bytes")
+
+        return {
+            'benchmark': 'phases',
+            'version': devlog_version(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {
+                'repos': args.repos,
+                'commits': args.commits,
+                'files_per_commit': args.files_per_commit,
+                'binary_ratio': args.binary_ratio,
+                'lockfile_lines': args.lockfile_lines,
+                'include': args.include,
+                'exclude': args.exclude,
+                'max_blob_size': args.max_blob_size,
+                'stats_sample': args.stats_sample,
+                'seed': args.seed,
+                'backend': config.backend,
+                'jobs': config.concurrency,
+                'stats': config.stats,
+                'commit_graph': config.commit_graph,
+                'top_files': config.stored_files,
+                'layout': config.layout,
+            },
+            'commits_collected': len(commits),
+            'phases': phases,
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_compare(args) -> Dict:
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, 'r', encoding='utf-8') as f:
+        candidate = json.load(f)
+    if baseline.get('parameters') != candidate.get('parameters'):
+        print("Warning: results were produced with different parameters")
+
+    print(f"{'Phase':<28} {baseline.get('version', '?'):>12} {candidate.get('version', '?'):>12} {'Change':>9}")
+    print("-" * 64)
+    result = {'benchmark': 'compare', 'baseline': baseline.get('version'),
+              'candidate': candidate.get('version'), 'phases': {}}
+    for name, before in baseline['phases'].items():
+        after = candidate['phases'].get(name)
+        if after is None:
+            continue
+        change = after['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+        result['phases'][name] = change
+        flag = '  regression' if change > args.threshold else ''
+        print(f"{name:<28} {before['seconds']:>11.3f}s {after['seconds']:>11.3f}s {change:>+9.1%}{flag}")
+    rss_change = candidate['peak_rss_bytes'] / baseline['peak_rss_bytes'] - 1
+    result['peak_rss'] = rss_change
+    print(f"{'peak RSS':<28} {baseline['peak_rss_bytes'] / 1024 / 1024:>8.1f} MiB "
+          f"{candidate['peak_rss_bytes'] / 1024 / 1024:>8.1f} MiB {rss_change:>+9.1%}")
+    return result
+
+
+
+def legacy_categorize_commit(subject: str):
+    """categorize_commit() as it was before the compiled classifier."""
+    subject_lower = subject.lower()
+
+    if subject_lower.startswith('merge'):
+        return "🟢", "PR merge"
+    elif any(word in subject_lower for word in ['feat:', 'feature:', 'add ']):
+        return "🟢", "Feature"
+    elif any(word in subject_lower for word in ['fix:', 'bug:']):
+        return "🟢", "Bug fix"
+    elif any(word in subject_lower for word in ['docs:', 'documentation']):
+        return "🟢", "Documentation"
+    elif any(word in subject_lower for word in ['test:', 'testing']):
+        return "🟢", "Testing"
+    elif any(word in subject_lower for word in ['refactor:', 'cleanup']):
+        return "🟢", "Refactor"
+    elif any(word in subject_lower for word in ['wip:', 'work in progress']):
+        return "🟡", "WIP"
+    else:
+        return "🟢", "Update"
+
+
+def synthetic_subjects(count: int, seed: int = 1) -> List[str]:
+    """Commit subjects in the styles seen in real histories."""
+    rng = random.Random(seed)
+    types = ['feat', 'fix', 'docs', 'test', 'refactor', 'chore', 'perf', 'ci', 'style', 'wip']
+    scopes = ['', '(api)', '(ui)', '(parser)', '(deps)']
+    words = ['update', 'handle', 'config', 'routing', 'cache', 'error', 'login', 'layout', 'index', 'tests']
+    subjects = []
+    for i in range(count):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 9)))
+        style = rng.random()
+        if style < 0.6:
+            subjects.append(f"{rng.choice(types)}{rng.choice(scopes)}: {text}")
+        elif style < 0.7:
+            subjects.append(f"Merge pull request #{i} from example/branch-{i}")
+        elif style < 0.8:
+            subjects.append(f"Add {text}")
+        else:
+            subjects.append(text.capitalize())
+    return subjects
+
+
+def run_classify(args) -> Dict:
+    config = import_devlog('config')
+    history = import_devlog('history')
+    render = import_devlog('render')
+    subjects = synthetic_subjects(args.subjects)
+    classifier = render.CommitClassifier(config.DEFAULT_CATEGORY_RULES, config.DEFAULT_CATEGORY)
+    # Legacy-only rules: what the compiled classifier does with the old keyword set
+    legacy_rules = [rule for rule in config.DEFAULT_CATEGORY_RULES
+                    if rule['label'] in ('PR merge', 'Feature', 'Bug fix', 'Documentation', 'Testing', 'Refactor', 'WIP')]
+    legacy_rules = [{key: value for key, value in rule.items() if key != 'type'} for rule in legacy_rules]
+    keyword_classifier = render.CommitClassifier(legacy_rules, config.DEFAULT_CATEGORY)
+    mismatches = sum(keyword_classifier.classify(s) != legacy_categorize_commit(s) for s in subjects)
+
+    repo = history.RepoInfo('synthetic', {'path': '', 'description': '', 'github_url': ''})
+    commits = [history.Commit(repo, f"{i:040x}", datetime(2024, 1, 1), subject, 'Dev', 0)
+               for i, subject in enumerate(subjects)]
+
+    def timed_run(fn: Callable[[], object]) -> float:
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    timings = {
+        'legacy categorize_commit': timed_run(lambda: [legacy_categorize_commit(s) for s in subjects]),
+        'compiled classify': timed_run(lambda: [classifier.classify(s) for s in subjects]),
+        # Each commit is rendered twice (all-repositories and per-repository view)
+        'legacy, 2 calls per commit': timed_run(lambda: [legacy_categorize_commit(c.subject)
+                                                          for c in commits for _ in (0, 1)]),
+        'compiled + hash cache, 2 calls': timed_run(lambda: (classifier._cache.clear(),
+                                                             [classifier.classify_commit(c)
+                                                              for c in commits for _ in (0, 1)])),
+    }
+
+    print(f"{len(subjects):,} subjects, best of {args.repeat} runs")
+    print("-" * 60)
+    print(f"{'Variant':<34} {'Total':>10} {'Per call':>12}")
+    for name, seconds in timings.items():
+        calls = len(subjects) * (2 if '2 calls' in name else 1)
+        print(f"{name:<34} {seconds * 1000:>8.1f}ms {seconds / calls * 1e9:>9.0f} ns")
+    print("-" * 60)
+    print(f"Keyword-only rules disagreeing with the legacy function: {mismatches}")
+    return {
+        'benchmark': 'classify',
+        'subjects': len(subjects),
+        'seconds': timings,
+        'legacy_mismatches': mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for update-devlog.py')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    memory = subparsers.add_parser('memory', help='Compare memory used by commit layouts')
+    memory.add_argument('--commits', type=int, default=100_000, help='Synthetic commits to build')
+    memory.add_argument('--files-per-commit', type=int, default=3, help='Average files changed per commit')
+    memory.add_argument('--top-files', type=int, default=10, help='File changes kept per commit in the bounded layout')
+    memory.add_argument('--json', help='Also write the result to this JSON file')
+    memory.set_defaults(run=run_memory)
+
+    phases = subparsers.add_parser('phases', help='Time each generator phase on synthetic git repositories')
+    phases.add_argument('--repos', type=int, default=3, help='Synthetic repositories to create')
+    phases.add_argument('--commits', type=int, default=2_000, help='Commits per repository')
+    phases.add_argument('--files-per-commit', type=int, default=3, help='Average files changed per commit')
+    phases.add_argument('--binary-ratio', type=float, default=0.05, help='Share of file changes that are binary')
+    phases.add_argument('--lockfile-lines', type=int, default=0,
+                        help='Also churn a package-lock.json of this many lines in a third of the commits')
+    phases.add_argument('--include', action='append', default=[],
+                        help='Include pathspec set on every repository (repeatable)')
+    phases.add_argument('--exclude', action='append', default=[],
+                        help='Exclude pathspec set on every repository (repeatable)')
+    phases.add_argument('--max-blob-size', type=int, default=None,
+                        help='max_blob_size set on every repository')
+    phases.add_argument('--stats-sample', type=int, default=200,
+                        help='Commits to run through the legacy per-commit `git show` path')
+    phases.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic history')
+    phases.add_argument('--backend', choices=['git', 'native'], default=None, help='Collection backend')
+    phases.add_argument('--jobs', type=int, default=None, help='Repositories collected concurrently')
+    phases.add_argument('--stats', choices=['none', 'summary', 'full'], default='full',
+                        help='Per-commit stats level to collect')
+    phases.add_argument('--top-files', type=int, default=10, help='File changes kept per commit')
+    phases.add_argument('--full-file-lists', action='store_true', help='Keep every file change of each commit')
+    phases.add_argument('--layout', choices=['standard', 'deduplicated'], default='standard',
+                        help='Layout of the single-file DEVLOG')
+    phases.add_argument('--commit-graph', action='store_true',
+                        help='Write commit-graphs with changed-path Bloom filters first (removed otherwise)')
+    phases.add_argument('--workdir', help='Keep the synthetic repositories here and reuse them across runs')
+    phases.add_argument('--json', help='Also write the result to this JSON file')
+    phases.set_defaults(run=run_phases)
+
+    compare = subparsers.add_parser('compare', help='Compare two saved phases results')
+    compare.add_argument('baseline', help='JSON written by an earlier `phases --json` run')
+    compare.add_argument('candidate', help='JSON written by a later `phases --json` run')
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help='Flag phases that got slower by more than this fraction')
+    compare.add_argument('--json', help='Also write the comparison to this JSON file')
+    compare.set_defaults(run=run_compare)
+
+    classify = subparsers.add_parser('classify', help='Compare the compiled classifier with the original one')
+    classify.add_argument('--subjects', type=int, default=100_000, help='Synthetic commit subjects')
+    classify.add_argument('--repeat', type=int, default=5, help='Runs per variant (best is reported)')
+    classify.add_argument('--json', help='Also write the result to this JSON file')
+    classify.set_defaults(run=run_classify)
+
+    args = parser.parse_args()
+    result = args.run(args)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the rule matching in optimize-prompt.py.
+
+Adds synthetic rules to optimize-prompt-rules.json and times, for each rule
+count, one pass of parse_sections() with the compiled RuleMatcher against
+the per-rule `find in line` checks it replaced. The synthetic `find`
+strings reuse identifier prefixes from the prompt (e.g. "ChatResponse_"), so
+many of them partly match real lines, but none matches fully; the
+optimized output therefore stays the same at every rule count.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import re
+import time
+from typing import Callable, List
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+
+
+def import_optimizer():
+    """Import optimize-prompt.py, whose name is not a valid module name."""
+    spec = importlib.util.spec_from_file_location('optimize_prompt', os.path.join(project_root, 'optimize-prompt.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_finds(content: str, count: int, seed: int = 1) -> List[str]:
+    """`find` strings built from identifier prefixes and words of the prompt, none of them in it."""
+    rng = random.Random(seed)
+    prefixes = sorted(set(re.findall(r'\b([A-Z][A-Za-z]+_)', content))) or ['Component_']
+    words = sorted(set(re.findall(r'\b[A-Z][a-z]{3,}\b', content))) or ['Widget']
+    finds = []
+    while len(finds) < count:
+        find = f"{rng.choice(prefixes)}{rng.choice(words)}{rng.choice(words)}"
+        if find not in content:
+            finds.append(find)
+    return finds
+
+
+def scan_per_rule(content: str, finds: List[str]) -> int:
+    """The matching the hard-coded checks did: every `find` tested against every line."""
+    hits = 0
+    for line in content.splitlines():
+        for find in finds:
+            if find in line:
+                hits += 1
+    return hits
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time optimize-prompt.py rule matching as the rule count grows')
+    parser.add_argument('--prompt', default=os.path.join(project_root, 'magic-patterns-prompt.md'),
+                        help='Prompt to optimize')
+    parser.add_argument('--copies', type=int, default=20, help='Copies of the prompt to concatenate')
+    parser.add_argument('--rule-counts', type=int, nargs='+', default=[5, 50, 500, 5_000],
+                        help='Rule counts to time (the real rules count towards them)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported)')
+    parser.add_argument('--json', help='Also write the result to this JSON file')
+    args = parser.parse_args()
+
+    optimizer = import_optimizer()
+    with open(args.prompt, 'r', encoding='utf-8') as f:
+        content = f.read() * args.copies
+    base_rules = optimizer.load_rules()
+    expected = optimizer.apply_optimizations(content, optimizer.parse_sections(content,
+                                                                                optimizer.RuleMatcher(base_rules)))
+    parse_only = best_of(args.repeat, lambda: optimizer.parse_sections(content))
+    extra_finds = synthetic_finds(content, max(args.rule_counts) - len(base_rules))
+
+    results = []
+    for count in args.rule_counts:
+        rules = base_rules + [{'name': f'synthetic {i}', 'find': find, 'action': 'remove_section'}
+                              for i, find in enumerate(extra_finds[:max(0, count - len(base_rules))])]
+        finds = [find for rule in rules
+                 for find in (rule['find'] if isinstance(rule['find'], list) else [rule['find']])]
+        compile_seconds = best_of(args.repeat, lambda: optimizer.RuleMatcher(rules))
+        matcher = optimizer.RuleMatcher(rules)
+        tree = optimizer.parse_sections(content, matcher)
+        if optimizer.apply_optimizations(content, tree) != expected:
+            raise SystemExit(f"Output changed with {len(rules)} rules")
+        results.append({
+            'rules': len(rules),
+            'compile': compile_seconds,
+            'parse_and_match': best_of(args.repeat, lambda: optimizer.parse_sections(content, matcher)),
+            # The per-rule scan grows linearly; one run is enough past a few seconds
+            'per_rule_scan': best_of(1 if len(finds) > 500 else args.repeat,
+                                     lambda: scan_per_rule(content, finds)),
+        })
+
+    print(f"{len(content):,} characters, {content.count(chr(10)):,} lines, best of {args.repeat} runs")
+    print(f"parse_sections() without rules: {parse_only * 1000:.1f}ms")
+    print("-" * 72)
+    print(f"{'Rules':>7} {'Compile':>10} {'Parse + match':>15} {'Matching alone':>16} {'Per-rule scan':>15}")
+    for row in results:
+        print(f"{row['rules']:>7,} {row['compile'] * 1000:>8.1f}ms {row['parse_and_match'] * 1000:>13.1f}ms "
+              f"{(row['parse_and_match'] - parse_only) * 1000:>14.1f}ms {row['per_rule_scan'] * 1000:>13.1f}ms")
+    print("-" * 72)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'optimize-prompt rules', 'characters': len(content),
+                       'parse_only': parse_only, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+The DEVLOG generator behind scripts/update-devlog.py, usable as a library:
+
+    from devlog import DevlogBuilder
+
+    builder = DevlogBuilder()
+    builder.collect()
+    builder.render('DEVLOG.md')
+
+Importing the package reads nothing and imports none of its modules; each
+module (git reading, rendering, alternate backends, exporters) is loaded only
+when the feature that needs it is used.
+"""
+
+import importlib
+
+# Public name -> module that defines it, imported on first access
+_EXPORTS = {
+    'DevlogBuilder': 'devlog.builder',
+    'DevlogConfig': 'devlog.config',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
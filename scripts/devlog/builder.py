@@ -0,0 +1,483 @@
+"""
+Library entry point of the DEVLOG generator.
+
+    sys.path.insert(0, 'scripts')
+    from devlog import DevlogBuilder
+
+    builder = DevlogBuilder()        # reads .devlog/config.json
+    builder.collect()                # every repository, walking only what the cache has not seen
+    builder.render('DEVLOG.md')
+    ...
+    builder.update()                 # only commits made since
+    builder.render('DEVLOG.md')      # only sections whose commits changed are rendered
+
+scripts/update-devlog.py is a thin command line around this class.
+"""
+
+import asyncio
+import os
+import subprocess
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from devlog.config import DevlogConfig
+from devlog.history import (CliRepository, Commit, HistoryCache, RepoInfo, Rollup, commits_from_cache,
+                            iter_merged_commits, iter_repo_commits, open_repository, ref_signature)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# What was read of one repository: (HEAD, commits)
+History = Tuple[Optional[str], List[Commit]]
+
+
+class DevlogBuilder:
+    """Collects commits from the configured repositories and renders the DEVLOG from them.
+
+    The config, the caches and every repository's parsed history live on the
+    builder, so separate builders never share state. collect() reads all
+    repositories, update() brings the histories held in memory up to date
+    and render() writes the output from them.
+    """
+
+    def __init__(self, config: Optional[DevlogConfig] = None, data_dir: Optional[str] = None,
+                 use_cache: bool = True, debug: bool = False, profile=None):
+        # Holds config.json, cache/ and index.sqlite3
+        self.data_dir = data_dir or os.path.join(PROJECT_ROOT, '.devlog')
+        self.use_cache = use_cache
+        self.debug = debug
+        # A devlog.profiling.Profiler, if the run is being profiled
+        self.profile = profile
+        if config is None:
+            with self._phase('config load'):
+                config = DevlogConfig.load(os.path.join(self.data_dir, 'config.json'))
+        self.config = config
+        self.cache_dir = os.path.join(self.data_dir, 'cache')
+        self.index_path = os.path.join(self.data_dir, 'index.sqlite3')
+        self.cache = HistoryCache(self.cache_dir, use_cache, debug)
+        self.histories: Dict[str, History] = {}
+        # All collected commits in chronological order (None until collected)
+        self.commits: Optional[List[Commit]] = None
+        self._renderer = None
+
+    def _phase(self, name: str):
+        """Time a block as a --profile phase (a no-op when not profiling)."""
+        return self.profile.phase(name) if self.profile else nullcontext()
+
+    @property
+    def renderer(self):
+        """The devlog.render.Renderer, imported and created on first use."""
+        if self._renderer is None:
+            from devlog.render import Renderer
+            self._renderer = Renderer(self.config, self.cache_dir, self.use_cache, self.debug, self.profile)
+        return self._renderer
+
+    def _repo_info(self, name: str) -> RepoInfo:
+        return RepoInfo(name, self.config.repos[name], self.config.stats, self.config.stored_files)
+
+    def _open(self, repo: RepoInfo) -> CliRepository:
+        return open_repository(repo, self.config.backend, self.debug, self.profile)
+
+    async def _refresh_commit_graph(self, source: CliRepository) -> None:
+        """Bring a repository's commit-graph up to date before a walk, if configured."""
+        if not self.config.commit_graph:
+            return
+        try:
+            await source.write_commit_graph()
+        except subprocess.CalledProcessError as e:
+            # The walk still works without the graph, only slower
+            if self.debug:
+                print(f"Warning: Could not write the commit-graph of {source.repo.name}: {e.stderr}")
+
+    async def read_history(self, repo: RepoInfo, known: Optional[History] = None) -> History:
+        """Return (HEAD, commits) for a repository, walking only commits not seen before.
+
+        What was seen before comes from `known` (a previous result kept in memory,
+        whose commits must belong to `repo`) or else from the on-disk cache.
+        """
+        source = self._open(repo)
+        try:
+            head = await source.head()
+            if not head:
+                return None, []
+            bases = await source.bases()
+
+            if known:
+                last_seen, known_commits = known
+                if repo.base_heads != bases:
+                    # The excluded side of the range moved
+                    last_seen = None
+                elif last_seen == head:
+                    return head, known_commits
+            else:
+                cache = await asyncio.to_thread(self.cache.load, repo)
+                if cache and cache.get('base_heads', []) != bases:
+                    cache = None
+                last_seen = cache['head'] if cache else None
+                repo.head, repo.base_heads = head, bases
+                if last_seen == head:
+                    commits = commits_from_cache(repo, cache)
+                    if not self.cache.restore_rollup(repo, cache, commits):
+                        await asyncio.to_thread(self.cache.save_rollup, repo, head)
+                    return head, commits
+
+            if last_seen and await source.is_ancestor(last_seen, head):
+                if known:
+                    commits = list(known_commits)
+                else:
+                    commits = commits_from_cache(repo, cache)
+                    self.cache.restore_rollup(repo, cache, commits)
+                await self._refresh_commit_graph(source)
+                new_commits = await source.commits(head, [last_seen, *bases])
+                for commit in new_commits:
+                    repo.rollup.add(commit)
+                repo.rollup.add_files(repo.add_trimmed(source.trimmed))
+                commits.extend(new_commits)
+            else:
+                if last_seen and self.debug:
+                    print(f"History of {repo.name} was rewritten since {last_seen[:7]}; rescanning")
+                if known:
+                    # Start new columns so the discarded history can be freed
+                    repo = source.repo = self._repo_info(repo.name)
+                await self._refresh_commit_graph(source)
+                commits = await source.commits(head, bases)
+                repo.rollup = Rollup.from_commits(commits, repo.add_trimmed(source.trimmed))
+            repo.head, repo.base_heads = head, bases
+        finally:
+            source.close()
+
+        if self.use_cache:
+            await asyncio.to_thread(self.cache.save, repo, head, commits)
+        return head, commits
+
+    def _window_options(self) -> List[str]:
+        since, until = self.config.since, self.config.until
+        return ([f'--since={since}'] if since else []) + ([f'--until={until}'] if until else [])
+
+    async def read_window(self, repo: RepoInfo) -> History:
+        """Return (HEAD, commits) for the configured since/until window only, read straight from git."""
+        source = self._open(repo)
+        try:
+            head = await source.head()
+            if not head:
+                return None, []
+            bases = await source.bases()
+            await self._refresh_commit_graph(source)
+            commits = await source.commits(head, bases, self._window_options())
+        finally:
+            source.close()
+        repo.head, repo.base_heads = head, bases
+        repo.rollup = Rollup.from_commits(commits, repo.add_trimmed(source.trimmed))
+        return head, commits
+
+    async def _read_repo(self, repo_name: str, semaphore: asyncio.Semaphore, incremental: bool) -> None:
+        """Read one repository into `histories`, reporting failures instead of raising."""
+        repo_config = self.config.repos[repo_name]
+        if not os.path.exists(repo_config['path']):
+            if self.debug:
+                print(f"Warning: Repository path not found: {repo_config['path']}")
+            return
+
+        async with semaphore:
+            try:
+                started = time.perf_counter()
+                if self.config.windowed:
+                    history = await self.read_window(self._repo_info(repo_name))
+                else:
+                    head, commits = self.histories.get(repo_name, (None, [])) if incremental else (None, [])
+                    repo = commits[0].repo if commits else self._repo_info(repo_name)
+                    history = await self.read_history(repo, (head, commits) if head else None)
+                self.histories[repo_name] = history
+                if self.profile:
+                    self.profile.repo(repo_name, time.perf_counter() - started, len(history[1]))
+            except subprocess.CalledProcessError as e:
+                if self.debug:
+                    print(f"Git command failed: {' '.join(e.cmd)} (in {repo_config['path']})")
+                    print(f"Error: {e.stderr}")
+            except Exception as e:
+                if self.debug:
+                    print(f"Error processing {repo_name}: {e}")
+
+    async def _read_repos(self, names: List[str], incremental: bool) -> None:
+        """Read repositories concurrently, at most `config.concurrency` at a time."""
+        semaphore = asyncio.Semaphore(max(1, self.config.concurrency))
+        await asyncio.gather(*(self._read_repo(name, semaphore, incremental) for name in names))
+
+    def _merge(self) -> List[Commit]:
+        with self._phase('merge'):
+            self.commits = list(iter_merged_commits([self.histories[name][1] for name in self.config.repos
+                                                     if name in self.histories]))
+        return self.commits
+
+    @property
+    def _indexing(self) -> bool:
+        # A window holds only part of each history, which the index would take as deletions
+        return self.config.index and self.use_cache and not self.config.windowed
+
+    def collect(self) -> List[Commit]:
+        """Read every repository and return all commits, oldest first.
+
+        Histories held in memory are dropped; the on-disk cache still saves
+        walking commits seen by earlier runs.
+        """
+        self.histories = {}
+        with self._phase('collect'):
+            asyncio.run(self._read_repos(list(self.config.repos), incremental=False))
+        commits = self._merge()
+        if self._indexing:
+            with self._phase('index'):
+                self.update_index(commits)
+        return commits
+
+    def update(self, names: Optional[Iterable[str]] = None) -> List[Commit]:
+        """Bring the histories held in memory up to date and return all commits, oldest first.
+
+        Only commits made since the last collect()/update() are read. `names`
+        limits the refresh to some repositories (e.g. those whose refs moved);
+        a repository not read before is collected in full.
+        """
+        names = list(self.config.repos) if names is None else list(names)
+        with self._phase('collect'):
+            asyncio.run(self._read_repos(names, incremental=True))
+        if self._indexing:
+            with self._phase('index'):
+                self.update_index([c for name in names if name in self.histories for c in self.histories[name][1]])
+        return self._merge()
+
+    def _all_file_changes(self, commits: List[Commit]) -> Dict[str, List[Tuple[str, int, int, bool]]]:
+        """Re-read every file change of some commits of one repository, in one `git log --stdin` run."""
+        repo = RepoInfo(commits[0].repo.name, self.config.repos[commits[0].repo.name])
+
+        async def read() -> Dict[str, List[Tuple[str, int, int, bool]]]:
+            return {commit.hash: list(commit.files())
+                    async for commit in iter_repo_commits(repo, stdin_revisions=[c.hash for c in commits])}
+
+        try:
+            return asyncio.run(read())
+        except subprocess.CalledProcessError as e:
+            # The stored changes are written instead, and retried on the next sync
+            if self.debug:
+                print(f"Warning: Could not read the full file lists of {repo.name}: {e.stderr}")
+            return {}
+
+    def update_index(self, commits: List[Commit], prune: bool = True) -> None:
+        """Feed collected commits into the SQLite index, touching only what changed.
+
+        With `prune=False` the commits are only added, not taken as each repository's whole history.
+        """
+        from devlog.index import CommitIndex
+
+        commits_by_repo: Dict[str, List[Commit]] = {}
+        for commit in commits:
+            commits_by_repo.setdefault(commit.repo.name, []).append(commit)
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            index = CommitIndex(self.index_path)
+            try:
+                # Repositories that yielded nothing (missing path, git failure) keep their rows
+                for repo_name, repo_commits in commits_by_repo.items():
+                    if repo_commits[0].repo.stats != 'full':
+                        # Without file lists the rows would lose their files (or, with
+                        # no stats at all, their line counts too)
+                        continue
+                    changes = index.sync(repo_name, repo_commits, prune, self._all_file_changes)
+                    if self.debug and any(changes.values()):
+                        print(f"Index {repo_name}: +{changes['added']} ~{changes['updated']} "
+                              f"-{changes['removed']} commits")
+            finally:
+                index.close()
+        except Exception as e:
+            if self.debug:
+                print(f"Warning: Could not update index {self.index_path}: {e}")
+
+    def render(self, output_path: str, shard_by: Optional[str] = None, force: bool = False) -> bool:
+        """Write the DEVLOG of the collected commits to `output_path`, collecting first if needed.
+
+        With `shard_by` ('month' or 'repo-month') the commits go into shards
+        next to a small index at `output_path`. Returns False without touching
+        anything when nothing but the timestamps would change (unless `force`).
+        """
+        commits = self.collect() if self.commits is None else self.commits
+        if shard_by:
+            return self.renderer.write_sharded_devlog(output_path, commits, shard_by, force)
+        return self.renderer.write_devlog(output_path, commits, force)
+
+    def render_html(self, output_dir: str, force: bool = False) -> bool:
+        """Write the static HTML DEVLOG of the collected commits into `output_dir`, collecting first if needed.
+
+        See devlog.web. Returns False when nothing in `output_dir` had to change (unless `force`).
+        """
+        from devlog.web import HtmlSite
+
+        commits = self.collect() if self.commits is None else self.commits
+        return HtmlSite(self.renderer).write_site(output_dir, commits, force)
+
+    async def _recent_repo_commits(self, repo: RepoInfo, previous: Optional[List[str]]) -> List[Commit]:
+        """Return the commits a repository gained since `previous` ([head, *base heads]) and
+        bring its cached rollup up to date with them."""
+        from devlog.render import FullRunNeeded
+
+        source = self._open(repo)
+        try:
+            head = await source.head()
+            bases = await source.bases() if head else []
+            repo.head, repo.base_heads = head, bases
+            if previous is None or head is None:
+                if previous is None and head is None:
+                    return []
+                raise FullRunNeeded(f"{repo.name} has no history to compare with")
+            last_seen, *previous_bases = previous
+            if previous_bases != bases:
+                raise FullRunNeeded(f"the range excluded from {repo.name} moved")
+            record = await asyncio.to_thread(self.cache.load_rollup, repo)
+            if not record or record.get('base_heads', []) != bases or record['head'] not in (head, last_seen):
+                raise FullRunNeeded(f"no cached rollup of {repo.name} matches the previous output")
+
+            new_commits = []
+            if last_seen != head:
+                if not await source.is_ancestor(last_seen, head):
+                    raise FullRunNeeded(f"history of {repo.name} was rewritten since {last_seen[:7]}")
+                await self._refresh_commit_graph(source)
+                new_commits = await source.commits(head, [last_seen, *bases])
+            repo.rollup = Rollup.from_cache(repo, record['rollup'])
+            if record['head'] != head:
+                for commit in new_commits:
+                    repo.rollup.add(commit)
+                repo.rollup.add_files(repo.add_trimmed(source.trimmed))
+                await asyncio.to_thread(self.cache.save_rollup, repo, head)
+            return new_commits
+        finally:
+            source.close()
+
+    async def _day_commits(self, repo: RepoInfo, days: set) -> List[Commit]:
+        """Return a repository's commits dated on any of `days`, walking back only as far as needed."""
+        # --since compares commit dates in local time, so leave room for time zones
+        since = datetime.strptime(min(days), '%Y-%m-%d') - timedelta(days=2)
+        source = self._open(repo)
+        try:
+            commits = await source.commits(repo.head, repo.base_heads, [f"--since={since.strftime('%Y-%m-%d')}"])
+        finally:
+            source.close()
+        return [commit for commit in commits if commit.date.strftime('%Y-%m-%d') in days]
+
+    async def _collect_recent(self, previous_heads: Dict[str, List[str]], previous_units: Dict[str, List]
+                              ) -> Tuple[Dict[str, RepoInfo], List[Commit], List[Commit]]:
+        """Collect what changed since an output was written from `previous_heads`.
+
+        Returns the repositories (with up-to-date rollups), their new commits and
+        every commit dated on a day that gained one or that left Recent Activity
+        in a layout where that changes its entries (see
+        Renderer.days_leaving_recent), which is all that has to be rendered
+        again. Raises FullRunNeeded if that cannot be determined.
+        """
+        from devlog.render import FullRunNeeded
+
+        semaphore = asyncio.Semaphore(max(1, self.config.concurrency))
+        repos = {name: self._repo_info(name) for name, config in self.config.repos.items()
+                 if os.path.exists(config['path'])}
+        if previous_heads.keys() - repos.keys():
+            raise FullRunNeeded(f"{', '.join(previous_heads.keys() - repos.keys())} can no longer be read")
+
+        async def read(name: str, step: Callable) -> List[Commit]:
+            async with semaphore:
+                try:
+                    return await step()
+                except subprocess.CalledProcessError as e:
+                    raise FullRunNeeded(f"git failed in {name}: {e.stderr}") from e
+
+        new_commits = await asyncio.gather(*(
+            read(name, partial(self._recent_repo_commits, repo, previous_heads.get(name)))
+            for name, repo in repos.items()))
+        days = {commit.date.strftime('%Y-%m-%d') for commits in new_commits for commit in commits}
+        days |= self.renderer.days_leaving_recent(previous_units, days)
+        day_commits = []
+        if days:
+            day_commits = await asyncio.gather(*(
+                read(name, partial(self._day_commits, repo, days))
+                for name, repo in repos.items() if repo.head))
+        with self._phase('merge'):
+            return (repos, list(iter_merged_commits(new_commits)), list(iter_merged_commits(day_commits)))
+
+    def render_recent(self, output_path: str, force: bool = False) -> bool:
+        """Refresh `output_path` reading only the commits made since it was written.
+
+        Sections of days without new commits are copied from the existing file
+        and the statistics come from the cached rollups, so the cost follows what
+        changed rather than the length of history. Falls back to collect() and
+        render() when the previous output cannot be brought up to date this way
+        (no manifest, other settings, rewritten history, ...).
+        """
+        from devlog.render import FullRunNeeded
+
+        renderer = self.renderer
+        manifest = renderer.load_render_manifest(output_path)
+        try:
+            if not manifest or 'heads' not in manifest or manifest.get('context') != renderer.render_context():
+                raise FullRunNeeded(f"{output_path} was not written by a full run with these settings")
+            if self.config.windowed:
+                raise FullRunNeeded("--since/--until select their own window")
+            with self._phase('collect'):
+                repos, new_commits, day_commits = asyncio.run(self._collect_recent(manifest['heads'], manifest['units']))
+            with self._phase('grouping'):
+                parts = list(renderer.iter_recent_parts(manifest['units'], repos, new_commits, day_commits))
+        except FullRunNeeded as e:
+            if self.debug:
+                print(f"Collecting full history: {e}")
+            return self.render(output_path, force=force)
+
+        if self.config.index and new_commits and self.use_cache:
+            with self._phase('index'):
+                self.update_index(new_commits, prune=False)
+        if self.debug:
+            print(f"Recent refresh: {len(new_commits)} new commits, {len(day_commits)} re-rendered")
+        written = renderer.write_parts(output_path, parts, force, renderer.manifest_state(repos))
+        renderer.save_entry_cache(day_commits, prune=False)
+        return written
+
+    def watch(self, output_path: str, shard_by: Optional[str] = None, interval: float = 1.0,
+              debounce: float = 2.0) -> None:
+        """Regenerate the DEVLOG whenever a repository's refs change, until interrupted.
+
+        Every repository's history stays in memory; a change re-reads only the
+        repositories whose refs moved and only their new commits, and a burst of
+        changes is folded into one regeneration once refs have been quiet for
+        `debounce` seconds. Only sections (or shards) whose commits changed are
+        re-rendered.
+        """
+        def regenerate(changed: List[str]) -> None:
+            commits = self.update(changed)
+            written = self.render(output_path, shard_by)
+            status = 'updated' if written else 'unchanged'
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {output_path} {status} ({len(commits)} commits)")
+
+        signatures = {name: ref_signature(config['path']) for name, config in self.config.repos.items()
+                      if os.path.exists(config['path'])}
+        regenerate(list(signatures))
+        print(f"👀 Watching {len(signatures)} repositories (Ctrl-C to stop)")
+
+        pending = set()
+        last_change = 0.0
+        try:
+            while True:
+                time.sleep(interval)
+                for name, config in self.config.repos.items():
+                    if not os.path.exists(config['path']):
+                        continue
+                    signature = ref_signature(config['path'])
+                    if signature != signatures.get(name):
+                        signatures[name] = signature
+                        pending.add(name)
+                        last_change = time.monotonic()
+                if pending and time.monotonic() - last_change >= debounce:
+                    changed = sorted(pending)
+                    pending.clear()
+                    if self.debug:
+                        print(f"Refs changed in {', '.join(changed)}")
+                    try:
+                        regenerate(changed)
+                    except Exception as e:
+                        print(f"❌ Error generating DEVLOG: {e}")
+        except KeyboardInterrupt:
+            print("Stopped watching")
@@ -0,0 +1,162 @@
+"""
+Settings of the DEVLOG generator.
+
+The defaults below are overridden by .devlog/config.json. Nothing is read on
+import; DevlogConfig.load() reads the file when a builder is created.
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+# Repository configuration. A repository may also set "include" and "exclude"
+# (lists of git pathspecs, e.g. "package-lock.json" or "*.pdf") and
+# "max_blob_size" (bytes; larger files are not diffed); its statistics then
+# only count what the filters keep and are marked as filtered. "revisions"
+# picks what is walked instead of HEAD: a revision ("main"), a range
+# ("v1.0..main") or a list of git log revision arguments (["main", "^v1.0"]).
+# "stats" overrides the stats level of DevlogConfig for that repository.
+DEFAULT_REPOS = {
+    'markdown-brain-bot': {
+        'path': '/Users/colinaulds/Desktop/projects/markdown-brain-bot',
+        'description': 'Main backend system with Smart Rails routing',
+        'github_url': 'https://github.com/auldsyababua/markdown-brain-bot',
+        'emoji': '🤖'
+    },
+    'gpt-parser': {
+        'path': '/Users/colinaulds/Desktop/projects/gpt-parser',
+        'description': 'Early backend attempt with GPT parsing',
+        'github_url': 'https://github.com/auldsyababua/gpt-parser',
+        'emoji': '🧠'
+    },
+    'bbui': {
+        'path': '/Users/colinaulds/Desktop/projects/bbui',
+        'description': 'Frontend interface for FLRTS system',
+        'github_url': 'https://github.com/auldsyababua/bbui',
+        'emoji': '🎨'
+    }
+}
+
+# Commit categories, highest priority first (see render.CommitClassifier). The
+# defaults recognise Conventional Commits types and scopes plus the keywords
+# older subjects used; override with "categories" in .devlog/config.json.
+DEFAULT_CATEGORY_RULES = [
+    {'label': 'PR merge', 'prefix': ['merge']},
+    {'label': 'Feature', 'type': ['feat', 'feature'], 'contains': ['feat:', 'feature:', 'add ']},
+    {'label': 'Bug fix', 'type': ['fix', 'bug', 'hotfix'], 'contains': ['fix:', 'bug:']},
+    {'label': 'Documentation', 'type': ['docs', 'doc'], 'contains': ['docs:', 'documentation']},
+    {'label': 'Testing', 'type': ['test', 'tests'], 'contains': ['test:', 'testing']},
+    {'label': 'Refactor', 'type': ['refactor'], 'contains': ['refactor:', 'cleanup']},
+    {'label': 'WIP', 'emoji': '🟡', 'type': ['wip'], 'contains': ['wip:', 'work in progress']},
+    {'label': 'Performance', 'type': ['perf']},
+    {'label': 'Revert', 'type': ['revert'], 'prefix': ['revert "']},
+    {'label': 'Style', 'type': ['style']},
+    {'label': 'Build', 'type': ['build', 'ci']},
+    {'label': 'Chore', 'type': ['chore']},
+]
+DEFAULT_CATEGORY = {'label': 'Update', 'emoji': '🟢'}
+
+# Sharded output: one file per month (or per repository and month) in a
+# directory named after the index, e.g. DEVLOG.md + DEVLOG/2024-05.md
+SHARD_MODES = ('month', 'repo-month')
+
+# How much of each commit's diff is collected: 'full' lists every file with
+# its line counts (numstat), 'summary' keeps only the commit's totals (one
+# `--shortstat` line, far less output to move and parse) and 'none' reads no
+# diff at all, which is by far the cheapest walk.
+STATS_LEVELS = ('none', 'summary', 'full')
+
+# Layouts of the single-file DEVLOG: 'standard' renders a recent commit twice,
+# under Recent Activity and in its repository's view; 'deduplicated' renders
+# every commit once, in its repository's view, and makes Recent Activity a
+# one-line-per-commit table of links to the entries (only those entries get
+# an anchor named after their repository and short hash)
+LAYOUTS = ('standard', 'deduplicated')
+
+# Keys of config.json copied onto DevlogConfig attributes of the same name
+SETTINGS = ('concurrency', 'backend', 'index', 'since', 'until', 'hotspots', 'categories',
+            'default_category', 'entry_cache', 'stats', 'commit_graph', 'top_files', 'full_file_lists',
+            'layout', 'expand_repo_views')
+
+
+class DevlogConfig:
+    """The repositories to read plus every collection and rendering option."""
+
+    def __init__(self, repos: Optional[Dict[str, Dict]] = None, **settings):
+        self.repos: Dict[str, Dict] = DEFAULT_REPOS if repos is None else repos
+        # Maximum number of repositories collected at the same time
+        self.concurrency = 8
+        # How commits are read: 'git' runs the git CLI, 'native' reads .git directly
+        # (see gitobjects.py) and only falls back to the CLI when needed
+        self.backend = 'git'
+        # Per-commit detail collected (see STATS_LEVELS): 'full' file
+        # lists, 'summary' totals only or 'none'; a repository's own "stats"
+        # setting overrides it
+        self.stats = 'full'
+        # File changes stored per commit at the 'full' level: its largest ones,
+        # picked while git's output streams in. The totals, the hotspots and
+        # the index's per-file rows still count every file; only the files
+        # kept in memory and in the history cache are limited to these
+        self.top_files = 10
+        # Store every file change instead
+        self.full_file_lists = False
+        # Write or extend each repository's commit-graph (with changed-path
+        # Bloom filters) before walking its history
+        self.commit_graph = False
+        # Keep .devlog/index.sqlite3 (see index.py) in sync on every run
+        self.index = True
+        # Only collect commits in this window (any date `git log --since/--until`
+        # accepts); windowed runs bypass the history cache and the index
+        self.since: Optional[str] = None
+        self.until: Optional[str] = None
+        # Files and authors listed in the statistics' Hotspots section (0 hides it)
+        self.hotspots = 10
+        self.categories = DEFAULT_CATEGORY_RULES
+        self.default_category = DEFAULT_CATEGORY
+        # Layout of the single-file DEVLOG (see LAYOUTS); shards and the HTML
+        # site already render each commit once
+        self.layout = 'standard'
+        # Render the per-repository views expanded (<details open>)
+        self.expand_repo_views = False
+        # Also keep every rendered entry in .devlog/cache/entries.json between runs
+        self.entry_cache = False
+        # Rendered commit entries kept in memory; repeats are mostly the recent
+        # commits shown in both views, so a bounded LRU is enough
+        self.entry_memo_size = 4096
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise TypeError(f"Unknown setting {name!r}")
+            setattr(self, name, value)
+
+    @property
+    def stored_files(self) -> Optional[int]:
+        """File changes kept per commit (None: all of them)."""
+        return None if self.full_file_lists else self.top_files
+
+    @property
+    def windowed(self) -> bool:
+        """Whether only part of each history (--since/--until) is collected."""
+        return bool(self.since or self.until)
+
+    def update(self, data: Dict) -> None:
+        """Apply the settings of a parsed config.json."""
+        if 'repositories' in data:
+            # Merge with default emojis
+            for repo_name, repo_config in data['repositories'].items():
+                if repo_name in self.repos:
+                    repo_config['emoji'] = self.repos[repo_name].get('emoji', '📦')
+            self.repos = data['repositories']
+        for name in SETTINGS:
+            setattr(self, name, data.get(name, getattr(self, name)))
+
+    @classmethod
+    def load(cls, path: str) -> 'DevlogConfig':
+        """Return the defaults overridden by the config file at `path`, if there is one."""
+        config = cls()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    config.update(json.load(f))
+            except Exception as e:
+                print(f"Warning: Could not load config from {path}: {e}")
+        return config
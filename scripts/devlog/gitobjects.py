@@ -0,0 +1,867 @@
+"""
+In-process reader for git repositories.
+
+Reads commits, trees and blobs straight from a repository's `.git` directory
+(loose objects and pack/idx files through `mmap`), walks history the way
+`git log` does and computes `--numstat` lines for each commit without spawning
+git. Anything outside what this reader reproduces exactly is reported to the
+caller instead of guessed at:
+
+- `UnsupportedRepository` is raised when the repository as a whole cannot be
+  read (SHA-256 object format, reftable, replace refs, attributes or config
+  that change diff output, ...).
+- `Repository.numstat()` returns None for a single commit whose stats need
+  the git CLI (rename candidates, submodule or type changes, diffs too large
+  for the exact line counter).
+"""
+
+import glob
+import heapq
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections import Counter, OrderedDict, namedtuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Object type numbers used in pack files
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+TYPE_NAMES = {OBJ_COMMIT: 'commit', OBJ_TREE: 'tree', OBJ_BLOB: 'blob', OBJ_TAG: 'tag'}
+
+# git treats a blob as binary if a NUL shows up in its first 8000 bytes
+BINARY_SNIFF_BYTES = 8000
+# Default core.bigFileThreshold: larger blobs are always diffed as binary
+BIG_FILE_THRESHOLD = 512 * 1024 * 1024
+# xdiff stays minimal until the edit cost reaches 256; past that its
+# heuristics may report different counts, so those diffs go to the CLI.
+MAX_EXACT_EDIT_COST = 256
+# Upper bound on the bytes of inflated delta bases kept for reuse
+DELTA_CACHE_BYTES = 32 * 1024 * 1024
+# Number of parsed trees kept for the next commit's diff
+TREE_CACHE_ENTRIES = 4096
+
+TREE_ENTRY = re.compile(rb'([0-7]+) ([^\0]*)\0(.{20})', re.DOTALL)
+
+# Environment variables that make git read different objects or config
+UNSUPPORTED_ENVIRONMENT = {
+    'GIT_DIR', 'GIT_COMMON_DIR', 'GIT_OBJECT_DIRECTORY', 'GIT_ALTERNATE_OBJECT_DIRECTORIES',
+    'GIT_CONFIG', 'GIT_CONFIG_GLOBAL', 'GIT_CONFIG_SYSTEM', 'GIT_CONFIG_PARAMETERS',
+    'GIT_CONFIG_COUNT', 'GIT_REPLACE_REF_BASE', 'GIT_GRAFT_FILE',
+}
+
+MODE_TREE = 0o040000
+MODE_GITLINK = 0o160000
+
+# Config keys (section.key, lowercased) whose values change `git log --numstat`
+# output in ways this reader does not reproduce. diff.renames can turn on copy
+# detection, which pairs added files with unchanged ones; include.path and
+# includeIf.path pull in config files that are not checked here.
+UNSUPPORTED_CONFIG_KEYS = {
+    'core.quotepath', 'core.bigfilethreshold', 'core.attributesfile',
+    'diff.algorithm', 'diff.external', 'diff.renames', 'extensions.objectformat',
+    'extensions.refstorage', 'include.path', 'includeif.path', 'log.showroot',
+}
+
+Commit = namedtuple('Commit', [
+    'tree', 'parents', 'author', 'author_time', 'author_tz',
+    'commit_time', 'message', 'encoding'
+])
+
+
+class UnsupportedRepository(Exception):
+    """The repository uses a feature the in-process reader does not handle."""
+
+
+class ObjectNotFound(KeyError):
+    """An object id is not present in any loose or packed object store."""
+
+
+def _hex(sha: bytes) -> str:
+    return sha.hex()
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _config_keys(path: str) -> Set[str]:
+    """Return the `section.key` names set in a git config file."""
+    text = _read_text(path)
+    keys = set()
+    if not text:
+        return keys
+    section = ''
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line or line[0] in '#;':
+            continue
+        if line.startswith('['):
+            # [section] or [section "subsection"]; only the section matters here
+            section = line[1:line.index(']')].split()[0].strip('"').lower() if ']' in line else ''
+            continue
+        key = line.split('=', 1)[0].strip().lower()
+        keys.add(f"{section}.{key}")
+    return keys
+
+
+class _Pack:
+    """A pack file and its version 2 index, both memory-mapped."""
+
+    def __init__(self, idx_path: str):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-4] + '.pack'
+        with open(idx_path, 'rb') as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.pack_path, 'rb') as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.idx[:8] != b'\xfftOc\x00\x00\x00\x02':
+            raise UnsupportedRepository(f"unsupported pack index format: {idx_path}")
+        if self.pack[:4] != b'PACK':
+            raise UnsupportedRepository(f"not a pack file: {self.pack_path}")
+
+        self.fanout = struct.unpack_from('>256I', self.idx, 8)
+        self.count = self.fanout[255]
+        self.sha_base = 8 + 256 * 4
+        self.offset_base = self.sha_base + self.count * 20 + self.count * 4
+        self.large_offset_base = self.offset_base + self.count * 4
+
+    def close(self) -> None:
+        self.idx.close()
+        self.pack.close()
+
+    def find(self, sha: bytes) -> Optional[int]:
+        """Return the pack offset of an object, or None if it is not in this pack."""
+        first = sha[0]
+        lo = self.fanout[first - 1] if first else 0
+        hi = self.fanout[first]
+        idx, base = self.idx, self.sha_base
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = base + mid * 20
+            candidate = idx[pos:pos + 20]
+            if candidate < sha:
+                lo = mid + 1
+            elif candidate > sha:
+                hi = mid
+            else:
+                return self._offset(mid)
+        return None
+
+    def _offset(self, index: int) -> int:
+        offset = struct.unpack_from('>I', self.idx, self.offset_base + index * 4)[0]
+        if offset & 0x80000000:
+            large_index = offset & 0x7fffffff
+            offset = struct.unpack_from('>Q', self.idx, self.large_offset_base + large_index * 8)[0]
+        return offset
+
+    def inflate(self, offset: int, size: int) -> bytes:
+        """Inflate the zlib stream that starts at `offset`."""
+        decompressor = zlib.decompressobj()
+        chunk_size = max(4096, size + 64)
+        chunks = []
+        pos = offset
+        while not decompressor.eof:
+            piece = self.pack[pos:pos + chunk_size]
+            if not piece:
+                raise ValueError(f"truncated object at offset {offset} in {self.pack_path}")
+            chunks.append(decompressor.decompress(piece))
+            pos += len(piece)
+        return b''.join(chunks)
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Apply a git delta to its base object."""
+    pos = 0
+    for _ in range(2):
+        # Source and target sizes; only needed to skip past them
+        while delta[pos] & 0x80:
+            pos += 1
+        pos += 1
+
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            copy_offset = copy_size = 0
+            for shift, bit in ((0, 0x01), (8, 0x02), (16, 0x04), (24, 0x08)):
+                if op & bit:
+                    copy_offset |= delta[pos] << shift
+                    pos += 1
+            for shift, bit in ((0, 0x10), (8, 0x20), (16, 0x40)):
+                if op & bit:
+                    copy_size |= delta[pos] << shift
+                    pos += 1
+            if copy_size == 0:
+                copy_size = 0x10000
+            out += base[copy_offset:copy_offset + copy_size]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("invalid delta opcode 0")
+    return bytes(out)
+
+
+def _split_lines(data: bytes) -> List[bytes]:
+    """Split blob content into lines the way xdiff records them."""
+    if not data:
+        return []
+    lines = data.split(b'\n')
+    last = lines.pop()
+    lines = [line + b'\n' for line in lines]
+    if last:
+        # A final line without a newline differs from the same line with one
+        lines.append(last)
+    return lines
+
+
+def _bogosqrt(n: int) -> int:
+    """xdiff's cheap integer square-root approximation."""
+    i = 1
+    while n > 0:
+        i <<= 1
+        n >>= 2
+    return i
+
+
+def _clean_mmatch(dis: List[int], i: int, start: int, end: int) -> bool:
+    """Port of xdiff's xdl_clean_mmatch(): should multi-match line `i` be discarded?"""
+    window = 100
+    if i - start > window:
+        start = i - window
+    if end - i > window:
+        end = i + window
+
+    rdis0, rpdis0 = 0, 1
+    r = 1
+    while i - r >= start:
+        if not dis[i - r]:
+            rdis0 += 1
+        elif dis[i - r] == 2:
+            rpdis0 += 1
+        else:
+            break
+        r += 1
+    if rdis0 == 0:
+        return False
+
+    rdis1, rpdis1 = 0, 1
+    r = 1
+    while i + r <= end:
+        if not dis[i + r]:
+            rdis1 += 1
+        elif dis[i + r] == 2:
+            rpdis1 += 1
+        else:
+            break
+        r += 1
+    if rdis1 == 0:
+        return False
+
+    rdis1 += rdis0
+    rpdis1 += rpdis0
+    return rpdis1 * 4 < rpdis1 + rdis1
+
+
+def _myers_distance(a: List[int], b: List[int], max_cost: int) -> Optional[int]:
+    """Minimal insert+delete edit distance, or None once it exceeds `max_cost`."""
+    n, m = len(a), len(b)
+    if not n or not m:
+        return n + m if n + m <= max_cost else None
+    offset = max_cost + 1
+    v = [0] * (2 * max_cost + 3)
+    for d in range(max_cost + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return d
+    return None
+
+
+def count_line_changes(old: bytes, new: bytes) -> Optional[Tuple[int, int]]:
+    """Return (insertions, deletions) as `git diff --numstat` counts them.
+
+    Mirrors xdiff's preprocessing (common prefix/suffix trimming and discarding
+    of unmatched and noisy multi-match lines) followed by a minimal Myers diff.
+    Returns None when the diff is costly enough for xdiff's non-minimal
+    heuristics to kick in.
+    """
+    lines1 = _split_lines(old)
+    lines2 = _split_lines(new)
+    n1, n2 = len(lines1), len(lines2)
+
+    start = 0
+    limit = min(n1, n2)
+    while start < limit and lines1[start] == lines2[start]:
+        start += 1
+    tail = 0
+    limit -= start
+    while tail < limit and lines1[n1 - 1 - tail] == lines2[n2 - 1 - tail]:
+        tail += 1
+
+    # Match counts are taken over the whole files, as xdiff's classifier does
+    count1 = Counter(lines1)
+    count2 = Counter(lines2)
+    classes: Dict[bytes, int] = {}
+
+    def reduce(lines, counts_other, n, end):
+        mlim = min(_bogosqrt(n), 1024)
+        dis = [0] * (n + 1)
+        for i in range(start, end + 1):
+            matches = counts_other[lines[i]]
+            dis[i] = 0 if matches == 0 else (2 if matches >= mlim else 1)
+        kept = []
+        discarded = 0
+        for i in range(start, end + 1):
+            if dis[i] == 1 or (dis[i] == 2 and not _clean_mmatch(dis, i, start, end)):
+                kept.append(classes.setdefault(lines[i], len(classes)))
+            else:
+                discarded += 1
+        return kept, discarded
+
+    kept1, discarded1 = reduce(lines1, count2, n1, n1 - tail - 1)
+    kept2, discarded2 = reduce(lines2, count1, n2, n2 - tail - 1)
+
+    distance = _myers_distance(kept1, kept2, MAX_EXACT_EDIT_COST)
+    if distance is None:
+        return None
+    # distance = ins + del and len(kept2) - len(kept1) = ins - del
+    insertions = (distance + len(kept2) - len(kept1)) // 2
+    deletions = distance - insertions
+    return insertions + discarded2, deletions + discarded1
+
+
+def quote_path(path: bytes) -> str:
+    """Quote a path the way git prints it with the default core.quotePath."""
+    special = {7: 'a', 8: 'b', 9: 't', 10: 'n', 11: 'v', 12: 'f', 13: 'r', 0x22: '"', 0x5c: '\\'}
+    if not any(c < 0x20 or c >= 0x7f or c in (0x22, 0x5c) for c in path):
+        return path.decode('ascii')
+    out = ['"']
+    for c in path:
+        if c in special:
+            out.append('\\' + special[c])
+        elif c < 0x20 or c >= 0x7f:
+            out.append(f'\\{c:03o}')
+        else:
+            out.append(chr(c))
+    out.append('"')
+    return ''.join(out)
+
+
+def _is_binary(data: bytes) -> bool:
+    return len(data) > BIG_FILE_THRESHOLD or b'\0' in data[:BINARY_SNIFF_BYTES]
+
+
+class _NeedsCli(Exception):
+    """Raised inside numstat() when a commit's stats must come from git."""
+
+
+class Repository:
+    """Read-only access to the objects and refs of one git repository."""
+
+    def __init__(self, path: str):
+        self.git_dir = self._find_git_dir(path)
+        common = _read_text(os.path.join(self.git_dir, 'commondir'))
+        self.common_dir = (os.path.normpath(os.path.join(self.git_dir, common.strip()))
+                           if common else self.git_dir)
+        self._check_supported()
+
+        self.object_dirs = [os.path.join(self.common_dir, 'objects')]
+        alternates = _read_text(os.path.join(self.object_dirs[0], 'info', 'alternates'))
+        for line in (alternates or '').splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                self.object_dirs.append(os.path.normpath(os.path.join(self.object_dirs[0], line)))
+
+        self.packs = []
+        for object_dir in self.object_dirs:
+            for idx_path in sorted(glob.glob(os.path.join(object_dir, 'pack', '*.idx'))):
+                if os.path.exists(idx_path[:-4] + '.pack'):
+                    self.packs.append(_Pack(idx_path))
+
+        shallow = _read_text(os.path.join(self.common_dir, 'shallow'))
+        self.shallow = {bytes.fromhex(line.strip()) for line in (shallow or '').splitlines() if line.strip()}
+
+        self._delta_cache: 'OrderedDict[Tuple[int, int], Tuple[int, bytes]]' = OrderedDict()
+        self._delta_cache_bytes = 0
+        self._commits: Dict[bytes, Commit] = {}
+        self._trees: 'OrderedDict[bytes, List[Tuple[bytes, bytes, int, bytes]]]' = OrderedDict()
+
+        head = self.resolve('HEAD')
+        if head:
+            self._check_attributes(head)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        for pack in self.packs:
+            pack.close()
+        self.packs = []
+
+    @staticmethod
+    def _find_git_dir(path: str) -> str:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            text = _read_text(dot_git) or ''
+            if text.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(path, text[len('gitdir:'):].strip()))
+        if os.path.isfile(os.path.join(path, 'HEAD')) and os.path.isdir(os.path.join(path, 'objects')):
+            return path
+        raise UnsupportedRepository(f"no git directory found at {path}")
+
+    def _check_supported(self) -> None:
+        common = self.common_dir
+        for name in ('reftable', os.path.join('info', 'grafts'), os.path.join('info', 'attributes')):
+            if os.path.exists(os.path.join(common, name)):
+                raise UnsupportedRepository(f"{name} is not supported")
+        if os.path.isdir(os.path.join(common, 'refs', 'replace')) and os.listdir(os.path.join(common, 'refs', 'replace')):
+            raise UnsupportedRepository("replace refs are not supported")
+
+        config_files = [os.path.join(common, 'config'), '/etc/gitconfig', os.path.expanduser('~/.gitconfig')]
+        xdg_home = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+        config_files.append(os.path.join(xdg_home, 'git', 'config'))
+        for config_path in config_files:
+            unsupported = _config_keys(config_path) & UNSUPPORTED_CONFIG_KEYS
+            if unsupported:
+                raise UnsupportedRepository(f"{', '.join(sorted(unsupported))} set in {config_path}")
+        if os.path.exists(os.path.join(xdg_home, 'git', 'attributes')):
+            raise UnsupportedRepository("global git attributes are not supported")
+        overrides = UNSUPPORTED_ENVIRONMENT & set(os.environ)
+        if overrides:
+            raise UnsupportedRepository(f"{', '.join(sorted(overrides))} set in the environment")
+
+    def _check_attributes(self, head: str) -> None:
+        """Reject trees whose .gitattributes could change how files are diffed."""
+        stack = [self.read_commit(bytes.fromhex(head)).tree]
+        while stack:
+            for _, name, mode, sha in self.read_tree(stack.pop()):
+                if mode == MODE_TREE:
+                    stack.append(sha)
+                elif name == b'.gitattributes' and mode != MODE_GITLINK:
+                    text = self.read_object(sha)[1].decode('utf-8', errors='replace')
+                    for line in text.splitlines():
+                        attributes = line.split()[1:]
+                        if any('diff' in attr or 'binary' in attr for attr in attributes):
+                            raise UnsupportedRepository(".gitattributes with diff settings is not supported")
+
+    # -- refs -------------------------------------------------------------
+
+    def _packed_refs(self) -> Dict[str, str]:
+        refs = {}
+        text = _read_text(os.path.join(self.common_dir, 'packed-refs')) or ''
+        for line in text.splitlines():
+            if line and line[0] not in '#^':
+                sha, _, name = line.partition(' ')
+                refs[name.strip()] = sha
+        return refs
+
+    def resolve(self, ref: str = 'HEAD') -> Optional[str]:
+        """Resolve a ref (following symbolic refs) to a hex object id."""
+        for _ in range(10):
+            base = self.git_dir if ref == 'HEAD' else self.common_dir
+            text = _read_text(os.path.join(base, ref))
+            if text is None:
+                text = self._packed_refs().get(ref)
+                if text is None:
+                    return None
+            text = text.strip()
+            if text.startswith('ref:'):
+                ref = text[4:].strip()
+                continue
+            return text
+        raise UnsupportedRepository(f"symbolic ref loop at {ref}")
+
+    # -- objects ----------------------------------------------------------
+
+    def _read_loose(self, sha: bytes) -> Optional[Tuple[int, bytes]]:
+        hexsha = _hex(sha)
+        for object_dir in self.object_dirs:
+            path = os.path.join(object_dir, hexsha[:2], hexsha[2:])
+            try:
+                with open(path, 'rb') as f:
+                    raw = zlib.decompress(f.read())
+            except FileNotFoundError:
+                continue
+            header, _, body = raw.partition(b'\0')
+            type_name = header.split(b' ', 1)[0].decode('ascii')
+            for type_num, name in TYPE_NAMES.items():
+                if name == type_name:
+                    return type_num, body
+            raise ValueError(f"unknown object type {type_name} for {hexsha}")
+        return None
+
+    def _read_packed(self, pack: _Pack, offset: int) -> Tuple[int, bytes]:
+        key = (id(pack), offset)
+        cached = self._delta_cache.get(key)
+        if cached is not None:
+            self._delta_cache.move_to_end(key)
+            return cached
+
+        data = pack.pack
+        pos = offset
+        byte = data[pos]
+        pos += 1
+        obj_type = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        if obj_type == OBJ_OFS_DELTA:
+            byte = data[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base_type, base = self._read_packed(pack, offset - distance)
+            result = (base_type, _apply_delta(base, pack.inflate(pos, size)))
+        elif obj_type == OBJ_REF_DELTA:
+            base_type, base = self.read_object(bytes(data[pos:pos + 20]))
+            result = (base_type, _apply_delta(base, pack.inflate(pos + 20, size)))
+        elif obj_type in TYPE_NAMES:
+            result = (obj_type, pack.inflate(pos, size))
+        else:
+            raise ValueError(f"unknown pack object type {obj_type} in {pack.pack_path}")
+
+        # Keep recently inflated objects around: they are the likely bases of
+        # the next deltas and the trees of the next commits.
+        self._delta_cache[key] = result
+        self._delta_cache_bytes += len(result[1])
+        while self._delta_cache_bytes > DELTA_CACHE_BYTES and len(self._delta_cache) > 1:
+            _, (_, evicted) = self._delta_cache.popitem(last=False)
+            self._delta_cache_bytes -= len(evicted)
+        return result
+
+    def read_object(self, sha: bytes) -> Tuple[int, bytes]:
+        """Return (type, content) for a binary object id."""
+        for pack in self.packs:
+            offset = pack.find(sha)
+            if offset is not None:
+                return self._read_packed(pack, offset)
+        loose = self._read_loose(sha)
+        if loose is None:
+            raise ObjectNotFound(_hex(sha))
+        return loose
+
+    def read_commit(self, sha: bytes) -> Commit:
+        """Parse a commit object (cached for the life of the reader)."""
+        commit = self._commits.get(sha)
+        if commit is not None:
+            return commit
+
+        obj_type, data = self.read_object(sha)
+        while obj_type == OBJ_TAG:
+            obj_type, data = self.read_object(bytes.fromhex(data.split(b'\n', 1)[0].split(b' ')[1].decode()))
+        if obj_type != OBJ_COMMIT:
+            raise ValueError(f"{_hex(sha)} is not a commit")
+
+        headers, _, message = data.partition(b'\n\n')
+        tree = None
+        parents = []
+        author = b''
+        author_time = commit_time = 0
+        author_tz = 0
+        encoding = None
+        for line in headers.split(b'\n'):
+            if line.startswith(b' '):
+                continue  # continuation of a multi-line header such as gpgsig
+            key, _, value = line.partition(b' ')
+            if key == b'tree':
+                tree = bytes.fromhex(value.decode())
+            elif key == b'parent':
+                parents.append(bytes.fromhex(value.decode()))
+            elif key == b'author':
+                author, author_time, author_tz = self._parse_ident(value)
+            elif key == b'committer':
+                _, commit_time, _ = self._parse_ident(value)
+            elif key == b'encoding':
+                encoding = value.decode('ascii', errors='replace')
+
+        if sha in self.shallow:
+            parents = []
+        commit = Commit(tree, tuple(parents), author, author_time, author_tz,
+                        commit_time, message, encoding)
+        self._commits[sha] = commit
+        return commit
+
+    @staticmethod
+    def _parse_ident(value: bytes) -> Tuple[bytes, int, int]:
+        """Split `Name <email> timestamp tz` into (name, timestamp, tz as +HHMM int)."""
+        lt = value.find(b'<')
+        name = value[:lt].rstrip() if lt >= 0 else value
+        gt = value.rfind(b'>')
+        rest = value[gt + 1:].split() if gt >= 0 else []
+        try:
+            timestamp = int(rest[0])
+            tz = int(rest[1]) if len(rest) > 1 else 0
+        except (IndexError, ValueError):
+            timestamp, tz = 0, 0
+        return name, timestamp, tz
+
+    def read_tree(self, sha: bytes) -> List[Tuple[bytes, bytes, int, bytes]]:
+        """Return the (sort key, name, mode, sha) entries of a tree object.
+
+        The sort key is the name with a trailing slash for subtrees, which is
+        the order git keeps tree entries in.
+        """
+        entries = self._trees.get(sha)
+        if entries is not None:
+            self._trees.move_to_end(sha)
+            return entries
+
+        obj_type, data = self.read_object(sha)
+        if obj_type != OBJ_TREE:
+            raise ValueError(f"{_hex(sha)} is not a tree")
+        entries = []
+        for mode_bytes, name, entry_sha in TREE_ENTRY.findall(data):
+            mode = int(mode_bytes, 8)
+            entries.append((name + b'/' if mode == MODE_TREE else name, name, mode, entry_sha))
+
+        # Consecutive commits mostly share subtrees, so keep recent ones
+        self._trees[sha] = entries
+        if len(self._trees) > TREE_CACHE_ENTRIES:
+            self._trees.popitem(last=False)
+        return entries
+
+    # -- history ----------------------------------------------------------
+
+    def walk(self, include: List[str], exclude: List[str] = ()) -> List[bytes]:
+        """Return commits reachable from `include` but not `exclude`, oldest first.
+
+        Follows git's revision walk: a queue ordered by committer date, with
+        commits reachable from an excluded tip painted uninteresting. The
+        result is then sorted like `--author-date-order`: no parent before all
+        of its children, otherwise by author date.
+        """
+        uninteresting: Set[bytes] = set()
+        seen: Set[bytes] = set()
+        queue = []
+        counter = 0
+
+        def push(sha: bytes) -> None:
+            nonlocal counter
+            if sha in seen:
+                return
+            seen.add(sha)
+            counter += 1
+            heapq.heappush(queue, (-self.read_commit(sha).commit_time, counter, sha))
+
+        def mark_uninteresting(sha: bytes) -> None:
+            stack = [sha]
+            while stack:
+                current = stack.pop()
+                if current in uninteresting:
+                    continue
+                uninteresting.add(current)
+                if current in seen:
+                    # Already expanded: its parents need the mark as well
+                    stack.extend(p for p in self.read_commit(current).parents if p in seen)
+
+        for hexsha in exclude:
+            sha = bytes.fromhex(hexsha)
+            push(sha)
+            mark_uninteresting(sha)
+        for hexsha in include:
+            push(bytes.fromhex(hexsha))
+
+        order = []
+        while queue:
+            if exclude and all(entry[2] in uninteresting for entry in queue):
+                break
+            _, _, sha = heapq.heappop(queue)
+            commit = self.read_commit(sha)
+            for parent in commit.parents:
+                if sha in uninteresting:
+                    mark_uninteresting(parent)
+                push(parent)
+            if sha not in uninteresting:
+                order.append(sha)
+
+        order = [sha for sha in order if sha not in uninteresting]
+        return self._author_date_order(order)
+
+    def _author_date_order(self, order: List[bytes]) -> List[bytes]:
+        """Reorder a walk (newest first) like `git log --reverse --author-date-order`, oldest first."""
+        pending_children = dict.fromkeys(order, 0)
+        for sha in order:
+            for parent in self.read_commit(sha).parents:
+                if parent in pending_children:
+                    pending_children[parent] += 1
+
+        ready = []
+        counter = 0
+        for sha in order:
+            if not pending_children[sha]:
+                counter += 1
+                heapq.heappush(ready, (-self.read_commit(sha).author_time, counter, sha))
+        result = []
+        while ready:
+            _, _, sha = heapq.heappop(ready)
+            result.append(sha)
+            for parent in self.read_commit(sha).parents:
+                if parent in pending_children:
+                    pending_children[parent] -= 1
+                    if not pending_children[parent]:
+                        counter += 1
+                        heapq.heappush(ready, (-self.read_commit(parent).author_time, counter, parent))
+        result.reverse()
+        return result
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """Return True if `ancestor` is reachable from `descendant`."""
+        target = bytes.fromhex(ancestor)
+        stack = [bytes.fromhex(descendant)]
+        seen = set()
+        while stack:
+            sha = stack.pop()
+            if sha == target:
+                return True
+            if sha in seen:
+                continue
+            seen.add(sha)
+            try:
+                stack.extend(self.read_commit(sha).parents)
+            except ObjectNotFound:
+                return False
+        return False
+
+    # -- log output -------------------------------------------------------
+
+    def log_fields(self, sha: bytes) -> Tuple[str, str, str, str]:
+        """Return (hash, %ad with --date=raw, %s, %an) for a commit."""
+        commit = self.read_commit(sha)
+        encoding = commit.encoding or 'utf-8'
+        try:
+            message = commit.message.decode(encoding, errors='replace')
+            author = commit.author.decode(encoding, errors='replace')
+        except LookupError:
+            message = commit.message.decode('utf-8', errors='replace')
+            author = commit.author.decode('utf-8', errors='replace')
+
+        # %s: the first paragraph, its lines right-trimmed and joined by spaces
+        subject_lines = []
+        for line in message.lstrip('\n').split('\n'):
+            line = line.rstrip()
+            if not line:
+                if subject_lines:
+                    break
+                continue
+            subject_lines.append(line)
+
+        tz = commit.author_tz
+        date_str = f"{commit.author_time} {'-' if tz < 0 else '+'}{abs(tz):04d}"
+        return _hex(sha), date_str, ' '.join(subject_lines), author
+
+    def _diff_trees(self, old: Optional[bytes], new: Optional[bytes], prefix: bytes,
+                    out: List[Tuple[bytes, int, Optional[bytes], int, Optional[bytes]]]) -> None:
+        """Append (path, old_mode, old_sha, new_mode, new_sha) for changed files."""
+        old_entries = self.read_tree(old) if old else []
+        new_entries = self.read_tree(new) if new else []
+        old_count, new_count = len(old_entries), len(new_entries)
+
+        i = j = 0
+        while i < old_count or j < new_count:
+            a = old_entries[i] if i < old_count else None
+            b = new_entries[j] if j < new_count else None
+            if a is not None and b is not None and a[0] == b[0]:
+                i += 1
+                j += 1
+                if a[3] == b[3] and a[2] == b[2]:
+                    continue
+                if a[2] == MODE_TREE:
+                    self._diff_trees(a[3], b[3], prefix + a[0], out)
+                else:
+                    out.append((prefix + a[1], a[2], a[3], b[2], b[3]))
+            elif b is None or (a is not None and a[0] < b[0]):
+                i += 1
+                if a[2] == MODE_TREE:
+                    self._diff_trees(a[3], None, prefix + a[0], out)
+                else:
+                    out.append((prefix + a[1], a[2], a[3], 0, None))
+            else:
+                j += 1
+                if b[2] == MODE_TREE:
+                    self._diff_trees(None, b[3], prefix + b[0], out)
+                else:
+                    out.append((prefix + b[1], 0, None, b[2], b[3]))
+
+    def numstat(self, sha: bytes) -> Optional[List[str]]:
+        """Return the `git log --numstat --cc` lines for a commit.
+
+        Merges are diffed against their first parent, root commits against the
+        empty tree. Returns None when the git CLI has to produce the stats.
+        """
+        commit = self.read_commit(sha)
+        parent_tree = self.read_commit(commit.parents[0]).tree if commit.parents else None
+        changes = []
+        self._diff_trees(parent_tree, commit.tree, b'', changes)
+
+        added = any(old_sha is None for _, _, old_sha, _, _ in changes)
+        deleted = any(new_sha is None for _, _, _, _, new_sha in changes)
+        if added and deleted:
+            return None  # git's rename detection may pair these up
+
+        lines = []
+        try:
+            for path, old_mode, old_sha, new_mode, new_sha in changes:
+                lines.append(self._numstat_line(path, old_mode, old_sha, new_mode, new_sha))
+        except _NeedsCli:
+            return None
+        return lines
+
+    def _numstat_line(self, path: bytes, old_mode: int, old_sha: Optional[bytes],
+                      new_mode: int, new_sha: Optional[bytes]) -> str:
+        if MODE_GITLINK in (old_mode, new_mode):
+            raise _NeedsCli()
+        if old_sha is not None and new_sha is not None and (old_mode ^ new_mode) & 0o170000:
+            raise _NeedsCli()  # file <-> symlink type change
+
+        old_data = self.read_object(old_sha)[1] if old_sha is not None else b''
+        new_data = self.read_object(new_sha)[1] if new_sha is not None else b''
+        name = quote_path(path)
+        if _is_binary(old_data) or _is_binary(new_data):
+            return f"-\t-\t{name}"
+        if old_sha == new_sha:
+            return f"0\t0\t{name}"
+        counts = count_line_changes(old_data, new_data)
+        if counts is None:
+            raise _NeedsCli()
+        return f"{counts[0]}\t{counts[1]}\t{name}"
+
+    def iter_log(self, include: List[str], exclude: List[str] = ()) -> Iterator[Tuple[Tuple[str, str, str, str], Optional[List[str]]]]:
+        """Yield (log fields, numstat lines or None) in `git log --reverse` order."""
+        for sha in self.walk(include, exclude):
+            yield self.log_fields(sha), self.numstat(sha)
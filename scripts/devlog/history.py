@@ -0,0 +1,970 @@
+"""
+Commit model and history reading for the DEVLOG generator.
+
+Commits come from one streaming `git log --numstat` per repository (or the
+in-process reader of gitobjects.py) and are stored columnar in their
+RepoInfo. Parsed histories and their rollups are cached in .devlog/cache
+by HistoryCache so a run only walks commits it has not seen.
+"""
+
+import asyncio
+import heapq
+import json
+import os
+import re
+import subprocess
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from devlog.config import STATS_LEVELS
+
+
+class Rollup:
+    """Running totals for one repository, updated only by newly ingested commits.
+
+    Per-author, per-day and per-file aggregates are [commits, insertions,
+    deletions]; files are keyed by the repository's interned path id.
+    """
+
+    __slots__ = ('commits', 'files_changed', 'insertions', 'deletions', 'authors', 'days', 'files')
+
+    def __init__(self):
+        self.commits = 0
+        self.files_changed = 0
+        self.insertions = 0
+        self.deletions = 0
+        self.authors: Dict[str, List[int]] = {}
+        self.days: Dict[str, List[int]] = {}
+        self.files: Dict[int, List[int]] = {}
+
+    def add(self, commit: 'Commit') -> None:
+        insertions, deletions = commit.total_insertions, commit.total_deletions
+        self.commits += 1
+        self.files_changed += commit.files_changed
+        self.insertions += insertions
+        self.deletions += deletions
+        for totals, key in ((self.authors, commit.author), (self.days, commit.date.strftime('%Y-%m-%d'))):
+            entry = totals.get(key)
+            if entry is None:
+                totals[key] = [1, insertions, deletions]
+            else:
+                entry[0] += 1
+                entry[1] += insertions
+                entry[2] += deletions
+
+        repo = commit.repo
+        files = self.files
+        for i in range(commit.files_start, commit.files_end):
+            path_id = repo.file_paths[i]
+            entry = files.get(path_id)
+            if entry is None:
+                files[path_id] = [1, repo.file_insertions[i], repo.file_deletions[i]]
+            else:
+                entry[0] += 1
+                entry[1] += repo.file_insertions[i]
+                entry[2] += repo.file_deletions[i]
+
+    def add_files(self, files: Dict[int, List[int]]) -> None:
+        """Add per-file [commits, insertions, deletions] of changes no commit stores (see RepoInfo.trimmed_files)."""
+        for path_id, (commits, insertions, deletions) in files.items():
+            entry = self.files.get(path_id)
+            if entry is None:
+                self.files[path_id] = [commits, insertions, deletions]
+            else:
+                entry[0] += commits
+                entry[1] += insertions
+                entry[2] += deletions
+
+    @classmethod
+    def from_commits(cls, commits: Iterable['Commit'], trimmed: Optional[Dict[int, List[int]]] = None) -> 'Rollup':
+        """Total `commits`, plus the file changes `trimmed` from them."""
+        rollup = cls()
+        for commit in commits:
+            rollup.add(commit)
+        if trimmed:
+            rollup.add_files(trimmed)
+        return rollup
+
+    def to_cache(self, repo: 'RepoInfo') -> Dict:
+        return {
+            'totals': [self.commits, self.files_changed, self.insertions, self.deletions],
+            'authors': self.authors,
+            'days': self.days,
+            'files': {repo.paths[path_id]: entry for path_id, entry in self.files.items()},
+        }
+
+    @classmethod
+    def from_cache(cls, repo: 'RepoInfo', record: Dict) -> 'Rollup':
+        rollup = cls()
+        rollup.commits, rollup.files_changed, rollup.insertions, rollup.deletions = record['totals']
+        rollup.authors = {repo.intern_author(author): entry for author, entry in record['authors'].items()}
+        rollup.days = record['days']
+        rollup.files = {repo.intern_path(filename): entry for filename, entry in record['files'].items()}
+        return rollup
+
+
+def _exclude_pathspec(spec: str) -> str:
+    """Turn a config `exclude` entry into an exclude pathspec, keeping any magic it already has."""
+    if spec.startswith(':('):
+        return f":(exclude,{spec[2:]}"
+    if spec.startswith(':'):
+        return f":!{spec[1:]}"
+    return f":(exclude){spec}"
+
+
+def _parse_revisions(spec: Union[str, List[str]]) -> Tuple[str, List[str]]:
+    """Split a config "revisions" value into (tip, excluded revisions)."""
+    tip = None
+    bases = []
+    for arg in spec.split() if isinstance(spec, str) else spec:
+        if '..' in arg and '...' not in arg:
+            base, _, arg = arg.partition('..')
+            bases.append(base or 'HEAD')
+            arg = arg or 'HEAD'
+        if arg.startswith('^'):
+            bases.append(arg[1:])
+        elif tip is None:
+            tip = arg
+        else:
+            raise ValueError(f"Only one revision to walk from is supported, got {spec!r}")
+    return tip or 'HEAD', bases
+
+
+class RepoInfo:
+    """Repository metadata plus a columnar store of its commits' file changes.
+
+    Every commit of the repository references this object instead of copying
+    its description, URL and emoji. File changes are appended to parallel
+    arrays (interned path id, insertions, deletions, binary flag); a commit
+    owns the contiguous slice that starts at its `files_start`.
+
+    The optional `include`/`exclude` pathspecs and `max_blob_size` of the
+    config are handed to git (see repo_log_command), so filtered-out paths
+    and oversized blobs are never diffed. `stats` is the level of detail
+    collected per commit (see config.STATS_LEVELS); a repository's own "stats"
+    setting overrides the one it is created with. `top_files` bounds the
+    file changes stored per commit to its largest ones (None stores all);
+    `trimmed_files` sums the others per path as [commits, insertions,
+    deletions], so the per-file rollup still counts every change.
+    `tip` and `bases` are the configured revisions to walk (`tip` but not
+    `bases`); `head` and `base_heads` are what they resolved to when the
+    history was last read.
+    """
+
+    __slots__ = ('name', 'path', 'description', 'github_url', 'emoji', 'pathspecs', 'max_blob_size', 'stats',
+                 'top_files', 'trimmed_files', 'tip', 'bases', 'head', 'base_heads',
+                 'paths', '_path_ids', 'file_paths', 'file_insertions', 'file_deletions', 'file_binary',
+                 '_authors', 'rollup')
+
+    def __init__(self, name: str, repo_config: Dict, stats: str = 'full', top_files: Optional[int] = None):
+        self.name = name
+        self.path = repo_config['path']
+        self.description = repo_config['description']
+        self.github_url = repo_config['github_url']
+        self.emoji = repo_config.get('emoji', '📦')
+        self.pathspecs = list(repo_config.get('include', [])) + [
+            _exclude_pathspec(spec) for spec in repo_config.get('exclude', [])]
+        self.max_blob_size: Optional[int] = repo_config.get('max_blob_size')
+        self.stats = repo_config.get('stats', stats)
+        if self.stats not in STATS_LEVELS:
+            raise ValueError(f"Unknown stats level {self.stats!r} for {name}")
+        self.top_files = top_files
+        self.trimmed_files: Dict[int, List[int]] = {}
+        self.tip, self.bases = _parse_revisions(repo_config.get('revisions', 'HEAD'))
+        self.head: Optional[str] = None
+        self.base_heads: List[str] = []
+        self.paths: List[str] = []
+        self._path_ids: Dict[str, int] = {}
+        self.file_paths = array('I')
+        self.file_insertions = array('I')
+        self.file_deletions = array('I')
+        self.file_binary = bytearray()
+        self._authors: Dict[str, str] = {}
+        self.rollup = Rollup()
+
+    @property
+    def file_count(self) -> int:
+        return len(self.file_paths)
+
+    @property
+    def filtered(self) -> bool:
+        """Whether the statistics leave out some paths or blob diffs."""
+        return bool(self.pathspecs or self.max_blob_size)
+
+    @property
+    def filters(self) -> List:
+        """The settings that shape this repository's statistics, as stored in its cache."""
+        return [self.pathspecs, self.max_blob_size]
+
+    def add_file(self, filename: str, insertions: int, deletions: int, binary: bool = False) -> None:
+        """Append one file change to the columnar store."""
+        self.file_paths.append(self.intern_path(filename))
+        self.file_insertions.append(insertions)
+        self.file_deletions.append(deletions)
+        self.file_binary.append(binary)
+
+    def add_trimmed(self, files: Dict[str, List[int]]) -> Dict[int, List[int]]:
+        """Add per-file totals of changes that were not stored to `trimmed_files`.
+
+        Returns the same totals keyed by path id, for the rollup.
+        """
+        by_id = {}
+        for filename, (commits, insertions, deletions) in files.items():
+            path_id = self.intern_path(filename)
+            by_id[path_id] = [commits, insertions, deletions]
+            entry = self.trimmed_files.get(path_id)
+            if entry is None:
+                self.trimmed_files[path_id] = [commits, insertions, deletions]
+            else:
+                entry[0] += commits
+                entry[1] += insertions
+                entry[2] += deletions
+        return by_id
+
+    def intern_author(self, author: str) -> str:
+        """Share one string object per author name."""
+        return self._authors.setdefault(author, author)
+
+    def intern_path(self, filename: str) -> int:
+        """Return the id of a path, assigning the next one if it is new."""
+        path_id = self._path_ids.get(filename)
+        if path_id is None:
+            path_id = self._path_ids[filename] = len(self.paths)
+            self.paths.append(filename)
+        return path_id
+
+
+class Commit:
+    """A commit with its totals; per-file changes live in `repo`'s columns.
+
+    The commit owns the file changes from `files_start` to the end of the
+    columns. Its totals are their sums unless `totals` (files changed,
+    insertions, deletions) says otherwise, as when fewer files than were
+    changed are stored.
+    """
+
+    __slots__ = ('hash', 'date', 'subject', 'author', 'repo',
+                 'files_start', 'files_end', 'files_changed', 'total_insertions', 'total_deletions')
+
+    def __init__(self, repo: RepoInfo, hash_full: str, date: datetime, subject: str, author: str,
+                 files_start: int, totals: Optional[Tuple[int, int, int]] = None):
+        self.repo = repo
+        self.hash = hash_full
+        self.date = date
+        self.subject = subject
+        self.author = repo.intern_author(author)
+        self.files_start = files_start
+        end = self.files_end = repo.file_count
+        if totals is None:
+            self.files_changed = end - files_start
+            self.total_insertions = sum(repo.file_insertions[files_start:end])
+            self.total_deletions = sum(repo.file_deletions[files_start:end])
+        else:
+            self.files_changed, self.total_insertions, self.total_deletions = totals
+
+    @property
+    def hash_short(self) -> str:
+        return self.hash[:7]
+
+    @property
+    def total_changes(self) -> int:
+        return self.total_insertions + self.total_deletions
+
+    def files(self) -> Iterator[Tuple[str, int, int, bool]]:
+        """Yield (filename, insertions, deletions, binary) for each stored file change."""
+        repo = self.repo
+        for i in range(self.files_start, self.files_end):
+            yield (repo.paths[repo.file_paths[i]], repo.file_insertions[i],
+                   repo.file_deletions[i], bool(repo.file_binary[i]))
+
+
+def _parse_numstat_line(line: str) -> Optional[Tuple[str, int, int, bool]]:
+    """Parse one `--numstat` line into (filename, insertions, deletions, binary)."""
+    parts = line.split('\t')
+    if len(parts) < 3:
+        return None
+
+    filename = '\t'.join(parts[2:])
+    # git prints "-" for both counts of a binary file
+    if parts[0] == '-' and parts[1] == '-':
+        return filename, 0, 0, True
+    ins_count = int(parts[0]) if parts[0].isdigit() else 0
+    del_count = int(parts[1]) if parts[1].isdigit() else 0
+    return filename, ins_count, del_count, False
+
+
+class NumstatCollector:
+    """Running totals of one commit's `--numstat` lines and its `limit` largest file changes.
+
+    The kept changes are chosen with a bounded min-heap as the lines stream
+    in, so a commit that touches thousands of files never holds more than
+    `limit` of them. Without a limit every change is kept, in git's order.
+    Changes that are not kept are summed per path into `trimmed_files`
+    ({filename: [commits, insertions, deletions]}) if one is given.
+    """
+
+    __slots__ = ('limit', 'trimmed_files', 'files_changed', 'insertions', 'deletions', '_kept')
+
+    def __init__(self, limit: Optional[int] = None, trimmed_files: Optional[Dict[str, List[int]]] = None):
+        self.limit = limit
+        self.trimmed_files = trimmed_files
+        self.files_changed = 0
+        self.insertions = 0
+        self.deletions = 0
+        self._kept: List[Tuple] = []
+
+    def add(self, line: str) -> None:
+        """Count one `--numstat` line and keep its change if it is among the largest so far."""
+        parsed = _parse_numstat_line(line)
+        if not parsed:
+            return
+        filename, insertions, deletions, binary = parsed
+        self.files_changed += 1
+        self.insertions += insertions
+        self.deletions += deletions
+        if self.limit is None:
+            self._kept.append(parsed)
+            return
+        changes = insertions + deletions
+        kept = self._kept
+        if len(kept) < self.limit:
+            # Ties go to the earlier file, as with a stable sort by size
+            heapq.heappush(kept, (changes, -self.files_changed, filename, insertions, deletions, binary))
+            return
+        if kept and changes > kept[0][0]:
+            dropped = heapq.heapreplace(kept, (changes, -self.files_changed, filename, insertions, deletions, binary))
+            filename, insertions, deletions = dropped[2:5]
+        trimmed = self.trimmed_files
+        if trimmed is not None:
+            entry = trimmed.get(filename)
+            if entry is None:
+                trimmed[filename] = [1, insertions, deletions]
+            else:
+                entry[0] += 1
+                entry[1] += insertions
+                entry[2] += deletions
+
+    @property
+    def totals(self) -> Tuple[int, int, int]:
+        return self.files_changed, self.insertions, self.deletions
+
+    @property
+    def trimmed(self) -> bool:
+        """Whether some changes were counted but not kept."""
+        return self.files_changed > len(self._kept)
+
+    def kept(self) -> List[Tuple[str, int, int, bool]]:
+        """Return the kept (filename, insertions, deletions, binary), largest first when limited."""
+        if self.limit is None:
+            return self._kept
+        return [item[2:] for item in sorted(self._kept, reverse=True)]
+
+    def store(self, repo: RepoInfo) -> Optional[Tuple[int, int, int]]:
+        """Append the kept changes to `repo`'s columns; return the totals if they are not theirs."""
+        for change in self.kept():
+            repo.add_file(*change)
+        return self.totals if self.trimmed else None
+
+
+def top_file_changes(files: List, limit: Optional[int]) -> List:
+    """Return the `limit` largest of (filename, insertions, deletions, ...) changes, largest first.
+
+    Without a limit the changes are returned as they are.
+    """
+    if limit is None:
+        return files
+    return heapq.nlargest(limit, files, key=lambda change: change[1] + change[2])
+
+
+_SHORTSTAT = re.compile(r'\s*(\d+) files? changed(?:, (\d+) insertions?\(\+\))?(?:, (\d+) deletions?\(-\))?')
+
+
+def _parse_shortstat_line(line: str) -> Optional[Tuple[int, int, int]]:
+    """Parse a `--shortstat` line into (files changed, insertions, deletions)."""
+    match = _SHORTSTAT.match(line)
+    if not match:
+        return None
+    return tuple(int(count) if count else 0 for count in match.groups())
+
+
+_timezones: Dict[str, timezone] = {}
+
+
+def _parse_commit_date(date_str: str) -> datetime:
+    """Parse a `--date=raw` author date ("<unix time> <+/-hhmm>") in the author's own offset."""
+    timestamp, tz = date_str.split()
+    zone = _timezones.get(tz)
+    if zone is None:
+        minutes = int(tz[1:3]) * 60 + int(tz[3:5])
+        zone = _timezones[tz] = timezone(timedelta(minutes=-minutes if tz[0] == '-' else minutes))
+    return datetime.fromtimestamp(int(timestamp), zone)
+
+
+# One record per commit: a header line starting with RS, fields split by US,
+# followed by that commit's numstat (or shortstat) lines. `--cc` keeps merge
+# stats identical to what `git show --numstat` reports for them.
+LOG_RECORD_SEP = '\x1e'
+LOG_FIELD_SEP = '\x1f'
+STREAM_LIMIT = 1024 * 1024
+LOG_FORMAT = ['--date=raw', '--reverse', '--author-date-order', '--pretty=format:%x1e%H%x1f%ad%x1f%s%x1f%an']
+# git log options of each stats level (see config.STATS_LEVELS)
+STATS_OPTIONS = {'none': [], 'summary': ['--shortstat', '--cc'], 'full': ['--numstat', '--cc']}
+
+
+class LogStreamParser:
+    """Incrementally turn `git log --numstat` (or `--shortstat`) output into commits.
+
+    Lines are fed one at a time; a commit is emitted as soon as the header of
+    the next one (or the end of the stream) shows its numstat block is done.
+    Only the repository's `top_files` largest changes of a commit are stored,
+    but its totals count every file and the others are summed into `trimmed`
+    (see NumstatCollector).
+    """
+
+    def __init__(self, repo: RepoInfo, trimmed: Optional[Dict[str, List[int]]] = None):
+        self.repo = repo
+        self.trimmed = trimmed
+        self._summary = repo.stats == 'summary'
+        self._header = None
+        self._files = None
+        self._totals = None
+
+    def feed(self, line: str) -> Optional[Commit]:
+        """Consume one line of output, returning a commit if one just completed."""
+        line = line.rstrip('\n')
+        if line.startswith(LOG_RECORD_SEP):
+            finished = self.close()
+            parts = line[1:].split(LOG_FIELD_SEP, 3)
+            if len(parts) == 4:
+                self._header = parts
+                self._files = None if self._summary else NumstatCollector(self.repo.top_files, self.trimmed)
+                self._totals = (0, 0, 0) if self._summary else None
+            return finished
+        if self._header is not None and line.strip():
+            if self._summary:
+                self._totals = _parse_shortstat_line(line) or self._totals
+            else:
+                self._files.add(line)
+        return None
+
+    def close(self) -> Optional[Commit]:
+        """Flush the commit currently being parsed, if any."""
+        if self._header is None:
+            return None
+        hash_full, date_str, subject, author = self._header
+        files_start = self.repo.file_count
+        totals = self._files.store(self.repo) if self._files else self._totals
+        commit = Commit(self.repo, hash_full, _parse_commit_date(date_str), subject, author,
+                        files_start, totals)
+        self._header = None
+        return commit
+
+
+async def _run_git(args: List[str], repo_path: str, profile=None) -> Tuple[int, str, str]:
+    """Run a git command without a shell and return (returncode, stdout, stderr)."""
+    proc = await asyncio.create_subprocess_exec(
+        'git', *args, cwd=repo_path,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    if profile:
+        profile.git_spawned(args)
+        profile.git_output(len(stdout))
+    return (proc.returncode,
+            stdout.decode('utf-8', errors='replace').strip(),
+            stderr.decode('utf-8', errors='replace'))
+
+
+def repo_log_command(repo: RepoInfo, args: List[str]) -> List[str]:
+    """Build the stats `git log` command for `args` (revisions, options), honouring the repository's
+    filters and stats level."""
+    cmd = ['git', 'log', *STATS_OPTIONS[repo.stats], *LOG_FORMAT]
+    if repo.max_blob_size:
+        # Blobs over the threshold are treated as binary, so git never diffs them
+        cmd[1:1] = ['-c', f'core.bigFileThreshold={repo.max_blob_size}']
+    cmd += args
+    if repo.pathspecs and repo.stats != 'none':
+        # Without parent rewriting the walk order is the same as the unfiltered
+        # log's; commits that touch no kept path are simply left out
+        cmd += ['--full-history', '--'] + repo.pathspecs
+    return cmd
+
+
+async def _iter_git_lines(cmd: List[str], repo_path: str, stdin_lines: Optional[List[str]] = None,
+                          profile=None) -> AsyncIterator[bytes]:
+    """Run a git command without a shell and yield its output line by line."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=repo_path,
+        stdin=asyncio.subprocess.PIPE if stdin_lines is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        limit=STREAM_LIMIT
+    )
+    stderr_task = asyncio.ensure_future(proc.stderr.read())
+    if profile:
+        profile.git_spawned(cmd)
+    try:
+        if stdin_lines is not None:
+            # git reads all of stdin before it starts writing, so this cannot block
+            proc.stdin.write(''.join(f"{line}\n" for line in stdin_lines).encode())
+            await proc.stdin.drain()
+            proc.stdin.close()
+        async for raw_line in proc.stdout:
+            if profile:
+                profile.git_output(len(raw_line))
+            yield raw_line
+        stderr = (await stderr_task).decode('utf-8', errors='replace')
+        if await proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        if not stderr_task.done():
+            stderr_task.cancel()
+
+
+async def iter_repo_commits(repo: RepoInfo, revisions: Optional[List[str]] = None,
+                            stdin_revisions: Optional[List[str]] = None, profile=None,
+                            trimmed: Optional[Dict[str, List[int]]] = None) -> AsyncIterator[Commit]:
+    """Yield commits with stats for one repository from a single `git log` run.
+
+    `stdin_revisions` lists exact commits to show (no history walk); they are
+    passed on stdin so any number of them fits in one invocation. With
+    pathspecs configured only commits touching a kept path are yielded.
+    `profile` (a devlog.profiling.Profiler) times each commit's stats, and
+    `trimmed` collects the file changes beyond the repository's `top_files`.
+    """
+    args = list(revisions or [])
+    if stdin_revisions is not None:
+        args += ['--no-walk=unsorted', '--stdin']
+    cmd = repo_log_command(repo, args)
+    parser = LogStreamParser(repo, trimmed)
+    if profile:
+        # A commit's stats are timed from its header line to the next header
+        record_started = time.perf_counter()
+    async for raw_line in _iter_git_lines(cmd, repo.path, stdin_revisions, profile):
+        commit = parser.feed(raw_line.decode('utf-8', errors='replace'))
+        if profile and raw_line.startswith(b'\x1e'):
+            now = time.perf_counter()
+            if commit:
+                profile.commit(repo.name, commit.hash, now - record_started, commit.files_changed)
+            record_started = now
+        if commit:
+            yield commit
+    commit = parser.close()
+    if commit:
+        if profile:
+            profile.commit(repo.name, commit.hash, time.perf_counter() - record_started, commit.files_changed)
+        yield commit
+
+
+# Every commit of a walk without stats, for merging with a pathspec-limited log
+HEADER_COMMAND = ['git', 'log', '--date=raw', '--reverse', '--author-date-order', '--pretty=format:%H%x1f%ad%x1f%s%x1f%an']
+
+
+async def iter_filtered_commits(repo: RepoInfo, revisions: List[str], profile=None,
+                                trimmed: Optional[Dict[str, List[int]]] = None) -> AsyncIterator[Commit]:
+    """Yield every commit of a walk, with stats limited to the repository's pathspecs.
+
+    A pathspec-limited log drops the commits that only touch excluded paths,
+    so a second, diff-free log lists all commits and the two streams are
+    merged by hash; the stats stream is a subsequence of the header stream.
+    """
+    with_stats = iter_repo_commits(repo, revisions, profile=profile, trimmed=trimmed)
+    pending = None
+    try:
+        async for raw_line in _iter_git_lines(HEADER_COMMAND + revisions, repo.path, profile=profile):
+            fields = raw_line.decode('utf-8', errors='replace').rstrip('\n').split(LOG_FIELD_SEP, 3)
+            if len(fields) != 4:
+                continue
+            if pending is None:
+                pending = await anext(with_stats, None)
+            if pending is not None and pending.hash == fields[0]:
+                yield pending
+                pending = None
+            else:
+                hash_full, date_str, subject, author = fields
+                yield Commit(repo, hash_full, _parse_commit_date(date_str), subject, author, repo.file_count)
+        if pending is not None or await anext(with_stats, None) is not None:
+            raise RuntimeError(f"Filtered log of {repo.name} is not in walk order")
+    finally:
+        await with_stats.aclose()
+
+
+class CliRepository:
+    """Reads a repository's history through the git CLI.
+
+    `trimmed` sums, per path, the file changes its walks did not store (see
+    NumstatCollector); callers that total the walked commits add it to the
+    rollup.
+    """
+
+    def __init__(self, repo: RepoInfo, profile=None):
+        self.repo = repo
+        self.profile = profile
+        self.trimmed: Dict[str, List[int]] = {}
+
+    async def resolve(self, revision: str) -> Optional[str]:
+        """Return the commit a revision points at, or None if it does not exist (yet)."""
+        args = ['rev-parse', '--verify', '-q', f'{revision}^{{commit}}']
+        returncode, sha, stderr = await _run_git(args, self.repo.path, self.profile)
+        if returncode != 0 or not sha:
+            if stderr:
+                raise subprocess.CalledProcessError(returncode, ['git'] + args, stderr=stderr)
+            return None
+        return sha
+
+    async def head(self) -> Optional[str]:
+        """Resolve the revision history is walked from (HEAD unless configured)."""
+        return await self.resolve(self.repo.tip)
+
+    async def bases(self) -> List[str]:
+        """Resolve the revisions the repository's range excludes."""
+        bases = []
+        for revision in self.repo.bases:
+            sha = await self.resolve(revision)
+            if sha is None:
+                raise ValueError(f"Unknown revision {revision!r} in the revisions of {self.repo.name}")
+            bases.append(sha)
+        return bases
+
+    async def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        returncode, _, _ = await _run_git(['merge-base', '--is-ancestor', ancestor, descendant],
+                                          self.repo.path, self.profile)
+        return returncode == 0
+
+    async def write_commit_graph(self) -> None:
+        """Write or extend the repository's commit-graph, with changed-path Bloom filters.
+
+        git then walks history from the graph instead of parsing commit
+        objects, and skips diffing commits that cannot touch the pathspecs of a
+        filtered log. `--split` only appends a layer for commits not yet in it.
+        """
+        args = ['commit-graph', 'write', '--reachable', '--changed-paths', '--split', '--no-progress']
+        returncode, _, stderr = await _run_git(args, self.repo.path, self.profile)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, ['git'] + args, stderr=stderr)
+
+    async def commits(self, include: str, exclude: Iterable[str] = (),
+                      options: Iterable[str] = ()) -> List[Commit]:
+        """Return commits reachable from `include` but not `exclude`, oldest first.
+
+        `options` are extra `git log` arguments such as `--since=...`.
+        """
+        revisions = [*options, include] + [f'^{sha}' for sha in exclude]
+        # Pathspecs only limit stats, so without stats every commit comes from one plain log
+        if self.repo.pathspecs and self.repo.stats != 'none':
+            return [commit async for commit in iter_filtered_commits(self.repo, revisions, self.profile, self.trimmed)]
+        return [commit async for commit in iter_repo_commits(self.repo, revisions, profile=self.profile,
+                                                             trimmed=self.trimmed)]
+
+    def close(self) -> None:
+        pass
+
+
+class NativeRepository(CliRepository):
+    """Reads a repository's history in-process, using the CLI only for stats it can't compute."""
+
+    def __init__(self, repo: RepoInfo, profile=None):
+        super().__init__(repo, profile)
+        from devlog import gitobjects
+        self.reader = gitobjects.Repository(repo.path)
+
+    async def head(self) -> Optional[str]:
+        if self.repo.tip != 'HEAD':
+            # The reader only follows full ref names; let git parse revisions
+            return await super().head()
+        return self.reader.resolve('HEAD')
+
+    async def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        return await asyncio.to_thread(self.reader.is_ancestor, ancestor, descendant)
+
+    def _read_log(self, include: str, exclude: List[str], timings: Optional[List[float]]) -> List:
+        """Run the reader's log walk, timing each commit into `timings` if given."""
+        entries = self.reader.iter_log([include], exclude)
+        if timings is None:
+            return list(entries)
+        result = []
+        started = time.perf_counter()
+        for entry in entries:
+            now = time.perf_counter()
+            result.append(entry)
+            timings.append(now - started)
+            started = now
+        return result
+
+    async def commits(self, include: str, exclude: Iterable[str] = (),
+                      options: Iterable[str] = ()) -> List[Commit]:
+        if options:
+            # Date limits and other log options are only understood by git
+            return await super().commits(include, exclude, options)
+        timings = [] if self.profile else None
+        entries = await asyncio.to_thread(self._read_log, include, list(exclude), timings)
+
+        # Commits the reader could not diff exactly (renames, submodules, very
+        # large edits) are handed to git together in one --stdin invocation
+        fallback = [fields[0] for fields, lines in entries if lines is None]
+        cli_commits = {}
+        if fallback:
+            async for commit in iter_repo_commits(self.repo, stdin_revisions=fallback, profile=self.profile,
+                                                  trimmed=self.trimmed):
+                cli_commits[commit.hash] = commit
+
+        commits = []
+        for (hash_full, date_str, subject, author), lines in entries:
+            if lines is None and hash_full in cli_commits:
+                commits.append(cli_commits[hash_full])
+                continue
+            files_start = self.repo.file_count
+            collector = NumstatCollector(self.repo.top_files, self.trimmed)
+            for line in lines or []:
+                collector.add(line)
+            totals = collector.store(self.repo)
+            commits.append(Commit(self.repo, hash_full, _parse_commit_date(date_str),
+                                  subject, author, files_start, totals))
+            if timings:
+                self.profile.commit(self.repo.name, hash_full, timings[len(commits) - 1], commits[-1].files_changed)
+        return commits
+
+    def close(self) -> None:
+        self.reader.close()
+
+
+def open_repository(repo: RepoInfo, backend: str = 'git', debug: bool = False, profile=None) -> CliRepository:
+    """Open a repository with the requested backend, falling back to the git CLI."""
+    if backend == 'native' and repo.filtered:
+        # Pathspecs and core.bigFileThreshold are applied by git itself
+        if debug:
+            print(f"Native reader does not apply path filters for {repo.name}; using git CLI")
+    elif backend == 'native' and repo.stats != 'full':
+        # The reader always diffs every file, which is what the lower levels avoid
+        if debug:
+            print(f"Native reader only collects full stats for {repo.name}; using git CLI")
+    elif backend == 'native':
+        try:
+            return NativeRepository(repo, profile)
+        except Exception as e:
+            if debug:
+                print(f"Native reader unavailable for {repo.name} ({e}); using git CLI")
+    return CliRepository(repo, profile)
+
+
+# Commits never change once written, so each repository's parsed history is
+# kept in <cache dir>/<repo>.json together with the HEAD it was read at. Its
+# rollup sits next to it in <repo>.rollup.json, small enough for --recent to
+# load without the commits.
+CACHE_VERSION = 5
+
+
+def _commit_to_cache(commit: Commit) -> List:
+    """Serialize the per-commit fields that come from git.
+
+    The totals are stored too when they are not simply those of the stored files.
+    """
+    files = []
+    for filename, insertions, deletions, binary in commit.files():
+        entry = [filename, insertions, deletions]
+        if binary:
+            entry.append(True)
+        files.append(entry)
+    record = [commit.date.isoformat(), commit.subject, commit.author, files]
+    if len(files) != commit.files_changed:
+        record.append([commit.files_changed, commit.total_insertions, commit.total_deletions])
+    return record
+
+
+def commit_from_cache(repo: RepoInfo, hash_full: str, record: List) -> Commit:
+    """Rebuild a commit from its cache record, keeping only the repository's `top_files` largest changes.
+
+    The changes left out are added to the repository's `trimmed_files`.
+    """
+    date_iso, subject, author, files, *totals = record
+    if not totals and repo.top_files is not None and len(files) > repo.top_files:
+        totals = [[len(files), sum(entry[1] for entry in files), sum(entry[2] for entry in files)]]
+    files_start = repo.file_count
+    kept = top_file_changes(files, repo.top_files)
+    for entry in kept:
+        repo.add_file(entry[0], entry[1], entry[2], len(entry) > 3)
+    if len(kept) < len(files):
+        kept_ids = {id(entry) for entry in kept}
+        dropped: Dict[str, List[int]] = {}
+        for entry in files:
+            if id(entry) not in kept_ids:
+                totals_of_file = dropped.setdefault(entry[0], [0, 0, 0])
+                totals_of_file[0] += 1
+                totals_of_file[1] += entry[1]
+                totals_of_file[2] += entry[2]
+        repo.add_trimmed(dropped)
+    return Commit(repo, hash_full, datetime.fromisoformat(date_iso), subject, author, files_start,
+                  tuple(totals[0]) if totals else None)
+
+
+def commits_from_cache(repo: RepoInfo, cache: Dict) -> List[Commit]:
+    """Rebuild every commit of a loaded commit cache, with the per-file totals of what it trimmed."""
+    repo.add_trimmed(cache.get('trimmed_files', {}))
+    return [commit_from_cache(repo, hash_full, record) for hash_full, record in cache['commits'].items()]
+
+
+class HistoryCache:
+    """The per-repository commit and rollup cache files in `cache_dir`.
+
+    A disabled cache (--no-cache) reads nothing and writes nothing.
+    """
+
+    def __init__(self, cache_dir: str, enabled: bool = True, debug: bool = False):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.debug = debug
+
+    def _path(self, repo_name: str) -> str:
+        """Return the cache file used for a repository."""
+        return os.path.join(self.cache_dir, f"{repo_name}.json")
+
+    def _rollup_path(self, repo_name: str) -> str:
+        return os.path.join(self.cache_dir, f"{repo_name}.rollup.json")
+
+    def _read(self, repo: RepoInfo, path: str) -> Optional[Dict]:
+        """Load a cache file if it was written for the repository's current settings."""
+        if not self.enabled or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            if self.debug:
+                print(f"Warning: Ignoring unreadable cache {path}: {e}")
+            return None
+        if cache.get('version') != CACHE_VERSION or cache.get('path') != repo.path:
+            return None
+        # Stats collected under different include/exclude/max_blob_size settings
+        if cache.get('filters', [[], None]) != repo.filters:
+            return None
+        # Commits read at another stats level hold more or less than asked for
+        if cache.get('stats', 'full') != repo.stats:
+            return None
+        # Commits stored with fewer files per commit than asked for (None: all)
+        cached_files = cache.get('top_files')
+        if cached_files is not None and (repo.top_files is None or cached_files < repo.top_files):
+            return None
+        if cache.get('revisions', ['HEAD']) != [repo.tip, *repo.bases]:
+            return None
+        return cache
+
+    def load(self, repo: RepoInfo) -> Optional[Dict]:
+        """Load a repository's commit cache, or None if it is missing or unusable."""
+        return self._read(repo, self._path(repo.name))
+
+    def load_rollup(self, repo: RepoInfo) -> Optional[Dict]:
+        """Load a repository's cached rollup record (with the head it covers), or None."""
+        return self._read(repo, self._rollup_path(repo.name))
+
+    def restore_rollup(self, repo: RepoInfo, cache: Dict, commits: List[Commit]) -> bool:
+        """Restore a repository's rollup from its cache; rebuild it and return False if missing or stale."""
+        record = self.load_rollup(repo)
+        if record and record['head'] == cache['head'] and record['rollup']['totals'][0] == len(commits):
+            repo.rollup = Rollup.from_cache(repo, record['rollup'])
+            return True
+        repo.rollup = Rollup.from_commits(commits, repo.trimmed_files)
+        return False
+
+    def _write(self, path: str, data: Dict) -> None:
+        """Write a cache file atomically."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if self.debug:
+                print(f"Warning: Could not write cache {path}: {e}")
+
+    @staticmethod
+    def _header(repo: RepoInfo, head: str) -> Dict:
+        return {
+            'version': CACHE_VERSION,
+            'path': repo.path,
+            'filters': repo.filters,
+            'stats': repo.stats,
+            'top_files': repo.top_files,
+            'revisions': [repo.tip, *repo.bases],
+            'head': head,
+            'base_heads': repo.base_heads,
+        }
+
+    def save(self, repo: RepoInfo, head: str, commits: List[Commit]) -> None:
+        """Write a repository's commit cache and rollup."""
+        if not self.enabled:
+            return
+        cache = self._header(repo, head)
+        cache['commits'] = {commit.hash: _commit_to_cache(commit) for commit in commits}
+        # Changes the commits do not store, so the rollup can be rebuilt from them
+        cache['trimmed_files'] = {repo.paths[path_id]: entry for path_id, entry in repo.trimmed_files.items()}
+        self._write(self._path(repo.name), cache)
+        self.save_rollup(repo, head)
+
+    def save_rollup(self, repo: RepoInfo, head: str) -> None:
+        """Write the rollup of a repository's history up to `head`."""
+        if not self.enabled:
+            return
+        record = self._header(repo, head)
+        record['rollup'] = repo.rollup.to_cache(repo)
+        self._write(self._rollup_path(repo.name), record)
+
+
+def _commit_date(commit: Commit) -> datetime:
+    return commit.date
+
+
+def iter_merged_commits(repo_commits: List[List[Commit]]) -> Iterator[Commit]:
+    """Lazily merge per-repository commit lists into one chronological stream.
+
+    `git log --reverse --author-date-order` puts parents before children and
+    only orders by author date where history allows, so a rebased or
+    cherry-picked commit can predate its parent, and commits appended to a
+    cached history need not follow it in date order either. Each list is
+    therefore stable-sorted first, close to linear as it is almost in order.
+    Ties keep repository order, exactly like one stable sort of everything.
+    """
+    for commits in repo_commits:
+        commits.sort(key=_commit_date)
+    return heapq.merge(*repo_commits, key=_commit_date)
+
+
+def _git_dirs(repo_path: str) -> Tuple[str, str]:
+    """Return (git dir, common dir) of a repository, following .git files of worktrees."""
+    git_dir = os.path.join(repo_path, '.git')
+    if os.path.isfile(git_dir):
+        with open(git_dir, 'r', encoding='utf-8') as f:
+            line = f.readline().strip()
+        if line.startswith('gitdir:'):
+            git_dir = os.path.join(repo_path, line[len('gitdir:'):].strip())
+    common_dir = git_dir
+    commondir_file = os.path.join(git_dir, 'commondir')
+    if os.path.isfile(commondir_file):
+        with open(commondir_file, 'r', encoding='utf-8') as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+    return git_dir, common_dir
+
+
+def ref_signature(repo_path: str) -> Tuple:
+    """Stat HEAD, packed-refs and every loose ref; any commit, fetch or rebase changes the result."""
+    git_dir, common_dir = _git_dirs(repo_path)
+    signature = []
+    for path in (os.path.join(git_dir, 'HEAD'), os.path.join(common_dir, 'packed-refs')):
+        try:
+            st = os.stat(path)
+            signature.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    for root, _, files in os.walk(os.path.join(common_dir, 'refs')):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            signature.append((os.path.join(root, name), st.st_mtime_ns, st.st_size))
+    signature.sort()
+    return tuple(signature)
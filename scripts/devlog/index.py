@@ -0,0 +1,170 @@
+"""
+SQLite index of collected commits for `update-devlog.py query ...`.
+
+Every run feeds the commits it collected into .devlog/index.sqlite3; only
+commits the index has not seen (or whose stats changed, e.g. because the
+repository's path filters did) are written and commits that disappeared
+from a repository's history (rebases) are removed. Queries then answer from
+the database alone, without running git. A commit's file_changes rows cover
+every file it changed, even when the collected commit only stores its
+largest changes (config `top_files`): the caller re-reads those commits'
+full file lists before they are written.
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    author TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,   -- Unix time of the author date
+    day TEXT NOT NULL,            -- YYYY-MM-DD in the author's offset, as in the DEVLOG
+    subject TEXT NOT NULL,
+    files_changed INTEGER NOT NULL,
+    insertions INTEGER NOT NULL,
+    deletions INTEGER NOT NULL,
+    files_stored INTEGER NOT NULL, -- rows of the commit in file_changes
+    PRIMARY KEY (repo, hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS commits_by_author ON commits (author, timestamp);
+CREATE INDEX IF NOT EXISTS commits_by_date ON commits (timestamp);
+CREATE INDEX IF NOT EXISTS commits_by_repo_day ON commits (repo, day);
+
+CREATE TABLE IF NOT EXISTS file_changes (
+    repo TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    insertions INTEGER NOT NULL,
+    deletions INTEGER NOT NULL,
+    binary INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS file_changes_by_commit ON file_changes (repo, hash);
+CREATE INDEX IF NOT EXISTS file_changes_by_path ON file_changes (path);
+"""
+
+
+class CommitIndex:
+    """A local SQLite database of commits and their file changes."""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self.db.executescript('DROP TABLE IF EXISTS commits; DROP TABLE IF EXISTS file_changes;')
+        self.db.executescript(SCHEMA)
+        self.db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self) -> None:
+        self.db.close()
+
+    def sync(self, repo_name: str, commits: Iterable, prune: bool = True,
+             full_files: Optional[Callable[[List], Dict[str, List[Tuple]]]] = None) -> Dict[str, int]:
+        """Make the index hold exactly `commits` for one repository.
+
+        With `prune=False` commits missing from `commits` are kept, for
+        callers that only read part of the history. `full_files` is called
+        with the commits to write that store fewer file changes than they
+        made and returns {hash: [(filename, insertions, deletions, binary)]}
+        with all of them; without it (or for a commit it leaves out) only the
+        stored changes are written, and the commit is written again on a
+        later sync.
+        """
+        select = 'SELECT hash, files_changed, insertions, deletions, files_stored FROM commits WHERE repo = ?'
+        if prune:
+            rows = self.db.execute(select, (repo_name,))
+        else:
+            commits = list(commits)
+            rows = [row for commit in commits
+                    for row in self.db.execute(select + ' AND hash = ?', (repo_name, commit.hash))]
+        existing = {row[0]: tuple(row[1:]) for row in rows}
+        current = set()
+        changed = []
+        for commit in commits:
+            current.add(commit.hash)
+            # Up to date when the row matches and all of the commit's files are stored
+            if existing.get(commit.hash) != (commit.files_changed, commit.total_insertions,
+                                             commit.total_deletions, commit.files_changed):
+                changed.append(commit)
+        trimmed = [commit for commit in changed if commit.files_end - commit.files_start < commit.files_changed]
+        all_files = full_files(trimmed) if trimmed and full_files else {}
+
+        replaced = []
+        commit_rows = []
+        file_rows = []
+        for commit in changed:
+            if commit.hash in existing:
+                replaced.append((repo_name, commit.hash))
+            files = all_files.get(commit.hash)
+            if files is None:
+                files = list(commit.files())
+            commit_rows.append((repo_name, commit.hash, commit.author, int(commit.date.timestamp()),
+                                commit.date.strftime('%Y-%m-%d'), commit.subject, commit.files_changed,
+                                commit.total_insertions, commit.total_deletions, len(files)))
+            file_rows.extend((repo_name, commit.hash, filename, ins, dels, int(binary))
+                             for filename, ins, dels, binary in files)
+        removed = [(repo_name, hash_full) for hash_full in existing.keys() - current] if prune else []
+
+        with self.db:
+            if removed or replaced:
+                self.db.executemany('DELETE FROM commits WHERE repo = ? AND hash = ?', removed + replaced)
+                self.db.executemany('DELETE FROM file_changes WHERE repo = ? AND hash = ?', removed + replaced)
+            self.db.executemany('INSERT INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', commit_rows)
+            self.db.executemany('INSERT INTO file_changes VALUES (?, ?, ?, ?, ?, ?)', file_rows)
+        return {'added': len(commit_rows) - len(replaced), 'updated': len(replaced), 'removed': len(removed)}
+
+    @staticmethod
+    def _range(since: Optional[str], until: Optional[str]) -> List:
+        """Turn optional YYYY-MM-DD bounds into Unix times (until is exclusive).
+
+        Dates without an offset are read as UTC, so the same query gives the
+        same rows on every machine.
+        """
+        def timestamp(value: str) -> int:
+            bound = datetime.fromisoformat(value)
+            if bound.tzinfo is None:
+                bound = bound.replace(tzinfo=timezone.utc)
+            return int(bound.timestamp())
+
+        return [timestamp(since) if since else -2 ** 62, timestamp(until) if until else 2 ** 62]
+
+    def commits_by_author(self, author: str, since: Optional[str] = None, until: Optional[str] = None,
+                          repo: Optional[str] = None) -> List[sqlite3.Row]:
+        sql = '''SELECT repo, hash, day, subject, files_changed, insertions, deletions
+                 FROM commits WHERE author = ? AND timestamp >= ? AND timestamp < ?'''
+        params = [author, *self._range(since, until)]
+        if repo:
+            sql += ' AND repo = ?'
+            params.append(repo)
+        return self.db.execute(sql + ' ORDER BY timestamp', params).fetchall()
+
+    def churned_files(self, limit: int = 20, since: Optional[str] = None, until: Optional[str] = None,
+                      repo: Optional[str] = None) -> List[sqlite3.Row]:
+        sql = '''SELECT f.repo, f.path, COUNT(*) AS commits,
+                        SUM(f.insertions) AS insertions, SUM(f.deletions) AS deletions,
+                        SUM(f.insertions + f.deletions) AS churn
+                 FROM file_changes f JOIN commits c ON c.repo = f.repo AND c.hash = f.hash
+                 WHERE c.timestamp >= ? AND c.timestamp < ?'''
+        params = self._range(since, until)
+        if repo:
+            sql += ' AND f.repo = ?'
+            params.append(repo)
+        sql += ' GROUP BY f.repo, f.path ORDER BY churn DESC, commits DESC LIMIT ?'
+        return self.db.execute(sql, params + [limit]).fetchall()
+
+    def weekly_activity(self, repo: Optional[str] = None, since: Optional[str] = None,
+                        until: Optional[str] = None) -> List[sqlite3.Row]:
+        sql = '''SELECT repo, strftime('%Y-W%W', day) AS week, COUNT(*) AS commits,
+                        COUNT(DISTINCT author) AS authors,
+                        SUM(insertions) AS insertions, SUM(deletions) AS deletions
+                 FROM commits WHERE timestamp >= ? AND timestamp < ?'''
+        params = self._range(since, until)
+        if repo:
+            sql += ' AND repo = ?'
+            params.append(repo)
+        return self.db.execute(sql + ' GROUP BY repo, week ORDER BY week DESC, repo', params).fetchall()
@@ -0,0 +1,141 @@
+"""
+Run-time instrumentation for `update-devlog.py --profile`.
+
+The generator calls into a single Profiler instance (DevlogBuilder.profile,
+handed on to its renderer and git readers) at a handful of points; when
+profiling is off that attribute is None and the hooks cost one check.
+"""
+
+import heapq
+import json
+import os
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class Profiler:
+    """Accumulates phase timings, git process/output counters and the slowest commits."""
+
+    def __init__(self, top: int = 10, phases: Iterable[str] = ()):
+        self.top = top
+        # Exclusive wall time per phase: time spent in a nested phase is not
+        # counted again in the phase around it. `phases` fixes the report order.
+        self.phases: Dict[str, float] = dict.fromkeys(phases, 0.0)
+        self._stack: List[float] = []
+        self.repos: Dict[str, Dict] = {}
+        self.git_processes: Counter = Counter()
+        self.git_output_bytes = 0
+        self.commits_timed = 0
+        self.commit_seconds = 0.0
+        self._slowest: List[Tuple[float, int, str, str, int]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            nested = self._stack.pop()
+            elapsed = perf_counter() - start
+            self.add(name, elapsed - nested)
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def repo(self, name: str, seconds: float, commits: int) -> None:
+        """Record the wall time spent collecting one repository."""
+        self.repos[name] = {'seconds': seconds, 'commits': commits}
+
+    def git_spawned(self, args: List[str]) -> None:
+        """Count a git subprocess, keyed by its subcommand."""
+        # Skip global options, including the value of `-c name=value`
+        words = iter(args)
+        subcommand = 'git'
+        for arg in words:
+            if arg == '-c':
+                next(words, None)
+            elif arg != 'git' and not arg.startswith('-'):
+                subcommand = arg
+                break
+        self.git_processes[subcommand] += 1
+
+    def git_output(self, nbytes: int) -> None:
+        self.git_output_bytes += nbytes
+
+    def commit(self, repo: str, hash_full: str, seconds: float, files: int) -> None:
+        """Record how long one commit's stats took to arrive, keeping the slowest `top`."""
+        self.commits_timed += 1
+        self.commit_seconds += seconds
+        entry = (seconds, self.commits_timed, repo, hash_full, files)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif self.top:
+            heapq.heappushpop(self._slowest, entry)
+
+    def timed_writer(self, f):
+        """Wrap a binary file so its writes are counted as the 'write' phase."""
+        profiler = self
+
+        class TimedWriter:
+            def write(self, data: bytes) -> int:
+                with profiler.phase('write'):
+                    return f.write(data)
+
+        return TimedWriter()
+
+    def to_dict(self) -> Dict:
+        slowest = sorted(self._slowest, reverse=True)
+        return {
+            'phases': self.phases,
+            'total_seconds': sum(self.phases.values()),
+            'repositories': self.repos,
+            'git': {
+                'processes': sum(self.git_processes.values()),
+                'by_command': dict(self.git_processes),
+                'output_bytes': self.git_output_bytes,
+            },
+            'commit_stats': {
+                'commits': self.commits_timed,
+                'seconds': self.commit_seconds,
+                'slowest': [{'repo': repo, 'hash': hash_full, 'seconds': seconds, 'files': files}
+                            for seconds, _, repo, hash_full, files in slowest],
+            },
+        }
+
+    def summary(self) -> str:
+        """Render the profile as plain-text tables."""
+        data = self.to_dict()
+        total = data['total_seconds'] or 1.0
+        lines = [f"{'Phase':<24} {'Seconds':>10} {'Share':>8}", "-" * 44]
+        for name, seconds in data['phases'].items():
+            lines.append(f"{name:<24} {seconds:>10.3f} {seconds / total:>8.1%}")
+        lines.append(f"{'total':<24} {data['total_seconds']:>10.3f}")
+
+        if self.repos:
+            lines += ["", f"{'Repository':<24} {'Seconds':>10} {'Commits':>9}", "-" * 45]
+            for name, repo in sorted(self.repos.items(), key=lambda item: -item[1]['seconds']):
+                lines.append(f"{name:<24} {repo['seconds']:>10.3f} {repo['commits']:>9,}")
+
+        git = data['git']
+        by_command = ', '.join(f"{cmd} {count}" for cmd, count in self.git_processes.most_common())
+        lines += ["", f"git processes: {git['processes']}" + (f" ({by_command})" if by_command else ''),
+                  f"git output parsed: {git['output_bytes'] / 1024 / 1024:.2f} MiB"]
+
+        stats = data['commit_stats']
+        lines.append(f"commits with timed stats: {stats['commits']:,} ({stats['seconds']:.3f}s)")
+        if stats['slowest']:
+            lines += ["", f"Slowest {len(stats['slowest'])} commits to stat:",
+                      f"{'Repository':<24} {'Commit':<10} {'Seconds':>10} {'Files':>7}", "-" * 54]
+            for entry in stats['slowest']:
+                lines.append(f"{entry['repo']:<24} {entry['hash'][:7]:<10} {entry['seconds']:>10.4f} {entry['files']:>7,}")
+        return '\n'.join(lines)
+
+    def write_json(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,1069 @@
+"""
+Markdown rendering of the DEVLOG.
+
+A Renderer turns collected commits into the document (or its shards) as a
+sequence of static text, volatile text and RenderUnits, and writes it with
+write_parts(), which copies every section whose inputs are unchanged from the
+previous output instead of rendering it again.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import re
+from collections import OrderedDict, defaultdict
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, Iterator, Iterable, List, Optional, Set, Tuple, Union
+
+from devlog.config import DevlogConfig
+from devlog.history import Commit, RepoInfo, Rollup
+
+
+class CommitClassifier:
+    """Commit categories compiled from rules into a few regular expressions.
+
+    A Conventional Commits type or a prefix at the start of the subject
+    decides the category on its own. Otherwise rules are tried in priority
+    order (the first rule that matches anywhere in the subject wins,
+    case-insensitively). A rule may list:
+    - type: Conventional Commits types, matching `type:`, `type(scope):` and `type!:`
+    - prefix: literal text the subject starts with
+    - contains: literal text found anywhere in the subject
+    - pattern: a regular expression searched for in the subject
+
+    Anchored parts (type, prefix) become one alternation matched at the start
+    of the lower-cased subject. All `contains` literals become one plain
+    alternation; it has no groups so `re` can skip ahead on the literals'
+    first characters, and the matched text maps back to its rule. Patterns, if
+    any, get their own alternation. Alternatives are ordered by priority, so
+    at any one position the regex engine itself picks the best rule.
+    """
+
+    def __init__(self, rules: List[Dict], default: Dict):
+        self.categories = [(rule.get('emoji', '🟢'), rule['label']) for rule in rules]
+        self.default = (default.get('emoji', '🟢'), default['label'])
+        anchored = []
+        patterns = []
+        self._literal_rules: Dict[str, int] = {}
+        for i, rule in enumerate(rules):
+            parts = []
+            if rule.get('type'):
+                types = '|'.join(re.escape(t.lower()) for t in rule['type'])
+                parts.append(rf"(?:{types})(?:\([^)]*\))?!?:")
+            parts += [re.escape(prefix.lower()) for prefix in rule.get('prefix', [])]
+            if parts:
+                anchored.append(f"(?P<r{i}>{'|'.join(parts)})")
+            for text in rule.get('contains', []):
+                self._literal_rules.setdefault(text.lower(), i)
+            if rule.get('pattern'):
+                patterns.append((i, f"(?P<r{i}>{rule['pattern']})"))
+
+        self._anchored = re.compile('|'.join(anchored)) if anchored else None
+        self._literals = re.compile('|'.join(re.escape(text) for text in self._literal_rules)) \
+            if self._literal_rules else None
+        self._first_literal_rule = min(self._literal_rules.values(), default=len(rules))
+        self._patterns = re.compile('|'.join(part for _, part in patterns), re.IGNORECASE) if patterns else None
+        self._first_pattern_rule = patterns[0][0] if patterns else len(rules)
+        self._cache: Dict[str, Tuple[str, str]] = {}
+
+    @staticmethod
+    def _best_match(regex, text: str, rule_of, best: int, floor: int) -> int:
+        """Lowest rule index matching anywhere in `text`, if lower than `best`.
+
+        The search restarts one character after each match so a match never
+        hides an overlapping one that starts later; nothing ranks above `floor`.
+        """
+        match = regex.search(text)
+        while match:
+            rule = rule_of(match)
+            if rule < best:
+                best = rule
+                if rule <= floor:
+                    break
+            match = regex.search(text, match.start() + 1)
+        return best
+
+    def classify(self, subject: str) -> Tuple[str, str]:
+        lowered = subject.lower()
+        if self._anchored:
+            match = self._anchored.match(lowered)
+            if match:
+                # The start of the subject states the category; keywords later
+                # in it ("fix(api): add null check", 'Revert "Add login"') must
+                # not override it
+                return self.categories[int(match.lastgroup[1:])]
+        best = len(self.categories)
+        if self._literals and best > self._first_literal_rule:
+            best = self._best_match(self._literals, lowered, lambda m: self._literal_rules[m.group()],
+                                    best, self._first_literal_rule)
+        if self._patterns and best > self._first_pattern_rule:
+            best = self._best_match(self._patterns, subject, lambda m: int(m.lastgroup[1:]),
+                                    best, self._first_pattern_rule)
+        return self.categories[best] if best < len(self.categories) else self.default
+
+    def classify_commit(self, commit: Commit) -> Tuple[str, str]:
+        """Classify a commit once; later calls for the same hash are a dict lookup."""
+        category = self._cache.get(commit.hash)
+        if category is None:
+            category = self._cache[commit.hash] = self.classify(commit.subject)
+        return category
+
+
+# Bump whenever the Markdown layout changes so sections rendered by an older
+# version are never reused
+TEMPLATE_VERSION = 7
+# Days with commits shown under Recent Activity
+RECENT_DAYS = 10
+# Files listed in a commit entry before "...and N more files"
+SHOWN_FILES = 3
+
+
+class Volatile(str):
+    """Text that changes on every run (timestamps); ignored when deciding whether the DEVLOG changed."""
+    __slots__ = ()
+
+
+class RenderUnit:
+    """A section of the DEVLOG identified by a key and a hash of everything it is rendered from."""
+    __slots__ = ('key', 'fingerprint', 'render')
+
+    def __init__(self, key: str, inputs: Iterable[str], render: Callable[[], Iterator[str]]):
+        digest = hashlib.sha1(key.encode('utf-8'))
+        for value in inputs:
+            digest.update(b'\0')
+            digest.update(value.encode('utf-8'))
+        self.key = key
+        self.fingerprint = digest.hexdigest()
+        self.render = render
+
+    @classmethod
+    def reused(cls, key: str, fingerprint: str) -> 'RenderUnit':
+        """A section copied from the previous output as is, without knowing its inputs."""
+        unit = cls.__new__(cls)
+        unit.key = key
+        unit.fingerprint = fingerprint
+        unit.render = None
+        return unit
+
+
+DevlogPart = Union[str, RenderUnit]
+
+
+class FullRunNeeded(Exception):
+    """The previous output cannot be refreshed in place (see DevlogBuilder.render_recent)."""
+
+
+def _shard_name(commit: Commit, shard_by: str) -> str:
+    """Return the shard a commit belongs to, relative to the shard directory, without extension."""
+    month = commit.date.strftime('%Y-%m')
+    return month if shard_by == 'month' else f"{commit.repo.name}/{month}"
+
+
+def _document_fingerprint(parts: List[DevlogPart]) -> str:
+    """Hash the whole document except its volatile text."""
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, RenderUnit):
+            digest.update(part.fingerprint.encode('ascii'))
+        elif not isinstance(part, Volatile):
+            digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _filter_summary(repo_config: Dict) -> Optional[str]:
+    """Describe a repository's include/exclude/max_blob_size settings, or None if it has none."""
+    parts = []
+    if repo_config.get('include'):
+        parts.append("only " + ", ".join(f"`{spec}`" for spec in repo_config['include']))
+    if repo_config.get('exclude'):
+        parts.append("excluding " + ", ".join(f"`{spec}`" for spec in repo_config['exclude']))
+    if repo_config.get('max_blob_size'):
+        parts.append(f"files over {repo_config['max_blob_size']:,} bytes are not diffed")
+    return "; ".join(parts) or None
+
+
+def _repo_rollup(repo_commits: List[Commit]) -> Rollup:
+    """The repository's running rollup if it covers exactly these commits, else one built from them."""
+    if repo_commits:
+        rollup = repo_commits[0].repo.rollup
+        if rollup.commits == len(repo_commits):
+            return rollup
+    return Rollup.from_commits(repo_commits)
+
+
+def _table_cell(text: str) -> str:
+    """Escape pipes so text can sit inside a Markdown table cell."""
+    return text.replace('|', '\\|')
+
+
+def _line_changes(insertions: int, deletions: int, empty: str) -> str:
+    """Return '+I -D' (omitting zero counts), or `empty` when both are zero."""
+    parts = []
+    if insertions > 0:
+        parts.append(f"+{insertions}")
+    if deletions > 0:
+        parts.append(f"-{deletions}")
+    return " ".join(parts) if parts else empty
+
+
+def commit_changes(commit: Commit) -> str:
+    """Describe a commit's changes: its file count and line counts, marked when its repository is filtered."""
+    if commit.repo.stats == 'none':
+        return "not collected"
+    summary = _line_changes(commit.total_insertions, commit.total_deletions, "No changes")
+    if commit.repo.filtered:
+        summary += ", filtered"
+    return f"{commit.files_changed} files changed ({summary})"
+
+
+def commit_anchor(commit: Commit) -> str:
+    """The stable anchor of a commit's entry: its repository and short hash.
+
+    The repository is part of it because forks and mirrors share commits.
+    """
+    repo = re.sub(r'[^a-z0-9_-]+', '-', commit.repo.name.lower())
+    return f"c-{repo}-{commit.hash_short}"
+
+
+def shown_files(commit: Commit) -> Tuple[List[Tuple[str, Optional[str]]], Optional[int]]:
+    """Return the files an entry lists, largest change first, as (path, '+I -D' or None if
+    binary) and how many more files it leaves out (None when all are listed).
+
+    Below the 'full' stats level no files are stored, so none are listed.
+    """
+    largest = heapq.nlargest(SHOWN_FILES, commit.files(), key=lambda change: change[1] + change[2])
+    files = [(filename, None if is_binary else _line_changes(insertions, deletions, "no changes"))
+             for filename, insertions, deletions, is_binary in largest]
+    remaining = commit.files_changed - len(files)
+    return files, remaining if remaining > 0 and commit.repo.stats == 'full' else None
+
+
+def iter_statistics_footer() -> Iterator[str]:
+    """Yield the closing note and the time of generation."""
+    yield """
+
+---
+
+*This file is automatically generated from git history across all repositories.*  
+*Use the navigation links at the top to filter by repository or jump to specific sections.*  
+"""
+    yield Volatile(f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S PST')}*\n")
+
+
+class Renderer:
+    """Renders and writes the DEVLOG for one configuration.
+
+    Rendered commit entries are memoized per commit. The key is the commit
+    hash plus a fingerprint of everything else the text depends on (template
+    version, the repository's config, the category rules); the badge line of
+    the all-repositories view is spliced into the memoized per-repository text.
+    """
+
+    def __init__(self, config: DevlogConfig, cache_dir: str, use_cache: bool = True,
+                 debug: bool = False, profile=None):
+        self.config = config
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.debug = debug
+        self.profile = profile
+        self.classifier = CommitClassifier(config.categories, config.default_category)
+        self._entry_memo: 'OrderedDict[str, str]' = OrderedDict()
+        self._entry_store: Optional[Dict[str, str]] = None
+        self._entry_store_dirty = False
+        self._repo_fingerprints: Dict[str, str] = {}
+
+    def _phase(self, name: str):
+        """Time a block as a --profile phase (a no-op when not profiling)."""
+        return self.profile.phase(name) if self.profile else nullcontext()
+
+    def _repo_fingerprint(self, repo: RepoInfo) -> str:
+        """Fingerprint of the settings a repository's entries are rendered with."""
+        fingerprint = self._repo_fingerprints.get(repo.name)
+        if fingerprint is None:
+            settings = json.dumps([TEMPLATE_VERSION, self.config.repos.get(repo.name), repo.stats,
+                                   repo.top_files, self.config.categories, self.config.default_category],
+                                  sort_keys=True, default=str)
+            fingerprint = self._repo_fingerprints[repo.name] = hashlib.sha1(settings.encode('utf-8')).hexdigest()[:12]
+        return fingerprint
+
+    def _entry_cache_path(self) -> str:
+        return os.path.join(self.cache_dir, 'entries.json')
+
+    def _persisted_entries(self) -> Optional[Dict[str, str]]:
+        """The on-disk entry cache, loaded on first use (None unless self.config.entry_cache is on)."""
+        if self._entry_store is None and self.config.entry_cache and self.use_cache:
+            try:
+                with open(self._entry_cache_path(), 'r', encoding='utf-8') as f:
+                    self._entry_store = json.load(f)
+            except (OSError, ValueError):
+                self._entry_store = {}
+        return self._entry_store
+
+    def save_entry_cache(self, commits: List[Commit], prune: bool = True) -> None:
+        """Persist the entry cache, dropping commits and settings that are gone.
+
+        Pass `prune=False` when `commits` is only part of the history.
+        """
+        store = self._persisted_entries()
+        if store is None:
+            return
+        live = {f"{commit.hash}:{self._repo_fingerprint(commit.repo)}" for commit in commits}
+        stale = [key for key in store if key not in live] if prune else []
+        if not stale and not self._entry_store_dirty:
+            return
+        for key in stale:
+            del store[key]
+        path = self._entry_cache_path()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(store, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            self._entry_store_dirty = False
+        except OSError as e:
+            if self.debug:
+                print(f"Warning: Could not write entry cache {path}: {e}")
+
+    def format_commit_entry(self, commit: Commit, show_repo_badge: bool = True) -> str:
+        """Format a single commit entry, reusing an earlier rendering of the same commit."""
+        key = f"{commit.hash}:{self._repo_fingerprint(commit.repo)}"
+        entry = self._entry_memo.get(key)
+        if entry is not None:
+            self._entry_memo.move_to_end(key)
+        else:
+            store = self._persisted_entries()
+            entry = store.get(key) if store is not None else None
+            if entry is None:
+                entry = self._render_commit_entry(commit)
+                if store is not None:
+                    store[key] = entry
+                    self._entry_store_dirty = True
+            self._entry_memo[key] = entry
+            if len(self._entry_memo) > self.config.entry_memo_size:
+                self._entry_memo.popitem(last=False)
+
+        if show_repo_badge:
+            repo = commit.repo
+            heading, rest = entry.split('\n', 1)
+            return f"{heading}\n- **Repository**: {repo.emoji} **[{repo.name}]({repo.github_url})** - {repo.description}\n{rest}"
+        return entry
+
+    def _render_commit_entry(self, commit: Commit) -> str:
+        """Format a single commit entry as shown in its repository's own view."""
+        repo = commit.repo
+
+        status_emoji, status_desc = self.classifier.classify_commit(commit)
+
+        # Format files list (show up to 3 files for compact view)
+        files, remaining = shown_files(commit)
+        files_display = [f"  - `{filename}` *(binary)*" if changes is None else f"  - `{filename}` ({changes})"
+                         for filename, changes in files]
+        if remaining is not None:
+            files_display.append(f"  - *...and {remaining} more files*")
+
+        if repo.stats != 'full':
+            files_section = f"  - *Not collected (stats level: {repo.stats})*"
+        else:
+            files_section = "\n".join(files_display) if files_display else "  - *No files modified*"
+
+        # Build commit entry
+        entry = f"""### [{commit.hash_short}] {commit.subject}
+- **Date**: {commit.date.strftime('%Y-%m-%d %H:%M:%S PST')}  
+- **Author**: {commit.author}
+- **Status**: {status_emoji} {status_desc}
+- **Changes**: {commit_changes(commit)}
+- **Commit**: [`{commit.hash_short}`]({repo.github_url}/commit/{commit.hash})
+
+<details>
+<summary>Files Modified</summary>
+
+{files_section}
+
+</details>
+
+"""
+
+        return entry
+
+    def generate_navigation_bar(self) -> str:
+        """Generate the navigation bar with filter buttons."""
+        nav = f"""## 🔍 Quick Navigation
+
+<div align="center">
+
+### Filter by Repository
+
+| [**📋 All Repositories**](#all-repositories) """
+
+        # Add repository buttons
+        for repo_name in self.config.repos.keys():
+            emoji = self.config.repos[repo_name].get('emoji', '📦')
+            # Create anchor-safe ID
+            anchor_id = repo_name.lower().replace('-', '_')
+            nav += f"| [**{emoji} {repo_name}**](#{anchor_id}_only) "
+
+        nav += "|\n\n"
+
+        # Add statistics and other links
+        nav += """### Quick Links
+
+| [**📊 Statistics**](#statistics) | [**📈 Repository Breakdown**](#repository-breakdown) | [**🗓️ Recent Activity**](#recent-activity) |
+
+</div>
+
+---
+"""
+
+        return nav
+
+    def render_context(self) -> str:
+        """Fingerprint of the settings every section depends on (template version and repo config)."""
+        config = self.config
+        settings = json.dumps([TEMPLATE_VERSION, config.repos, config.stats, config.stored_files, config.layout,
+                               config.expand_repo_views,
+                               config.hotspots, config.categories, config.default_category],
+                              sort_keys=True, default=str)
+        return hashlib.sha1(settings.encode('utf-8')).hexdigest()
+
+    def _iter_date_block(self, date_commits: List[Commit], show_repo_badge: bool, heading: str, trailer: str,
+                         anchored: bool = False) -> Iterator[str]:
+        """Yield one date heading and the entries under it, newest first (each under its anchor if `anchored`)."""
+        yield heading
+        for commit in reversed(date_commits):
+            if anchored:
+                yield f'<a name="{commit_anchor(commit)}"></a>\n\n'
+            yield self.format_commit_entry(commit, show_repo_badge=show_repo_badge)
+        yield trailer
+
+    def _iter_link_rows(self, date_commits: List[Commit]) -> Iterator[str]:
+        """Yield one table row per commit, newest first, linking to its entry in its repository's view."""
+        for commit in reversed(date_commits):
+            repo = commit.repo
+            status_emoji, _ = self.classifier.classify_commit(commit)
+            yield (f"| {commit.date.strftime('%Y-%m-%d %H:%M')} | {repo.emoji} {repo.name} "
+                   f"| [`{commit.hash_short}`](#{commit_anchor(commit)}) | {status_emoji} {_table_cell(commit.subject)} "
+                   f"| {_table_cell(commit.author)} | {commit_changes(commit)} |\n")
+
+    def _recent_unit(self, context: str, date_key: str, date_commits: List[Commit]) -> RenderUnit:
+        """The Recent Activity section of one day, across all repositories."""
+        if self.config.layout == 'deduplicated':
+            render = partial(self._iter_link_rows, date_commits)
+        else:
+            render = partial(self._iter_date_block, date_commits, True, f"#### {date_key}\n\n", "---\n\n")
+        return RenderUnit(f"recent:{date_key}", [context, *(c.hash for c in date_commits)], render)
+
+    def _repo_day_unit(self, context: str, repo_name: str, date_key: str, date_commits: List[Commit],
+                       recent_dates: Set[str]) -> RenderUnit:
+        """One day of a repository's own view.
+
+        In the deduplicated layout, the entries of a day under Recent Activity
+        (`recent_dates`) get the anchors its links point to.
+        """
+        anchored = self.config.layout == 'deduplicated' and date_key in recent_dates
+        render = partial(self._iter_date_block, date_commits, False, f"\n#### {date_key}\n\n", "", anchored)
+        inputs = [context, *(c.hash for c in date_commits)]
+        if anchored:
+            inputs.append('anchored')
+        return RenderUnit(f"repo:{repo_name}:{date_key}", inputs, render)
+
+    def days_leaving_recent(self, previous_units: Dict[str, List], new_days: Set[str]) -> Set[str]:
+        """Days whose entries lose their anchors once `new_days` enter Recent Activity.
+
+        Only the deduplicated layout anchors entries, so for the others this is empty.
+        """
+        if self.config.layout != 'deduplicated':
+            return set()
+        previous_recent = {key[len('recent:'):] for key in previous_units if key.startswith('recent:')}
+        dates = {key.rsplit(':', 1)[1] for key in previous_units if key.startswith('repo:')} | new_days
+        return previous_recent - set(sorted(dates, reverse=True)[:RECENT_DAYS])
+
+    def iter_devlog_parts(self, commits: List[Commit]) -> Iterator[DevlogPart]:
+        """Yield the DEVLOG as static text, volatile text and hashed RenderUnits, in document order."""
+        context = self.render_context()
+
+        # Group commits by date and by repository
+        commits_by_date = defaultdict(list)
+        commits_by_repo = defaultdict(list)
+
+        for commit in commits:
+            date_key = commit.date.strftime('%Y-%m-%d')
+            commits_by_date[date_key].append(commit)
+            commits_by_repo[commit.repo.name].append(commit)
+
+        # Show last 10 days of activity
+        dates = sorted(commits_by_date.keys(), reverse=True)
+        recent = [self._recent_unit(context, date_key, commits_by_date[date_key]) for date_key in dates[:RECENT_DAYS]]
+        recent_dates = set(dates[:RECENT_DAYS])
+
+        repo_sections = {}
+        for repo_name, repo_commits in commits_by_repo.items():
+            repo_dates = defaultdict(list)
+            for commit in repo_commits:
+                repo_dates[commit.date.strftime('%Y-%m-%d')].append(commit)
+            repo_sections[repo_name] = (len(repo_commits), [
+                self._repo_day_unit(context, repo_name, date_key, repo_dates[date_key], recent_dates)
+                for date_key in sorted(repo_dates.keys(), reverse=True)])
+
+        statistics = RenderUnit('statistics', [context, *(c.hash for c in commits)],
+                                partial(self.iter_statistics_tables, commits, commits_by_repo))
+        return self.iter_devlog_layout(recent, len(dates) > RECENT_DAYS, repo_sections, statistics)
+
+    def iter_devlog_layout(self, recent: List[RenderUnit], older_dates: bool,
+                           repo_sections: Dict[str, Tuple[int, List[RenderUnit]]],
+                           statistics: RenderUnit) -> Iterator[DevlogPart]:
+        """Yield the DEVLOG around its sections: the Recent Activity days, each
+        repository's (commit count, days) and the statistics.
+
+        In the deduplicated layout Recent Activity is a table of links to the
+        entries in the repositories' views.
+        """
+        deduplicated = self.config.layout == 'deduplicated'
+        expanded = self.config.expand_repo_views
+        now = datetime.now()
+
+        # Start with header
+        yield """# Development Log - Multi-Repository View
+
+> **Auto-Generated**: This file is programmatically updated from git history.  
+"""
+        yield Volatile(f"> Last updated: {now.strftime('%Y-%m-%d at %H:%M:%S PST')}\n")
+        yield f"""
+{self.generate_navigation_bar()}
+
+## Project Overview
+
+This development log provides multiple views of your project's commit history:
+- **All Repositories**: Complete chronological view across all repos{' (one line per commit, linked to its entry)' if deduplicated else ''}
+- **Per-Repository**: Filtered view showing only commits from specific repositories
+- **Collapsible Sections**: Click on "Files Modified" to expand/collapse file details
+
+### Repository Structure
+"""
+
+        # Add repository descriptions
+        for repo_name, repo_config in self.config.repos.items():
+            emoji = repo_config.get('emoji', '📦')
+            yield f"- {emoji} **[{repo_name}]({repo_config['github_url']})**: {repo_config['description']}\n"
+
+        yield "\n---\n\n"
+
+        # Section 1: All Repositories View
+        yield """<a name="all-repositories"></a>
+## 📋 All Repositories
+
+<a name="recent-activity"></a>
+### Recent Activity
+
+Showing all commits from all repositories in chronological order.
+
+"""
+
+        if deduplicated and recent:
+            # Each commit is rendered once, in its repository's view below
+            yield "| Date | Repository | Commit | Subject | Author | Changes |\n"
+            yield "|------|------------|--------|---------|--------|---------|\n"
+            yield from recent
+            yield "\n"
+        else:
+            yield from recent
+        if older_dates:
+            yield "\n*For older commits, see the per-repository sections below.*\n\n"
+
+        # Section 2: Per-Repository Views
+        yield """## 📁 Per-Repository Views
+
+Click on any repository section below to see commits filtered by that repository only.
+
+"""
+
+        for repo_name in self.config.repos.keys():
+            emoji = self.config.repos[repo_name].get('emoji', '📦')
+            anchor_id = repo_name.lower().replace('-', '_')
+            commit_count, day_units = repo_sections.get(repo_name, (0, []))
+
+            yield f"""---
+
+<a name="{anchor_id}_only"></a>
+### {emoji} {repo_name} Repository Only
+
+<details{' open' if expanded else ''}>
+<summary>Click to {'collapse' if expanded else 'expand'} {commit_count} commits from {repo_name}</summary>
+
+"""
+
+            # Show commits
+            yield from day_units
+
+            yield "\n</details>\n\n"
+
+        # Section 3: Statistics
+        yield statistics
+        yield from iter_statistics_footer()
+
+    def iter_devlog_chunks(self, commits: List[Commit]) -> Iterator[str]:
+        """Yield the enhanced DEVLOG piece by piece, one commit entry at a time."""
+        for part in self.iter_devlog_parts(commits):
+            if isinstance(part, RenderUnit):
+                yield from part.render()
+            else:
+                yield part
+
+    def _render_manifest_path(self, output_path: str) -> str:
+        """Return the manifest recording where each section of `output_path` lives."""
+        key = hashlib.sha1(os.path.abspath(output_path).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, 'render', f"{key}.json")
+
+    def load_render_manifest(self, output_path: str) -> Optional[Dict]:
+        """Load the section manifest for `output_path` if it still describes the file on disk."""
+        if not self.use_cache:
+            return None
+        try:
+            with open(self._render_manifest_path(output_path), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            st = os.stat(output_path)
+        except (OSError, ValueError):
+            return None
+        # Any edit to the output since we wrote it invalidates the recorded offsets
+        if (manifest.get('output') != os.path.abspath(output_path)
+                or manifest.get('size') != st.st_size or manifest.get('mtime_ns') != st.st_mtime_ns):
+            return None
+        return manifest
+
+    def save_render_manifest(self, output_path: str, document: str, units: Dict[str, List],
+                             extra: Optional[Dict] = None) -> None:
+        """Record the section offsets of a freshly written `output_path` (plus any `extra` fields)."""
+        if not self.use_cache:
+            return
+        path = self._render_manifest_path(output_path)
+        try:
+            st = os.stat(output_path)
+            manifest = {
+                'output': os.path.abspath(output_path),
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'document': document,
+                'units': units,
+                **(extra or {})
+            }
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if self.debug:
+                print(f"Warning: Could not write render manifest {path}: {e}")
+
+    def remove_render_manifest(self, output_path: str) -> None:
+        """Drop the section manifest of an output that has been deleted."""
+        try:
+            os.remove(self._render_manifest_path(output_path))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            if self.debug:
+                print(f"Warning: Could not remove render manifest for {output_path}: {e}")
+
+    def manifest_state(self, repos: Dict[str, RepoInfo]) -> Optional[Dict]:
+        """What --recent needs to know about the history an output was written from."""
+        if self.config.windowed:
+            # A window is not the whole history, so it cannot be refreshed in place
+            return None
+        return {'context': self.render_context(),
+                'heads': {name: [repo.head, *repo.base_heads] for name, repo in repos.items() if repo.head}}
+
+    def write_parts(self, output_path: str, parts: List[DevlogPart], force: bool = False,
+                    extra: Optional[Dict] = None) -> bool:
+        """Write a document to `output_path` atomically, reusing unchanged sections.
+
+        Sections whose inputs are unchanged since the last run are copied from the
+        existing file instead of being re-rendered. Returns False without touching
+        the file when nothing but volatile text would change (unless `force`).
+        """
+        with self._phase('grouping'):
+            document = _document_fingerprint(parts)
+
+        manifest = self.load_render_manifest(output_path)
+        if manifest and manifest['document'] == document and not force:
+            return False
+        previous = manifest['units'] if manifest else {}
+
+        units = {}
+        rendered = reused = 0
+        offset = 0
+        tmp_path = f"{output_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f, open(output_path if previous else os.devnull, 'rb') as old, \
+                    self._phase('render'):
+                out = self.profile.timed_writer(f) if self.profile else f
+                for part in parts:
+                    if isinstance(part, RenderUnit):
+                        start = offset
+                        entry = previous.get(part.key)
+                        if entry and entry[0] == part.fingerprint:
+                            old.seek(entry[1])
+                            data = old.read(entry[2])
+                            out.write(data)
+                            offset += len(data)
+                            reused += 1
+                        elif part.render is None:
+                            raise RuntimeError(f"Section {part.key} is missing from {output_path}")
+                        else:
+                            for chunk in part.render():
+                                data = chunk.encode('utf-8')
+                                out.write(data)
+                                offset += len(data)
+                            rendered += 1
+                        units[part.key] = [part.fingerprint, start, offset - start]
+                    else:
+                        data = part.encode('utf-8')
+                        out.write(data)
+                        offset += len(data)
+            with self._phase('write'):
+                os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._phase('write'):
+            self.save_render_manifest(output_path, document, units, extra)
+        if self.debug:
+            print(f"Rendered {rendered} sections, reused {reused} from {output_path}")
+        return True
+
+    def write_devlog(self, output_path: str, commits: List[Commit], force: bool = False) -> bool:
+        """Write the enhanced DEVLOG of `commits` to `output_path`, replacing it atomically.
+
+        Returns False without touching the file when nothing but the
+        timestamps would change (unless `force`).
+        """
+        with self._phase('grouping'):
+            parts = list(self.iter_devlog_parts(commits))
+        written = self.write_parts(output_path, parts, force,
+                                   self.manifest_state({c.repo.name: c.repo for c in commits}))
+        self.save_entry_cache(commits)
+        return written
+
+    def iter_recent_parts(self, previous_units: Dict[str, List], repos: Dict[str, RepoInfo],
+                          new_commits: List[Commit], day_commits: List[Commit]) -> Iterator[DevlogPart]:
+        """Yield the DEVLOG with the days in `day_commits` rendered anew and all other sections reused."""
+        context = self.render_context()
+        fresh_by_date = defaultdict(list)
+        fresh_by_repo_date = defaultdict(list)
+        for commit in day_commits:
+            date_key = commit.date.strftime('%Y-%m-%d')
+            fresh_by_date[date_key].append(commit)
+            fresh_by_repo_date[commit.repo.name, date_key].append(commit)
+
+        def section(key: str, build: Callable[[], RenderUnit]) -> RenderUnit:
+            if key.split(':')[-1] in fresh_by_date:
+                return build()
+            if key not in previous_units:
+                raise FullRunNeeded(f"section {key} is missing from the previous output")
+            return RenderUnit.reused(key, previous_units[key][0])
+
+        repo_dates = defaultdict(set)
+        for key in previous_units:
+            if key.startswith('repo:'):
+                repo_name, date_key = key[len('repo:'):].rsplit(':', 1)
+                repo_dates[repo_name].add(date_key)
+        for repo_name, date_key in fresh_by_repo_date:
+            repo_dates[repo_name].add(date_key)
+
+        dates = sorted(set().union(*repo_dates.values()), reverse=True)
+        recent = [section(f"recent:{date_key}",
+                          partial(self._recent_unit, context, date_key, fresh_by_date.get(date_key)))
+                  for date_key in dates[:RECENT_DAYS]]
+        recent_dates = set(dates[:RECENT_DAYS])
+
+        repo_sections = {}
+        for repo_name, date_keys in repo_dates.items():
+            repo = repos.get(repo_name)
+            repo_sections[repo_name] = (repo.rollup.commits if repo else 0, [
+                section(f"repo:{repo_name}:{date_key}",
+                        partial(self._repo_day_unit, context, repo_name, date_key,
+                                fresh_by_repo_date.get((repo_name, date_key)), recent_dates))
+                for date_key in sorted(date_keys, reverse=True)])
+
+        if new_commits or 'statistics' not in previous_units:
+            repo_stats = {name: repo.rollup for name, repo in repos.items() if repo.rollup.commits}
+            statistics = RenderUnit('statistics', [context, *(f"{name}:{repo.head}" for name, repo in repos.items())],
+                                    partial(self.iter_rollup_statistics, repo_stats, repos))
+        else:
+            statistics = RenderUnit.reused('statistics', previous_units['statistics'][0])
+        return self.iter_devlog_layout(recent, len(dates) > RECENT_DAYS, repo_sections, statistics)
+
+    def iter_shard_parts(self, title: str, index_link: str, commits: List[Commit], show_repo_badge: bool) -> Iterator[DevlogPart]:
+        """Yield one shard: its commits grouped by date, newest first.
+
+        Shards carry no timestamp, so a shard whose commits did not change is
+        recognised as up to date and left alone.
+        """
+        context = self.render_context()
+        yield f"# Development Log - {title}\n\n[⬅️ Back to the index]({index_link})\n\n"
+
+        commits_by_date = defaultdict(list)
+        for commit in commits:
+            commits_by_date[commit.date.strftime('%Y-%m-%d')].append(commit)
+
+        for date_key in sorted(commits_by_date.keys(), reverse=True):
+            date_commits = commits_by_date[date_key]
+            yield RenderUnit(f"date:{date_key}", [context, *(c.hash for c in date_commits)],
+                             partial(self._iter_date_block, date_commits, show_repo_badge,
+                                     f"#### {date_key}\n\n", "---\n\n"))
+
+    def iter_index_parts(self, commits: List[Commit], shards: Dict[str, List[Commit]], shard_dir: str) -> Iterator[DevlogPart]:
+        """Yield the index of a sharded DEVLOG: navigation, links to every shard and the statistics."""
+        now = datetime.now()
+        context = self.render_context()
+
+        yield """# Development Log - Multi-Repository View
+
+> **Auto-Generated**: This file is programmatically updated from git history.  
+"""
+        yield Volatile(f"> Last updated: {now.strftime('%Y-%m-%d at %H:%M:%S PST')}\n")
+        yield f"""
+{self.generate_navigation_bar()}
+
+## Project Overview
+
+This development log is split into one file per month so each page stays small:
+- **All Repositories**: Every month, newest first, with links to its commits
+- **Per-Repository**: The months in which each repository had commits
+- **Statistics**: Totals across the whole history
+
+### Repository Structure
+"""
+
+        for repo_name, repo_config in self.config.repos.items():
+            emoji = repo_config.get('emoji', '📦')
+            yield f"- {emoji} **[{repo_name}]({repo_config['github_url']})**: {repo_config['description']}\n"
+
+        yield "\n---\n\n"
+
+        # Month -> repository -> (shard name, commit count)
+        months = defaultdict(dict)
+        for name, shard_commits in shards.items():
+            for commit in shard_commits:
+                month = commit.date.strftime('%Y-%m')
+                entry = months[month].get(commit.repo.name)
+                months[month][commit.repo.name] = (name, entry[1] + 1 if entry else 1)
+
+        yield """<a name="all-repositories"></a>
+## 📋 All Repositories
+
+<a name="recent-activity"></a>
+### Recent Activity
+
+| Month | Commits | Repositories |
+|-------|---------|--------------|
+"""
+        for month in sorted(months.keys(), reverse=True):
+            repos = months[month]
+            total = sum(count for _, count in repos.values())
+            links = ' · '.join(
+                f"[{self.config.repos[repo_name].get('emoji', '📦')} {repo_name} ({repos[repo_name][1]})]({shard_dir}/{repos[repo_name][0]}.md)"
+                for repo_name in self.config.repos.keys() if repo_name in repos
+            )
+            yield f"| **{month}** | {total} | {links} |\n"
+
+        yield "\n## 📁 Per-Repository Views\n\n"
+
+        for repo_name in self.config.repos.keys():
+            emoji = self.config.repos[repo_name].get('emoji', '📦')
+            anchor_id = repo_name.lower().replace('-', '_')
+            repo_months = [(month, months[month][repo_name]) for month in sorted(months.keys(), reverse=True)
+                           if repo_name in months[month]]
+
+            yield f"""---
+
+<a name="{anchor_id}_only"></a>
+### {emoji} {repo_name} Repository Only
+
+"""
+            for month, (name, count) in repo_months:
+                yield f"- [{month}]({shard_dir}/{name}.md) - {count} commits\n"
+            if not repo_months:
+                yield "*No commits found.*\n"
+            yield "\n"
+
+        commits_by_repo = defaultdict(list)
+        for commit in commits:
+            commits_by_repo[commit.repo.name].append(commit)
+
+        yield RenderUnit('statistics', [context, *(c.hash for c in commits)],
+                         partial(self.iter_statistics_tables, commits, commits_by_repo))
+        yield from iter_statistics_footer()
+
+    def write_sharded_devlog(self, output_path: str, commits: List[Commit], shard_by: str = 'month',
+                             force: bool = False) -> bool:
+        """Write the DEVLOG as per-month shards next to a small index at `output_path`.
+
+        Shards whose commits are unchanged are neither rendered nor rewritten, so
+        closed months stay untouched and a normal run only rewrites the current
+        shard (and an older one only if a commit dated in it shows up later).
+        Returns whether the index itself was written.
+        """
+        shard_dir = os.path.splitext(output_path)[0]
+        shard_link = os.path.basename(shard_dir)
+
+        with self._phase('grouping'):
+            shards = defaultdict(list)
+            for commit in commits:
+                shards[_shard_name(commit, shard_by)].append(commit)
+
+        written = 0
+        for name, shard_commits in shards.items():
+            path = os.path.join(shard_dir, f"{name}.md")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if shard_by == 'month':
+                title, badge = name, True
+                index_link = f"../{os.path.basename(output_path)}"
+            else:
+                repo_name, month = name.split('/')
+                title, badge = f"{self.config.repos[repo_name].get('emoji', '📦')} {repo_name} - {month}", False
+                index_link = f"../../{os.path.basename(output_path)}"
+            with self._phase('grouping'):
+                parts = list(self.iter_shard_parts(title, index_link, shard_commits, badge))
+            if self.write_parts(path, parts, force):
+                written += 1
+
+        if self.debug:
+            print(f"Wrote {written} of {len(shards)} shards in {shard_dir}")
+
+        with self._phase('grouping'):
+            parts = list(self.iter_index_parts(commits, shards, shard_link))
+        index_written = self.write_parts(output_path, parts, force)
+        self.save_entry_cache(commits)
+        return index_written or written > 0
+
+    def iter_statistics_tables(self, commits: List[Commit], commits_by_repo: Dict[str, List[Commit]]) -> Iterator[str]:
+        """Yield the statistics tables one row at a time."""
+        repo_stats = {repo_name: _repo_rollup(commits_by_repo[repo_name]) for repo_name in self.config.repos
+                      if commits_by_repo.get(repo_name)}
+        repos = {repo_name: commits_by_repo[repo_name][0].repo for repo_name in repo_stats}
+        yield from self.iter_rollup_statistics(repo_stats, repos)
+
+    def iter_rollup_statistics(self, repo_stats: Dict[str, Rollup], repos: Dict[str, RepoInfo]) -> Iterator[str]:
+        """Yield the statistics tables from per-repository rollups alone (no commits needed)."""
+        total_commits = sum(stats.commits for stats in repo_stats.values())
+
+        days = [day for stats in repo_stats.values() for day in stats.days]
+        if days:
+            first, last = (datetime.strptime(day, '%Y-%m-%d') for day in (min(days), max(days)))
+            date_range = f"{first.strftime('%B %d')}-{last.strftime('%d, %Y')}"
+        else:
+            date_range = "No commits found"
+
+        # Overall statistics come from the per-repository rollups, not the commits
+        total_files_changed = sum(stats.files_changed for stats in repo_stats.values())
+        total_insertions = sum(stats.insertions for stats in repo_stats.values())
+        total_deletions = sum(stats.deletions for stats in repo_stats.values())
+        unique_authors = len(set().union(*(stats.authors for stats in repo_stats.values())))
+
+        yield f"""---
+
+<a name="statistics"></a>
+## 📊 Statistics
+
+### Overall Summary
+
+| Metric | Value |
+|--------|-------|
+| **Total Commits** | {total_commits} |
+| **Contributors** | {unique_authors} |
+| **Files Changed** | {total_files_changed:,} |
+| **Lines Added** | +{total_insertions:,} |
+| **Lines Removed** | -{total_deletions:,} |
+| **Net Change** | {total_insertions - total_deletions:+,} |
+| **Development Period** | {date_range} |
+| **Active Repositories** | {len(repo_stats)} |
+
+<a name="repository-breakdown"></a>
+### 📈 Repository Breakdown
+
+| Repository | Commits | Contributors | Files Changed | Lines Changed |
+|------------|---------|--------------|---------------|--------------|
+"""
+
+        # Sort by commit count
+        for repo_name, stats in sorted(repo_stats.items(), key=lambda x: x[1].commits, reverse=True):
+            emoji = self.config.repos[repo_name].get('emoji', '📦')
+            contributors = len(stats.authors)
+            line_changes = f"+{stats.insertions:,} -{stats.deletions:,}"
+            marker = " *(filtered)*" if _filter_summary(self.config.repos[repo_name]) else ""
+
+            yield f"| {emoji} **{repo_name}**{marker} | {stats.commits} | {contributors} | {stats.files_changed:,} | {line_changes} |\n"
+
+        notes = [(repo_name, _filter_summary(self.config.repos[repo_name])) for repo_name in repo_stats]
+        notes = [(repo_name, summary) for repo_name, summary in notes if summary]
+        if notes:
+            yield "\n> **Filtered statistics**: file and line counts of these repositories leave out some changes.\n"
+            for repo_name, summary in notes:
+                yield f"> - **{repo_name}**: {summary}\n"
+
+        levels = [(repo_name, repos[repo_name].stats) for repo_name in repo_stats if repos[repo_name].stats != 'full']
+        if levels:
+            yield "\n> **Partial statistics**: these repositories were read without per-file stats, so they are missing from the hotspots.\n"
+            for repo_name, level in levels:
+                detail = "totals only" if level == 'summary' else "no file or line counts"
+                yield f"> - **{repo_name}**: stats level `{level}` ({detail})\n"
+
+        if self.config.hotspots > 0:
+            yield from self.iter_hotspots(repos, repo_stats)
+
+    def iter_hotspots(self, repos: Dict[str, RepoInfo], repo_stats: Dict[str, Rollup]) -> Iterator[str]:
+        """Yield the most-churned files and most active authors, picked with bounded heaps."""
+        def file_churn(item):
+            return item[2][1] + item[2][2]
+
+        candidates = ((repo_name, path_id, totals)
+                      for repo_name, stats in repo_stats.items()
+                      for path_id, totals in stats.files.items())
+        top_files = heapq.nlargest(self.config.hotspots, candidates, key=file_churn)
+
+        authors = defaultdict(lambda: [0, 0, 0])
+        for stats in repo_stats.values():
+            for author, (count, insertions, deletions) in stats.authors.items():
+                totals = authors[author]
+                totals[0] += count
+                totals[1] += insertions
+                totals[2] += deletions
+        top_authors = heapq.nlargest(self.config.hotspots, authors.items(), key=lambda item: item[1][0])
+
+        yield f"""
+<a name="hotspots"></a>
+### 🔥 Hotspots
+
+**Most-churned files** (top {self.config.hotspots} by lines added + removed)
+
+| File | Repository | Commits | Lines Changed |
+|------|------------|---------|---------------|
+"""
+        for repo_name, path_id, (count, insertions, deletions) in top_files:
+            filename = repos[repo_name].paths[path_id]
+            emoji = self.config.repos[repo_name].get('emoji', '📦')
+            yield f"| `{_table_cell(filename)}` | {emoji} {repo_name} | {count} | +{insertions:,} -{deletions:,} |\n"
+
+        yield f"""
+**Most active authors** (top {self.config.hotspots} by commits)
+
+| Author | Commits | Lines Changed |
+|--------|---------|---------------|
+"""
+        for author, (count, insertions, deletions) in top_authors:
+            yield f"| {_table_cell(author)} | {count} | +{insertions:,} -{deletions:,} |\n"
+
+    def iter_statistics(self, commits: List[Commit], commits_by_repo: Dict[str, List[Commit]]) -> Iterator[str]:
+        """Yield the statistics section one table row at a time."""
+        yield from self.iter_statistics_tables(commits, commits_by_repo)
+        yield from iter_statistics_footer()
+
+    def generate_statistics(self, commits: List[Commit], commits_by_repo: Dict[str, List[Commit]]) -> str:
+        """Generate statistics section."""
+        return ''.join(self.iter_statistics(commits, commits_by_repo))
@@ -0,0 +1,161 @@
+// Client side of the static DEVLOG (see scripts/devlog/web.py).
+//
+// index.json holds one row per commit, newest first, as parallel arrays of
+// small integers (repository, day, author, category). Filtering scans those
+// arrays in memory; only the entries/YYYY-MM.html files the current page
+// needs are fetched, once each.
+(() => {
+  'use strict';
+
+  const PAGE_SIZE = 50;
+  const DAY_MS = 864e5;
+
+  const $ = (id) => document.getElementById(id);
+  const list = $('commits');
+  const status = $('status');
+
+  let index = null;
+  // First row of each month file, in row order
+  let starts = [];
+  let matches = [];
+  let page = 0;
+  let showing = 0;
+  const months = new Map();
+
+  const toDay = (value) => (value ? Math.floor(Date.parse(value) / DAY_MS) : null);
+  const dayString = (day) => new Date(day * DAY_MS).toISOString().slice(0, 10);
+
+  function fill(select, labels, column) {
+    const counts = new Array(labels.length).fill(0);
+    for (const value of index[column]) counts[value] += 1;
+    labels.forEach((label, value) => {
+      const option = document.createElement('option');
+      option.value = value;
+      option.textContent = `${label} (${counts[value]})`;
+      select.append(option);
+    });
+  }
+
+  // Month file holding a row: the last one starting at or before it
+  function monthOf(row) {
+    let lo = 0;
+    let hi = starts.length - 1;
+    while (lo < hi) {
+      const mid = (lo + hi + 1) >> 1;
+      if (starts[mid] <= row) lo = mid;
+      else hi = mid - 1;
+    }
+    return lo;
+  }
+
+  function loadMonth(month) {
+    if (!months.has(month)) {
+      const name = index.months[month][0];
+      months.set(month, fetch(`entries/${name}.html`)
+        .then((response) => {
+          if (!response.ok) throw new Error(`entries/${name}.html: ${response.status}`);
+          return response.text();
+        })
+        .then((text) => {
+          const template = document.createElement('template');
+          template.innerHTML = text;
+          return Array.from(template.content.querySelectorAll('article'));
+        })
+        .catch((error) => {
+          months.delete(month);
+          throw error;
+        }));
+    }
+    return months.get(month);
+  }
+
+  function filter() {
+    const repo = Number($('repo').value);
+    const author = Number($('author').value);
+    const category = Number($('category').value);
+    const from = toDay($('from').value);
+    const to = toDay($('to').value);
+    const { repo: repos, author: authors, category: categories, day: days } = index;
+
+    matches = [];
+    for (let row = 0; row < days.length; row++) {
+      if ((repo < 0 || repos[row] === repo)
+          && (author < 0 || authors[row] === author)
+          && (category < 0 || categories[row] === category)
+          && (from === null || days[row] >= from)
+          && (to === null || days[row] <= to)) {
+        matches.push(row);
+      }
+    }
+    page = 0;
+    show();
+  }
+
+  async function show() {
+    const token = ++showing;
+    const pages = Math.max(1, Math.ceil(matches.length / PAGE_SIZE));
+    const rows = matches.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE);
+    $('prev').disabled = page === 0;
+    $('next').disabled = page >= pages - 1;
+    status.textContent = rows.length
+      ? `Commits ${page * PAGE_SIZE + 1}–${page * PAGE_SIZE + rows.length} of ${matches.length.toLocaleString()}`
+        + ` · page ${page + 1} of ${pages}`
+      : 'No commits match these filters';
+
+    try {
+      const needed = [...new Set(rows.map(monthOf))];
+      const loaded = new Map(await Promise.all(needed.map(async (month) => [month, await loadMonth(month)])));
+      // A newer filter or page change has taken over
+      if (token !== showing) return;
+      list.replaceChildren(...rows.map((row) => {
+        const month = monthOf(row);
+        return loaded.get(month)[row - starts[month]].cloneNode(true);
+      }));
+    } catch (error) {
+      if (token === showing) status.textContent = `Could not load commits: ${error.message}`;
+    }
+  }
+
+  function turn(step) {
+    page += step;
+    show();
+    list.scrollIntoView();
+  }
+
+  fetch('index.json')
+    .then((response) => {
+      if (!response.ok) throw new Error(`index.json: ${response.status}`);
+      return response.json();
+    })
+    .then((data) => {
+      index = data;
+      let row = 0;
+      starts = index.months.map(([, count]) => {
+        const start = row;
+        row += count;
+        return start;
+      });
+
+      fill($('repo'), index.repos.map((repo) => `${repo.emoji} ${repo.name}`), 'repo');
+      fill($('author'), index.authors, 'author');
+      fill($('category'), index.categories.map(([emoji, label]) => `${emoji} ${label}`), 'category');
+      if (index.day.length) {
+        const first = dayString(index.day[index.day.length - 1]);
+        const last = dayString(index.day[0]);
+        for (const input of [$('from'), $('to')]) {
+          input.min = first;
+          input.max = last;
+        }
+      }
+
+      for (const id of ['repo', 'author', 'category', 'from', 'to']) $(id).addEventListener('change', filter);
+      $('filters').addEventListener('submit', (event) => event.preventDefault());
+      $('filters').addEventListener('reset', () => setTimeout(filter));
+      $('prev').addEventListener('click', () => turn(-1));
+      $('next').addEventListener('click', () => turn(1));
+      filter();
+    })
+    .catch((error) => {
+      status.textContent = `Could not load the commit index: ${error.message}`;
+    });
+})();
@@ -0,0 +1,248 @@
+"""
+Static HTML DEVLOG, served by Cloudflare Pages from public/devlog.
+
+Every commit is rendered once, into the file of its month, and the page finds
+it through a compact prebuilt index instead of duplicated sections:
+
+- index.html: the page shell with the filter controls and the client script
+  (static/devlog.js, inlined so the long-lived cache rule for *.js in
+  public/_headers never serves a stale copy)
+- index.json: one row per commit, newest first, as parallel arrays of
+  repository, day, author and category numbers
+- entries/YYYY-MM.html: the month's commits, newest first, in index order
+
+Month files are written with Renderer.write_parts(), so a month whose commits
+are unchanged is neither rendered nor rewritten. index.json and index.html
+are single documents, rewritten only when their text changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import date
+from functools import partial
+from html import escape
+from typing import Dict, Iterator, List, Tuple
+
+from devlog.history import Commit
+from devlog.render import DevlogPart, Renderer, RenderUnit, commit_anchor, commit_changes, shown_files
+
+# Bump whenever the HTML layout or the index format changes
+HTML_VERSION = 1
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# index.json stores days as days since 1970-01-01, like JavaScript's Date / 864e5
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MONTH_FILE = re.compile(r'^\d{4}-\d{2}\.html$')
+
+
+def _static(name: str) -> str:
+    with open(os.path.join(STATIC_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _iter_days(month_commits: List[Commit]) -> Iterator[Tuple[str, List[Commit]]]:
+    """Yield a month's (date, commits) newest first: the order of both its file and its index rows."""
+    days = defaultdict(list)
+    for commit in month_commits:
+        days[commit.date.strftime('%Y-%m-%d')].append(commit)
+    for date_key in sorted(days.keys(), reverse=True):
+        yield date_key, days[date_key]
+
+
+class HtmlSite:
+    """Writes the static HTML DEVLOG from the settings and classifier of a Renderer."""
+
+    def __init__(self, renderer: Renderer):
+        self.renderer = renderer
+        self.config = renderer.config
+        self.debug = renderer.debug
+
+    def _phase(self, name: str):
+        """Time a block as a --profile phase (a no-op when not profiling)."""
+        profile = self.renderer.profile
+        return profile.phase(name) if profile else nullcontext()
+
+    def render_context(self) -> str:
+        """Fingerprint of the settings every month file depends on."""
+        return hashlib.sha1(f"html:{HTML_VERSION}:{self.renderer.render_context()}".encode('utf-8')).hexdigest()
+
+    def format_commit_entry(self, commit: Commit) -> str:
+        """Format a single commit as an <article> anchored at its repository and short hash."""
+        repo = commit.repo
+        status_emoji, status_desc = self.renderer.classifier.classify_commit(commit)
+        anchor = commit_anchor(commit)
+        commit_url = escape(f"{repo.github_url}/commit/{commit.hash}")
+
+        files, remaining = shown_files(commit)
+        items = [f"<li><code>{escape(filename)}</code> <em>(binary)</em></li>" if changes is None
+                 else f"<li><code>{escape(filename)}</code> ({changes})</li>"
+                 for filename, changes in files]
+        if remaining is not None:
+            items.append(f"<li><em>...and {remaining} more files</em></li>")
+        if repo.stats != 'full':
+            files_section = f"<li><em>Not collected (stats level: {repo.stats})</em></li>"
+        else:
+            files_section = "\n".join(items) if items else "<li><em>No files modified</em></li>"
+
+        return f"""<article id="{anchor}">
+<h3><a href="#{anchor}">{commit.hash_short}</a> {escape(commit.subject)}</h3>
+<p class="meta">{repo.emoji} <a href="{escape(repo.github_url)}">{escape(repo.name)}</a> · <time datetime="{commit.date.isoformat()}">{commit.date.strftime('%Y-%m-%d %H:%M:%S PST')}</time> · {escape(commit.author)} · {status_emoji} {escape(status_desc)}</p>
+<p>{escape(commit_changes(commit))} · <a href="{commit_url}">view commit</a></p>
+<details>
+<summary>Files Modified</summary>
+<ul>
+{files_section}
+</ul>
+</details>
+</article>
+"""
+
+    def _iter_entries(self, commits: List[Commit]) -> Iterator[str]:
+        for commit in reversed(commits):
+            yield self.format_commit_entry(commit)
+
+    def iter_month_parts(self, month_commits: List[Commit]) -> Iterator[DevlogPart]:
+        """Yield one month file: its commits newest first, one RenderUnit per day."""
+        context = self.render_context()
+        for date_key, day_commits in _iter_days(month_commits):
+            yield RenderUnit(f"date:{date_key}", [context, *(c.hash for c in day_commits)],
+                             partial(self._iter_entries, day_commits))
+
+    def index_document(self, months: Dict[str, List[Commit]]) -> str:
+        """Return index.json for commits grouped by month, rows in the same order as the month files."""
+        repo_ids = {name: i for i, name in enumerate(self.config.repos)}
+        rows = []
+        for month in sorted(months.keys(), reverse=True):
+            for commit in (c for _, day_commits in _iter_days(months[month]) for c in reversed(day_commits)):
+                rows.append((repo_ids[commit.repo.name], commit.date.date().toordinal() - EPOCH_ORDINAL,
+                             commit.author, self.renderer.classifier.classify_commit(commit)))
+        authors = sorted({row[2] for row in rows}, key=str.lower)
+        categories = sorted({row[3] for row in rows}, key=lambda category: category[1])
+        author_ids = {author: i for i, author in enumerate(authors)}
+        category_ids = {category: i for i, category in enumerate(categories)}
+
+        index = {
+            'version': HTML_VERSION,
+            'repos': [{'name': name, 'emoji': repo_config.get('emoji', '📦'), 'url': repo_config['github_url']}
+                      for name, repo_config in self.config.repos.items()],
+            'authors': authors,
+            'categories': [list(category) for category in categories],
+            # [month, commits] in row order; rows of a month are consecutive
+            'months': [[month, len(months[month])] for month in sorted(months.keys(), reverse=True)],
+            'repo': [row[0] for row in rows],
+            'day': [row[1] for row in rows],
+            'author': [author_ids[row[2]] for row in rows],
+            'category': [category_ids[row[3]] for row in rows],
+        }
+        return json.dumps(index, ensure_ascii=False, separators=(',', ':')) + "\n"
+
+    def page(self) -> str:
+        """Return index.html: the repositories, the filter controls and the inlined client script."""
+        repo_items = "\n".join(
+            f"<li>{repo_config.get('emoji', '📦')} <a href=\"{escape(repo_config['github_url'])}\"><strong>"
+            f"{escape(repo_name)}</strong></a>: {escape(repo_config['description'])}</li>"
+            for repo_name, repo_config in self.config.repos.items())
+
+        return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Development Log - Multi-Repository View</title>
+<style>
+{_static('devlog.css')}</style>
+</head>
+<body>
+<header>
+<h1>Development Log - Multi-Repository View</h1>
+<p><strong>Auto-Generated</strong>: this page is programmatically updated from git history.</p>
+<ul>
+{repo_items}
+</ul>
+</header>
+<form id="filters">
+<label>Repository <select id="repo"><option value="-1">All repositories</option></select></label>
+<label>Author <select id="author"><option value="-1">All authors</option></select></label>
+<label>Status <select id="category"><option value="-1">All statuses</option></select></label>
+<label>From <input id="from" type="date"></label>
+<label>To <input id="to" type="date"></label>
+<button type="reset">Clear</button>
+</form>
+<p id="status">Loading commits...</p>
+<noscript><p>The commit list is filtered and paged in the browser; please enable JavaScript.</p></noscript>
+<main id="commits"></main>
+<nav>
+<button id="prev" type="button" disabled>← Newer</button>
+<button id="next" type="button" disabled>Older →</button>
+</nav>
+<script>
+{_static('devlog.js')}</script>
+</body>
+</html>
+"""
+
+    def write_site(self, output_dir: str, commits: List[Commit], force: bool = False) -> bool:
+        """Write the HTML DEVLOG of `commits` into `output_dir`.
+
+        Month files whose commits are unchanged are left alone, and month files
+        no longer backed by any commit are removed. Returns whether anything
+        was written.
+        """
+        renderer = self.renderer
+        entries_dir = os.path.join(output_dir, 'entries')
+        os.makedirs(entries_dir, exist_ok=True)
+
+        with self._phase('grouping'):
+            months = defaultdict(list)
+            for commit in commits:
+                months[commit.date.strftime('%Y-%m')].append(commit)
+
+        written = 0
+        for month, month_commits in months.items():
+            with self._phase('grouping'):
+                parts = list(self.iter_month_parts(month_commits))
+            if renderer.write_parts(os.path.join(entries_dir, f"{month}.html"), parts, force):
+                written += 1
+
+        removed = 0
+        for name in os.listdir(entries_dir):
+            if MONTH_FILE.match(name) and name[:-len('.html')] not in months:
+                month_path = os.path.join(entries_dir, name)
+                os.remove(month_path)
+                renderer.remove_render_manifest(month_path)
+                removed += 1
+
+        if self.debug:
+            print(f"Wrote {written} of {len(months)} month files in {entries_dir}, removed {removed}")
+
+        with self._phase('grouping'):
+            index = self.index_document(months)
+        index_written = self._write_file(os.path.join(output_dir, 'index.json'), index, force)
+        page_written = self._write_file(os.path.join(output_dir, 'index.html'), self.page(), force)
+        return index_written or page_written or written > 0 or removed > 0
+
+    def _write_file(self, path: str, text: str, force: bool) -> bool:
+        """Replace `path` with `text` atomically, unless it already holds exactly that (or `force`)."""
+        data = text.encode('utf-8')
+        with self._phase('write'):
+            if not force:
+                try:
+                    with open(path, 'rb') as f:
+                        if f.read() == data:
+                            return False
+                except OSError:
+                    pass
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        if self.debug:
+            print(f"Wrote {path}")
+        return True
@@ -8,527 +8,215 @@ This version creates a single Markdown file with:
 3. Per-repository filtered sections
 4. Collapsible sections for better organization
 5. Interactive table of contents
+
+This script is only the command line; the generator itself is
+devlog.DevlogBuilder (scripts/devlog/builder.py), which can be imported and
+driven directly.
 """
 
-import subprocess
-import re
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
-import sys
-import os
 import argparse
 import json
-from collections import defaultdict
+import os
+import sys
+from datetime import date
+from functools import partial
 
-# Repository configuration
-REPOS = {
-    'markdown-brain-bot': {
-        'path': '/Users/colinaulds/Desktop/projects/markdown-brain-bot',
-        'description': 'Main backend system with Smart Rails routing',
-        'github_url': 'https://github.com/auldsyababua/markdown-brain-bot',
-        'emoji': '🤖'
-    },
-    'gpt-parser': {
-        'path': '/Users/colinaulds/Desktop/projects/gpt-parser', 
-        'description': 'Early backend attempt with GPT parsing',
-        'github_url': 'https://github.com/auldsyababua/gpt-parser',
-        'emoji': '🧠'
-    },
-    'bbui': {
-        'path': '/Users/colinaulds/Desktop/projects/bbui',
-        'description': 'Frontend interface for FLRTS system',
-        'github_url': 'https://github.com/auldsyababua/bbui',
-        'emoji': '🎨'
-    }
-}
+from devlog.config import LAYOUTS, SHARD_MODES, STATS_LEVELS
 
-# Try to load configuration from .devlog/config.json if it exists
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
-config_file = os.path.join(project_root, '.devlog', 'config.json')
 
-if os.path.exists(config_file):
+def query_date(value: str) -> str:
+    """argparse type of the query --since/--until options: a YYYY-MM-DD date."""
     try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-            if 'repositories' in config:
-                # Merge with default emojis
-                for repo_name, repo_config in config['repositories'].items():
-                    if repo_name in REPOS:
-                        repo_config['emoji'] = REPOS[repo_name].get('emoji', '📦')
-                REPOS = config['repositories']
-    except Exception as e:
-        print(f"Warning: Could not load config from {config_file}: {e}")
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {value!r} (expected YYYY-MM-DD)")
 
-def run_git_command(cmd: str, repo_path: str = None) -> str:
-    """Run a git command and return output."""
-    try:
-        cwd = repo_path if repo_path else os.getcwd()
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=True, cwd=cwd)
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        if '--debug' in sys.argv:
-            print(f"Git command failed: {cmd} (in {cwd})")
-            print(f"Error: {e.stderr}")
-        return ""
+def run_query(args, index_path: str) -> None:
+    """Print the answer to a `query` subcommand from the SQLite index at `index_path`."""
+    from devlog.index import CommitIndex
 
-def get_commit_stats(commit_hash: str, repo_path: str) -> Dict:
-    """Get file and line change statistics for a commit."""
+    if not os.path.exists(index_path):
+        print(f"❌ No index at {index_path}; run the generator (or the index command) first")
+        sys.exit(1)
+    index = CommitIndex(index_path)
     try:
-        # Get the list of changed files with their change counts
-        numstat_output = run_git_command(
-            f'git show --numstat --format="" {commit_hash}',
-            repo_path
-        )
-        
-        files_changed = []
-        total_insertions = 0
-        total_deletions = 0
-        
-        for line in numstat_output.split('\n'):
-            if line.strip():
-                parts = line.split('\t')
-                if len(parts) >= 3:
-                    insertions = parts[0] if parts[0] != '-' else '0'
-                    deletions = parts[1] if parts[1] != '-' else '0'
-                    filename = '\t'.join(parts[2:])
-                    
-                    try:
-                        ins_count = int(insertions) if insertions.isdigit() else 0
-                        del_count = int(deletions) if deletions.isdigit() else 0
-                        
-                        files_changed.append({
-                            'filename': filename,
-                            'insertions': ins_count,
-                            'deletions': del_count,
-                            'total_changes': ins_count + del_count
-                        })
-                        
-                        total_insertions += ins_count
-                        total_deletions += del_count
-                    except ValueError:
-                        files_changed.append({
-                            'filename': filename,
-                            'insertions': 0,
-                            'deletions': 0,
-                            'total_changes': 0,
-                            'binary': True
-                        })
-        
-        return {
-            'files_changed': len(files_changed),
-            'files_list': files_changed,
-            'total_insertions': total_insertions,
-            'total_deletions': total_deletions,
-            'total_changes': total_insertions + total_deletions
-        }
-        
-    except Exception as e:
-        if '--debug' in sys.argv:
-            print(f"Error getting stats for commit {commit_hash}: {e}")
-        return {
-            'files_changed': 0,
-            'files_list': [],
-            'total_insertions': 0,
-            'total_deletions': 0,
-            'total_changes': 0
-        }
-
-def get_commit_info() -> List[Dict]:
-    """Get detailed commit information from git log across all repositories."""
-    all_commits = []
-    
-    for repo_name, repo_config in REPOS.items():
-        if not os.path.exists(repo_config['path']):
-            if '--debug' in sys.argv:
-                print(f"Warning: Repository path not found: {repo_config['path']}")
-            continue
-            
-        try:
-            # Get commit info
-            log_output = run_git_command(
-                'git log --pretty=format:"%H|%ad|%s|%an" --date=iso --reverse', 
-                repo_config['path']
-            )
-            
-            if not log_output:
-                continue
-                
-            for line in log_output.split('\n'):
-                if '|' in line:
-                    parts = line.split('|', 3)
-                    if len(parts) == 4:
-                        hash_full, date_str, subject, author = parts
-                        
-                        try:
-                            commit_date = datetime.fromisoformat(date_str.replace(' -0700', '').replace(' -0800', ''))
-                        except ValueError:
-                            commit_date = datetime.now()
-                        
-                        stats = get_commit_stats(hash_full, repo_config['path'])
-                        
-                        commit_info = {
-                            'hash': hash_full,
-                            'hash_short': hash_full[:7],
-                            'date': commit_date,
-                            'subject': subject,
-                            'author': author,
-                            'repo': repo_name,
-                            'repo_description': repo_config['description'],
-                            'github_url': repo_config['github_url'],
-                            'emoji': repo_config.get('emoji', '📦'),
-                            'stats': stats
-                        }
-                        
-                        all_commits.append(commit_info)
-        except Exception as e:
-            if '--debug' in sys.argv:
-                print(f"Error processing {repo_name}: {e}")
-            continue
-    
-    all_commits.sort(key=lambda x: x['date'])
-    return all_commits
-
-def categorize_commit(subject: str) -> Tuple[str, str]:
-    """Categorize commit by type."""
-    subject_lower = subject.lower()
-    
-    if subject_lower.startswith('merge'):
-        return "🟢", "PR merge"
-    elif any(word in subject_lower for word in ['feat:', 'feature:', 'add ']):
-        return "🟢", "Feature"
-    elif any(word in subject_lower for word in ['fix:', 'bug:']):
-        return "🟢", "Bug fix"
-    elif any(word in subject_lower for word in ['docs:', 'documentation']):
-        return "🟢", "Documentation"
-    elif any(word in subject_lower for word in ['test:', 'testing']):
-        return "🟢", "Testing"
-    elif any(word in subject_lower for word in ['refactor:', 'cleanup']):
-        return "🟢", "Refactor"
-    elif any(word in subject_lower for word in ['wip:', 'work in progress']):
-        return "🟡", "WIP"
-    else:
-        return "🟢", "Update"
-
-def format_commit_entry(commit: Dict, show_repo_badge: bool = True) -> str:
-    """Format a single commit entry."""
-    repo_name = commit['repo']
-    repo_config = REPOS[repo_name]
-    
-    status_emoji, status_desc = categorize_commit(commit['subject'])
-    
-    # Repository badge
-    if show_repo_badge:
-        repo_badge = f"{commit['emoji']} **[{repo_name}]({repo_config['github_url']})** - {commit['repo_description']}"
-    else:
-        repo_badge = None
-    
-    # Format file changes
-    stats = commit.get('stats', {})
-    files_changed = stats.get('files_changed', 0)
-    total_insertions = stats.get('total_insertions', 0)
-    total_deletions = stats.get('total_deletions', 0)
-    
-    change_parts = []
-    if total_insertions > 0:
-        change_parts.append(f"+{total_insertions}")
-    if total_deletions > 0:
-        change_parts.append(f"-{total_deletions}")
-    
-    change_summary = " ".join(change_parts) if change_parts else "No changes"
-    
-    # Format files list (show up to 3 files for compact view)
-    files_list = stats.get('files_list', [])
-    files_display = []
-    
-    for i, file_info in enumerate(files_list):
-        if i >= 3:
-            remaining = len(files_list) - 3
-            files_display.append(f"  - *...and {remaining} more files*")
-            break
-        
-        filename = file_info['filename']
-        file_insertions = file_info.get('insertions', 0)
-        file_deletions = file_info.get('deletions', 0)
-        is_binary = file_info.get('binary', False)
-        
-        if is_binary:
-            files_display.append(f"  - `{filename}` *(binary)*")
+        if args.query == 'author':
+            rows = index.commits_by_author(args.author, args.since, args.until, args.repo)
+            columns = ['day', 'repo', 'hash', 'subject', 'files_changed', 'insertions', 'deletions']
+        elif args.query == 'churn':
+            rows = index.churned_files(args.limit, args.since, args.until, args.repo)
+            columns = ['repo', 'path', 'commits', 'insertions', 'deletions', 'churn']
         else:
-            file_change_parts = []
-            if file_insertions > 0:
-                file_change_parts.append(f"+{file_insertions}")
-            if file_deletions > 0:
-                file_change_parts.append(f"-{file_deletions}")
-            file_changes = " ".join(file_change_parts) if file_change_parts else "no changes"
-            files_display.append(f"  - `{filename}` ({file_changes})")
-    
-    files_section = "\n".join(files_display) if files_display else "  - *No files modified*"
-    
-    # Build commit entry
-    entry = f"""### [{commit['hash_short']}] {commit['subject']}
-"""
-    
-    if repo_badge:
-        entry += f"- **Repository**: {repo_badge}\n"
-    
-    entry += f"""- **Date**: {commit['date'].strftime('%Y-%m-%d %H:%M:%S PST')}  
-- **Author**: {commit['author']}
-- **Status**: {status_emoji} {status_desc}
-- **Changes**: {files_changed} files changed ({change_summary})
-- **Commit**: [`{commit['hash_short']}`]({repo_config['github_url']}/commit/{commit['hash']})
-
-<details>
-<summary>Files Modified</summary>
-
-{files_section}
-
-</details>
-
-"""
-    
-    return entry
-
-def generate_navigation_bar() -> str:
-    """Generate the navigation bar with filter buttons."""
-    nav = f"""## 🔍 Quick Navigation
-
-<div align="center">
-
-### Filter by Repository
-
-| [**📋 All Repositories**](#all-repositories) """
-    
-    # Add repository buttons
-    for repo_name in REPOS.keys():
-        emoji = REPOS[repo_name].get('emoji', '📦')
-        # Create anchor-safe ID
-        anchor_id = repo_name.lower().replace('-', '_')
-        nav += f"| [**{emoji} {repo_name}**](#{anchor_id}_only) "
-    
-    nav += "|\n\n"
-    
-    # Add statistics and other links
-    nav += """### Quick Links
-
-| [**📊 Statistics**](#statistics) | [**📈 Repository Breakdown**](#repository-breakdown) | [**🗓️ Recent Activity**](#recent-activity) |
-
-</div>
-
----
-"""
-    
-    return nav
-
-def generate_enhanced_devlog() -> str:
-    """Generate the enhanced DEVLOG with filter functionality."""
-    commits = get_commit_info()
-    now = datetime.now()
-    
-    # Start with header
-    devlog_content = f"""# Development Log - Multi-Repository View
-
-> **Auto-Generated**: This file is programmatically updated from git history.  
-> Last updated: {now.strftime('%Y-%m-%d at %H:%M:%S PST')}
-
-{generate_navigation_bar()}
-
-## Project Overview
-
-This development log provides multiple views of your project's commit history:
-- **All Repositories**: Complete chronological view across all repos
-- **Per-Repository**: Filtered view showing only commits from specific repositories
-- **Collapsible Sections**: Click on "Files Modified" to expand/collapse file details
-
-### Repository Structure
-"""
-    
-    # Add repository descriptions
-    for repo_name, repo_config in REPOS.items():
-        emoji = repo_config.get('emoji', '📦')
-        devlog_content += f"- {emoji} **[{repo_name}]({repo_config['github_url']})**: {repo_config['description']}\n"
-    
-    devlog_content += "\n---\n\n"
-    
-    # Group commits by date and by repository
-    commits_by_date = defaultdict(list)
-    commits_by_repo = defaultdict(list)
-    
-    for commit in commits:
-        date_key = commit['date'].strftime('%Y-%m-%d')
-        commits_by_date[date_key].append(commit)
-        commits_by_repo[commit['repo']].append(commit)
-    
-    # Section 1: All Repositories View
-    devlog_content += """<a name="all-repositories"></a>
-## 📋 All Repositories
-
-<a name="recent-activity"></a>
-### Recent Activity
-
-Showing all commits from all repositories in chronological order.
-
-"""
-    
-    # Show last 10 days of activity
-    dates_shown = 0
-    for date_key in sorted(commits_by_date.keys(), reverse=True):
-        if dates_shown >= 10:
-            devlog_content += "\n*For older commits, see the per-repository sections below.*\n\n"
-            break
-            
-        date_commits = commits_by_date[date_key]
-        date_obj = datetime.strptime(date_key, '%Y-%m-%d')
-        devlog_content += f"#### {date_obj.strftime('%Y-%m-%d')}\n\n"
-        
-        for commit in reversed(date_commits):
-            devlog_content += format_commit_entry(commit, show_repo_badge=True)
-        
-        devlog_content += "---\n\n"
-        dates_shown += 1
-    
-    # Section 2: Per-Repository Views
-    devlog_content += """## 📁 Per-Repository Views
-
-Click on any repository section below to see commits filtered by that repository only.
-
-"""
-    
-    for repo_name in REPOS.keys():
-        emoji = REPOS[repo_name].get('emoji', '📦')
-        anchor_id = repo_name.lower().replace('-', '_')
-        repo_commits = commits_by_repo.get(repo_name, [])
-        
-        devlog_content += f"""---
-
-<a name="{anchor_id}_only"></a>
-### {emoji} {repo_name} Repository Only
-
-<details>
-<summary>Click to expand {len(repo_commits)} commits from {repo_name}</summary>
-
-"""
-        
-        # Group by date
-        repo_dates = defaultdict(list)
-        for commit in repo_commits:
-            date_key = commit['date'].strftime('%Y-%m-%d')
-            repo_dates[date_key].append(commit)
-        
-        # Show commits
-        for date_key in sorted(repo_dates.keys(), reverse=True):
-            date_commits = repo_dates[date_key]
-            date_obj = datetime.strptime(date_key, '%Y-%m-%d')
-            devlog_content += f"\n#### {date_obj.strftime('%Y-%m-%d')}\n\n"
-            
-            for commit in reversed(date_commits):
-                devlog_content += format_commit_entry(commit, show_repo_badge=False)
-        
-        devlog_content += "\n</details>\n\n"
-    
-    # Section 3: Statistics
-    devlog_content += generate_statistics(commits, commits_by_repo)
-    
-    return devlog_content
-
-def generate_statistics(commits: List[Dict], commits_by_repo: Dict[str, List[Dict]]) -> str:
-    """Generate statistics section."""
-    total_commits = len(commits)
-    unique_authors = len(set(commit['author'] for commit in commits))
-    
-    if commits:
-        date_range = f"{commits[0]['date'].strftime('%B %d')}-{commits[-1]['date'].strftime('%d, %Y')}"
-    else:
-        date_range = "No commits found"
-    
-    # Calculate overall statistics
-    total_files_changed = 0
-    total_insertions = 0
-    total_deletions = 0
-    
-    repo_stats = {}
-    for repo_name, repo_commits in commits_by_repo.items():
-        stats = {
-            'commits': len(repo_commits),
-            'files_changed': 0,
-            'insertions': 0,
-            'deletions': 0,
-            'authors': set()
-        }
-        
-        for commit in repo_commits:
-            commit_stats = commit.get('stats', {})
-            stats['files_changed'] += commit_stats.get('files_changed', 0)
-            stats['insertions'] += commit_stats.get('total_insertions', 0)
-            stats['deletions'] += commit_stats.get('total_deletions', 0)
-            stats['authors'].add(commit['author'])
-            
-            total_files_changed += commit_stats.get('files_changed', 0)
-            total_insertions += commit_stats.get('total_insertions', 0)
-            total_deletions += commit_stats.get('total_deletions', 0)
-        
-        repo_stats[repo_name] = stats
-    
-    content = f"""---
-
-<a name="statistics"></a>
-## 📊 Statistics
-
-### Overall Summary
-
-| Metric | Value |
-|--------|-------|
-| **Total Commits** | {total_commits} |
-| **Contributors** | {unique_authors} |
-| **Files Changed** | {total_files_changed:,} |
-| **Lines Added** | +{total_insertions:,} |
-| **Lines Removed** | -{total_deletions:,} |
-| **Net Change** | {total_insertions - total_deletions:+,} |
-| **Development Period** | {date_range} |
-| **Active Repositories** | {len(repo_stats)} |
-
-<a name="repository-breakdown"></a>
-### 📈 Repository Breakdown
-
-| Repository | Commits | Contributors | Files Changed | Lines Changed |
-|------------|---------|--------------|---------------|--------------|
-"""
-    
-    # Sort by commit count
-    for repo_name, stats in sorted(repo_stats.items(), key=lambda x: x[1]['commits'], reverse=True):
-        emoji = REPOS[repo_name].get('emoji', '📦')
-        contributors = len(stats['authors'])
-        line_changes = f"+{stats['insertions']:,} -{stats['deletions']:,}"
-        
-        content += f"| {emoji} **{repo_name}** | {stats['commits']} | {contributors} | {stats['files_changed']:,} | {line_changes} |\n"
-    
-    content += f"""
-
----
-
-*This file is automatically generated from git history across all repositories.*  
-*Use the navigation links at the top to filter by repository or jump to specific sections.*  
-*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S PST')}*
-"""
-    
-    return content
+            rows = index.weekly_activity(args.repo, args.since, args.until)
+            columns = ['week', 'repo', 'commits', 'authors', 'insertions', 'deletions']
+    finally:
+        index.close()
+
+    if args.json:
+        print(json.dumps([{column: row[column] for column in columns} for row in rows], indent=2))
+        return
+    table = [[str(row[column])[:7] if column == 'hash' else str(row[column]) for column in columns]
+             for row in rows]
+    widths = [max([len(column)] + [len(cells[i]) for cells in table]) for i, column in enumerate(columns)]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    print('  '.join('-' * width for width in widths))
+    for cells in table:
+        print('  '.join(cell.ljust(width) for cell, width in zip(cells, widths)))
+    print(f"({len(rows)} rows)")
 
 def main():
     """Main function to generate enhanced DEVLOG."""
     parser = argparse.ArgumentParser(description='Generate enhanced multi-repository DEVLOG.md')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
     parser.add_argument('--output', default='DEVLOG.md', help='Output filename')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update .devlog/cache')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Repositories to collect concurrently (default: "concurrency" in the config, or 8)')
+    parser.add_argument('--backend', choices=['git', 'native'], default=None,
+                        help='Read history via the git CLI or in-process from .git (default: "backend" in the config, or git)')
+    parser.add_argument('--stats', choices=STATS_LEVELS, default=None,
+                        help='Per-commit detail to collect: file lists (full), totals only (summary) or '
+                             'nothing (none) (default: "stats" in the config, or full)')
+    parser.add_argument('--top-files', type=int, default=None, metavar='N',
+                        help='File changes kept per commit, largest first; totals still count every file '
+                             '(default: "top_files" in the config, or 10)')
+    parser.add_argument('--full-file-lists', action='store_true',
+                        help='Store every file change of each commit, not only the --top-files largest')
+    parser.add_argument('--commit-graph', action='store_true',
+                        help='Write or extend each repository\'s commit-graph with changed-path Bloom filters '
+                             'before walking it')
+    parser.add_argument('--force', action='store_true',
+                        help='Rewrite the output even if only the timestamps would change')
+    parser.add_argument('--since', metavar='DATE',
+                        help='Only collect commits after DATE (anything `git log --since` accepts)')
+    parser.add_argument('--until', metavar='DATE',
+                        help='Only collect commits before DATE (anything `git log --until` accepts)')
+    parser.add_argument('--recent', action='store_true',
+                        help='Refresh --output reading only commits made since it was last written; '
+                             'older sections and the statistics are reused')
+    parser.add_argument('--entry-cache', action='store_true',
+                        help='Keep rendered commit entries in .devlog/cache/entries.json between runs')
+    parser.add_argument('--shard', choices=SHARD_MODES, default=None,
+                        help='Write one file per month (or per repository and month) into a directory '
+                             'named after --output, which becomes a small index')
+    parser.add_argument('--layout', choices=LAYOUTS, default=None,
+                        help='Render recent commits in both views (standard) or every commit once, with Recent '
+                             'Activity as a table of links (deduplicated) (default: "layout" in the config, or standard)')
+    parser.add_argument('--expand-repos', action='store_true',
+                        help='Render the per-repository views expanded instead of collapsed')
+    parser.add_argument('--html', nargs='?', metavar='DIR',
+                        const=os.path.join(project_root, 'public', 'devlog'),
+                        help='Write the static HTML DEVLOG (each commit once, plus a filter index) into DIR '
+                             'instead of --output (default: public/devlog)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and regenerate whenever a repository\'s refs change')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds between ref checks in --watch mode (default: 1)')
+    parser.add_argument('--debounce', type=float, default=2.0,
+                        help='Seconds refs must be quiet before --watch regenerates (default: 2)')
+    parser.add_argument('--profile', nargs='?', metavar='JSON',
+                        const=os.path.join(project_root, '.devlog', 'profile.json'),
+                        help='Print per-phase timings and git counters, and save them as JSON '
+                             '(default: .devlog/profile.json)')
+    parser.add_argument('--profile-top', type=int, default=10, metavar='N',
+                        help='Number of slowest commits to report with --profile')
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help='Dump cProfile statistics of the run to FILE (read with python -m pstats)')
+    
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.add_parser('index', help='Collect commits into .devlog/index.sqlite3 without writing markdown')
+    query = subparsers.add_parser('query', help='Answer questions from .devlog/index.sqlite3 without running git')
+    queries = query.add_subparsers(dest='query', required=True)
+    by_author = queries.add_parser('author', help='Commits by one author')
+    by_author.add_argument('author', help='Author name exactly as recorded by git')
+    churn = queries.add_parser('churn', help='Most-churned files (lines added + removed)')
+    churn.add_argument('--limit', type=int, default=20, help='Number of files to list')
+    weekly = queries.add_parser('weekly', help='Per-repository activity by week')
+    for sub in (by_author, churn, weekly):
+        sub.add_argument('--repo', help='Only this repository')
+        sub.add_argument('--since', metavar='YYYY-MM-DD', type=query_date,
+                         help='Only commits on or after this date (from midnight UTC)')
+        sub.add_argument('--until', metavar='YYYY-MM-DD', type=query_date,
+                         help='Only commits before this date (from midnight UTC)')
+        sub.add_argument('--json', action='store_true', help='Print rows as JSON')
     args = parser.parse_args()
     
+    if args.command == 'query':
+        run_query(args, os.path.join(project_root, '.devlog', 'index.sqlite3'))
+        return
+    
+    from devlog import DevlogBuilder
+    
+    profile = None
+    if args.profile and not (args.command or args.watch):
+        from devlog.profiling import Profiler
+        profile = Profiler(top=args.profile_top,
+                           phases=['config load', 'collect', 'merge', 'index', 'grouping', 'render', 'write'])
+    builder = DevlogBuilder(use_cache=not args.no_cache, debug=args.debug, profile=profile)
+    config = builder.config
+    config.concurrency = args.jobs or config.concurrency
+    config.backend = args.backend or config.backend
+    config.commit_graph = config.commit_graph or args.commit_graph
+    config.top_files = config.top_files if args.top_files is None else args.top_files
+    config.full_file_lists = config.full_file_lists or args.full_file_lists
+    
+    if args.command == 'index':
+        config.index = True
+        config.since = config.until = None
+        config.stats = 'full'
+        commits = builder.collect()
+        print(f"✅ Indexed {len(commits)} commits in {builder.index_path}")
+        return
+    
+    config.entry_cache = config.entry_cache or args.entry_cache
+    config.since = args.since or config.since
+    config.until = args.until or config.until
+    config.stats = args.stats or config.stats
+    config.layout = args.layout or config.layout
+    config.expand_repo_views = config.expand_repo_views or args.expand_repos
+    if args.recent and (args.shard or args.watch):
+        parser.error('--recent refreshes a single --output file and cannot be combined with --shard or --watch')
+    if args.html and (args.recent or args.shard or args.watch):
+        parser.error('--html cannot be combined with --recent, --shard or --watch')
+    
+    if args.watch:
+        builder.watch(args.output, args.shard, args.interval, args.debounce)
+        return
+    
     print("Generating enhanced DEVLOG with navigation...")
     
+    output = args.html or args.output
+    if args.html:
+        run = partial(builder.render_html, args.html, args.force)
+    elif args.recent:
+        run = partial(builder.render_recent, args.output, args.force)
+    else:
+        run = partial(builder.render, args.output, args.shard, args.force)
+    
     try:
-        devlog_content = generate_enhanced_devlog()
+        if args.cprofile:
+            import cProfile
+            profiler = cProfile.Profile()
+            written = profiler.runcall(run)
+            profiler.dump_stats(args.cprofile)
+        else:
+            written = run()
+        
+        if profile:
+            print(profile.summary())
+            profile.write_json(args.profile)
+            print(f"📈 Profile saved to {args.profile}")
         
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(devlog_content)
+        if not written:
+            print(f"✅ {output} is already up to date (use --force to rewrite it)")
+            return
         
-        print(f"✅ {args.output} generated successfully!")
+        print(f"✅ {output} generated successfully!")
+        if args.html:
+            print("📊 index.html filters and pages through index.json; each commit is written once under entries/")
+            return
         print("📊 Features included:")
         print("   - Navigation bar with repository filters")
         print("   - Collapsible sections for better organization")
@@ -544,4 +232,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,77 @@
+"""Shared helpers of the DEVLOG generator tests: the import path and throwaway git repositories."""
+
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, Optional, Union
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+scripts_dir = os.path.join(project_root, 'scripts')
+if scripts_dir not in sys.path:
+    sys.path.insert(0, scripts_dir)
+
+from devlog.config import DevlogConfig  # noqa: E402
+
+
+class GitRepo:
+    """A git repository in a temporary directory, committed to with fixed dates."""
+
+    def __init__(self, parent: str, name: str = 'demo'):
+        self.name = name
+        self.path = os.path.join(parent, name)
+        os.makedirs(self.path)
+        self.git('init', '-q', '-b', 'main')
+        self.git('config', 'user.name', 'Dev')
+        self.git('config', 'user.email', 'dev@example.com')
+        self.git('config', 'commit.gpgsign', 'false')
+
+    def git(self, *args: str, date: Optional[str] = None) -> str:
+        env = dict(os.environ, GIT_CONFIG_NOSYSTEM='1', HOME=self.path)
+        if date:
+            env['GIT_AUTHOR_DATE'] = env['GIT_COMMITTER_DATE'] = date
+        return subprocess.run(['git', *args], cwd=self.path, env=env, check=True,
+                              capture_output=True, text=True).stdout.strip()
+
+    def write(self, files: Dict[str, Union[str, bytes, None]]) -> None:
+        """Write (or, for None, delete) files relative to the work tree."""
+        for name, data in files.items():
+            path = os.path.join(self.path, name)
+            if data is None:
+                os.remove(path)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb' if isinstance(data, bytes) else 'w') as f:
+                f.write(data)
+
+    def commit(self, subject: str, files: Dict[str, Union[str, bytes, None]], date: str,
+               committer_date: Optional[str] = None) -> str:
+        """Commit `files` with author date `date` (e.g. '2024-05-01T11:00:00 +0000'); return the hash."""
+        self.write(files)
+        self.git('add', '-A')
+        self.git('commit', '-q', '--allow-empty', '-m', subject, f'--date={date}', date=committer_date or date)
+        return self.head()
+
+    def head(self) -> str:
+        return self.git('rev-parse', 'HEAD')
+
+    def repo_config(self) -> Dict:
+        return {'path': self.path, 'description': f'{self.name} repo',
+                'github_url': f'https://github.com/example/{self.name}'}
+
+
+class TempDirTestCase:
+    """Mixin giving each test a fresh temporary directory in `self.tmp`."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self._tmp.cleanup()
+
+    def config(self, *repos: GitRepo, **settings) -> DevlogConfig:
+        settings.setdefault('index', False)
+        return DevlogConfig({repo.name: repo.repo_config() for repo in repos}, **settings)
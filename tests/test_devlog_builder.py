@@ -0,0 +1,94 @@
+"""Tests for DevlogBuilder: collecting histories, the history cache and the order commits render in."""
+
+import os
+import re
+import unittest
+from unittest import mock
+
+from devlog_testing import GitRepo, TempDirTestCase
+
+from devlog import history
+from devlog.builder import DevlogBuilder
+
+
+def day(hour: int) -> str:
+    return f'2024-05-01T{hour:02d}:00:00 +0000'
+
+
+class CommitOrderTest(TempDirTestCase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.repo = GitRepo(self.tmp)
+        # Children authored before their parents, as after a rebase or cherry-pick
+        for hour in (11, 15, 13, 19, 17):
+            self.repo.commit(f'Change at {hour}', {'notes.txt': f'{hour}\n'}, day(hour), committer_date=day(20))
+
+    def builder(self):
+        return DevlogBuilder(self.config(self.repo), data_dir=os.path.join(self.tmp, 'data'))
+
+    def test_rendered_day_is_newest_first(self):
+        output = os.path.join(self.tmp, 'DEVLOG.md')
+        self.builder().render(output)
+        with open(output, encoding='utf-8') as f:
+            times = re.findall(r'\*\*Date\*\*: 2024-05-01 (\d\d):00', f.read())
+        # Recent Activity, then the repository's own view
+        self.assertEqual(times, ['19', '17', '15', '13', '11'] * 2)
+
+    def test_commits_appended_to_a_cached_history_are_merged_by_date(self):
+        self.builder().collect()
+        self.repo.commit('Change at 12', {'notes.txt': '12\n'}, day(12), committer_date=day(21))
+        builder = self.builder()
+        commits = builder.collect()
+        self.assertEqual([c.date.hour for c in commits], [11, 12, 13, 15, 17, 19])
+
+
+class HistoryCacheTest(TempDirTestCase, unittest.TestCase):
+    """Which commits a run walks, given what the history cache holds."""
+
+    def setUp(self):
+        super().setUp()
+        self.repo = GitRepo(self.tmp)
+        self.first = self.repo.commit('First', {'a.txt': '1\n'}, day(9))
+        self.second = self.repo.commit('Second', {'a.txt': '2\n'}, day(10))
+
+    def collect(self):
+        """Collect with a fresh builder; return (subjects, [(include, exclude)] of each git walk)."""
+        walks = []
+        original = history.CliRepository.commits
+
+        async def commits(source, include, exclude=(), options=()):
+            walks.append((include, list(exclude)))
+            return await original(source, include, exclude, options)
+
+        builder = DevlogBuilder(self.config(self.repo), data_dir=os.path.join(self.tmp, 'data'))
+        with mock.patch.object(history.CliRepository, 'commits', commits):
+            collected = builder.collect()
+        return [commit.subject for commit in collected], walks
+
+    def test_first_run_walks_everything(self):
+        self.assertEqual(self.collect(), (['First', 'Second'], [(self.second, [])]))
+
+    def test_unchanged_head_walks_nothing(self):
+        self.collect()
+        self.assertEqual(self.collect(), (['First', 'Second'], []))
+
+    def test_fast_forward_walks_only_new_commits(self):
+        self.collect()
+        third = self.repo.commit('Third', {'a.txt': '3\n'}, day(11))
+        self.assertEqual(self.collect(), (['First', 'Second', 'Third'], [(third, [self.second])]))
+
+    def test_rewritten_history_is_walked_again(self):
+        self.collect()
+        self.repo.git('reset', '-q', '--hard', self.first)
+        rewritten = self.repo.commit('Second, amended', {'a.txt': '2b\n'}, day(10))
+        self.assertEqual(self.collect(), (['First', 'Second, amended'], [(rewritten, [])]))
+
+    def test_cache_of_another_version_is_ignored(self):
+        self.collect()
+        with mock.patch.object(history, 'CACHE_VERSION', history.CACHE_VERSION + 1):
+            self.assertEqual(self.collect(), (['First', 'Second'], [(self.second, [])]))
+            self.assertEqual(self.collect(), (['First', 'Second'], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
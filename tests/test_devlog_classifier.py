@@ -0,0 +1,38 @@
+"""Tests for the commit classifier of the DEVLOG generator."""
+
+import unittest
+
+import devlog_testing  # noqa: F401 (puts scripts/ on the import path)
+
+from devlog.config import DEFAULT_CATEGORY, DEFAULT_CATEGORY_RULES
+from devlog.render import CommitClassifier
+
+
+class CommitClassifierTest(unittest.TestCase):
+    def setUp(self):
+        self.classifier = CommitClassifier(DEFAULT_CATEGORY_RULES, DEFAULT_CATEGORY)
+
+    def label(self, subject):
+        return self.classifier.classify(subject)[1]
+
+    def test_type_wins_over_keywords_of_higher_rules(self):
+        self.assertEqual(self.label('fix(api): add null check'), 'Bug fix')
+        self.assertEqual(self.label('docs: add README'), 'Documentation')
+        self.assertEqual(self.label('test: add coverage for parser'), 'Testing')
+        self.assertEqual(self.label('refactor!: drop testing helper'), 'Refactor')
+        self.assertEqual(self.label('style: cleanup'), 'Style')
+
+    def test_keywords_without_a_type(self):
+        self.assertEqual(self.label('Add login page'), 'Feature')
+        self.assertEqual(self.label('Quick fix: typo in testing notes'), 'Bug fix')
+        self.assertEqual(self.label('Some cleanup'), 'Refactor')
+        self.assertEqual(self.label('Tweak layout'), 'Update')
+
+    def test_prefixes_win_over_keywords(self):
+        self.assertEqual(self.label('Merge pull request #12 from example/add-login'), 'PR merge')
+        self.assertEqual(self.label('Revert "Tweak layout"'), 'Revert')
+        self.assertEqual(self.label('Revert "Add login page"'), 'Revert')
+
+
+if __name__ == '__main__':
+    unittest.main()
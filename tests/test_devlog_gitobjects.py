@@ -0,0 +1,78 @@
+"""Tests for the in-process git reader: the native backend must read exactly what git log does."""
+
+import os
+import unittest
+from unittest import mock
+
+from devlog_testing import GitRepo, TempDirTestCase
+
+from devlog.builder import DevlogBuilder
+from devlog.history import CliRepository, NativeRepository, RepoInfo, open_repository
+
+
+def commit_record(commit):
+    return (commit.hash, commit.date, commit.subject, commit.author, commit.files_changed,
+            commit.total_insertions, commit.total_deletions, list(commit.files()))
+
+
+def numbered(count, changed=()):
+    return ''.join(f"line {i}{' changed' if i in changed else ''}\n" for i in range(count))
+
+
+class BackendParityTest(TempDirTestCase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        # Neither git nor the reader may pick up the user's own config
+        patcher = mock.patch.dict(os.environ, {'HOME': self.tmp, 'XDG_CONFIG_HOME': os.path.join(self.tmp, 'xdg'),
+                                               'GIT_CONFIG_NOSYSTEM': '1'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        repo = self.repo = GitRepo(self.tmp)
+        repo.commit('Initial import', {'README.md': '# Demo\n', 'src/app.py': numbered(200),
+                                       'assets/logo.bin': bytes(range(256)) * 4}, '2024-05-01T09:00:00 +0000')
+        repo.commit('Rename app and edit the logo', {'src/app.py': None, 'src/main.py': numbered(200, {3}),
+                                                     'assets/logo.bin': bytes(range(255, -1, -1)) * 4},
+                    '2024-05-01T10:00:00 +0000')
+        repo.commit('Grow the app', {'src/main.py': numbered(260, {3, 50})}, '2024-05-02T09:00:00 +0000')
+        # Everything so far goes into a pack, with deltas between the versions of main.py
+        repo.git('gc', '-q', '--aggressive')
+
+        repo.git('checkout', '-q', '-b', 'side')
+        repo.commit('Side change', {'docs/notes.md': 'notes\n', 'src/main.py': numbered(260, {3, 50, 100})},
+                    '2024-05-02T11:00:00 +0000')
+        repo.git('checkout', '-q', 'main')
+        repo.commit('Main change', {'README.md': '# Demo\n\nMore.\n', 'empty.txt': ''}, '2024-05-02T12:00:00 +0000')
+        repo.git('merge', '-q', '--no-ff', '-m', 'Merge branch side', 'side', date='2024-05-03T09:00:00 +0000')
+        repo.commit('Drop the empty file', {'empty.txt': None}, '2024-05-03T10:00:00 +0000')
+
+    def collect(self, backend):
+        config = self.config(self.repo, backend=backend)
+        return [commit_record(c) for c in DevlogBuilder(config, use_cache=False).collect()]
+
+    def test_packed_and_loose_objects_are_both_read(self):
+        pack_dir = os.path.join(self.repo.path, '.git', 'objects', 'pack')
+        self.assertTrue(any(name.endswith('.pack') for name in os.listdir(pack_dir)))
+        self.assertTrue(self.repo.git('count-objects').split()[0] != '0')
+
+    def test_native_backend_matches_git(self):
+        source = open_repository(RepoInfo(self.repo.name, self.repo.repo_config()), 'native')
+        source.close()
+        self.assertIsInstance(source, NativeRepository)
+        native = self.collect('native')
+        self.assertEqual(len(native), 7)
+        self.assertEqual(native, self.collect('git'))
+
+    def test_rename_and_include_config_fall_back_to_git(self):
+        for key, value in (('diff.renames', 'copies'), ('include.path', os.path.join(self.tmp, 'extra.gitconfig'))):
+            with self.subTest(key=key):
+                self.repo.git('config', key, value)
+                source = open_repository(RepoInfo(self.repo.name, self.repo.repo_config()), 'native')
+                source.close()
+                self.assertIs(type(source), CliRepository)
+                self.assertEqual(self.collect('native'), self.collect('git'))
+                self.repo.git('config', '--unset', key)
+
+
+if __name__ == '__main__':
+    unittest.main()
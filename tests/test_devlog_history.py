@@ -0,0 +1,68 @@
+"""Tests for parsing git log output into commits and their file changes."""
+
+import unittest
+
+import devlog_testing  # noqa: F401 (puts scripts/ on the import path)
+
+from devlog.history import NumstatCollector, RepoInfo, _parse_numstat_line
+
+
+class NumstatLineTest(unittest.TestCase):
+    def test_text_file(self):
+        self.assertEqual(_parse_numstat_line('12\t3\tsrc/app.py'), ('src/app.py', 12, 3, False))
+
+    def test_binary_file(self):
+        self.assertEqual(_parse_numstat_line('-\t-\tassets/logo.png'), ('assets/logo.png', 0, 0, True))
+
+    def test_tab_in_filename(self):
+        self.assertEqual(_parse_numstat_line('1\t0\tdocs/a\tb.md'), ('docs/a\tb.md', 1, 0, False))
+
+    def test_not_a_numstat_line(self):
+        self.assertIsNone(_parse_numstat_line('Merge branch side'))
+
+
+class NumstatCollectorTest(unittest.TestCase):
+    LINES = ['1\t0\te.txt', '3\t2\ta.py', '6\t4\tb.py', '4\t1\tc.py', '-\t-\td.bin']
+
+    def collect(self, limit, trimmed=None):
+        collector = NumstatCollector(limit, trimmed)
+        for line in self.LINES:
+            collector.add(line)
+        return collector
+
+    def test_keeps_the_largest_changes_and_counts_every_file(self):
+        trimmed = {}
+        collector = self.collect(2, trimmed)
+        # a.py and c.py tie at 5 changes; the earlier file is kept
+        self.assertEqual(collector.kept(), [('b.py', 6, 4, False), ('a.py', 3, 2, False)])
+        self.assertEqual(collector.totals, (5, 14, 7))
+        self.assertTrue(collector.trimmed)
+        # e.txt was kept at first, then pushed out by b.py
+        self.assertEqual(trimmed, {'e.txt': [1, 1, 0], 'c.py': [1, 4, 1], 'd.bin': [1, 0, 0]})
+
+    def test_trimmed_changes_are_summed_per_path(self):
+        trimmed = {'c.py': [2, 10, 10]}
+        self.collect(2, trimmed)
+        self.assertEqual(trimmed['c.py'], [3, 14, 11])
+
+    def test_without_a_limit_every_change_is_kept_in_git_order(self):
+        collector = self.collect(None)
+        self.assertEqual(collector.kept(), [('e.txt', 1, 0, False), ('a.py', 3, 2, False), ('b.py', 6, 4, False),
+                                            ('c.py', 4, 1, False), ('d.bin', 0, 0, True)])
+        self.assertFalse(collector.trimmed)
+
+    def test_binary_changes_are_kept_as_binary(self):
+        collector = self.collect(5)
+        self.assertIn(('d.bin', 0, 0, True), collector.kept())
+        self.assertFalse(collector.trimmed)
+
+    def test_store_keeps_the_totals_of_a_trimmed_commit(self):
+        repo = RepoInfo('demo', {'path': '', 'description': '', 'github_url': ''})
+        self.assertEqual(self.collect(2).store(repo), (5, 14, 7))
+        self.assertEqual(repo.file_count, 2)
+        self.assertIsNone(self.collect(None).store(repo))
+        self.assertEqual(repo.file_count, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
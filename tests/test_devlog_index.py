@@ -0,0 +1,100 @@
+"""Tests for the SQLite commit index."""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import devlog_testing  # noqa: F401 (puts scripts/ on the import path)
+
+from devlog.history import Commit, RepoInfo
+from devlog.index import CommitIndex
+
+
+class CommitIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = CommitIndex(':memory:')
+        self.addCleanup(self.index.close)
+        self.repo = RepoInfo('demo', {'path': '', 'description': '', 'github_url': ''})
+
+    def commit(self, hash_char, hour, files, totals=None, offset=0):
+        start = self.repo.file_count
+        for change in files:
+            self.repo.add_file(*change)
+        date = datetime(2024, 5, 1, hour, tzinfo=timezone(timedelta(hours=offset)))
+        return Commit(self.repo, hash_char * 40, date, f'Commit {hash_char}', 'Dev', start, totals)
+
+    def rows(self):
+        commits = [tuple(row) for row in self.index.db.execute(
+            'SELECT hash, files_changed, files_stored FROM commits ORDER BY hash')]
+        files = [tuple(row) for row in self.index.db.execute(
+            'SELECT hash, path, insertions, deletions, binary FROM file_changes ORDER BY hash, path')]
+        return commits, files
+
+    def test_sync_adds_commits_and_their_files(self):
+        a = self.commit('a', 9, [('a.py', 3, 1, False), ('logo.png', 0, 0, True)])
+        b = self.commit('b', 10, [('b.py', 2, 0, False)])
+        self.assertEqual(self.index.sync('demo', [a, b]), {'added': 2, 'updated': 0, 'removed': 0})
+        self.assertEqual(self.rows(), ([('a' * 40, 2, 2), ('b' * 40, 1, 1)],
+                                       [('a' * 40, 'a.py', 3, 1, 0), ('a' * 40, 'logo.png', 0, 0, 1),
+                                        ('b' * 40, 'b.py', 2, 0, 0)]))
+
+    def test_resync_of_unchanged_commits_writes_nothing(self):
+        commits = [self.commit('a', 9, [('a.py', 3, 1, False)]), self.commit('b', 10, [('b.py', 2, 0, False)])]
+        self.index.sync('demo', commits)
+        writes = self.index.db.total_changes
+        self.assertEqual(self.index.sync('demo', commits), {'added': 0, 'updated': 0, 'removed': 0})
+        self.assertEqual(self.index.db.total_changes, writes)
+
+    def test_commits_gone_from_history_are_removed(self):
+        a = self.commit('a', 9, [('a.py', 3, 1, False)])
+        b = self.commit('b', 10, [('b.py', 2, 0, False)])
+        self.index.sync('demo', [a, b])
+        rebased = self.commit('c', 10, [('b.py', 2, 0, False)])
+        self.assertEqual(self.index.sync('demo', [a, rebased]), {'added': 1, 'updated': 0, 'removed': 1})
+        self.assertEqual(self.rows(), ([('a' * 40, 1, 1), ('c' * 40, 1, 1)],
+                                       [('a' * 40, 'a.py', 3, 1, 0), ('c' * 40, 'b.py', 2, 0, 0)]))
+
+    def test_sync_without_prune_keeps_other_commits(self):
+        a = self.commit('a', 9, [('a.py', 3, 1, False)])
+        self.index.sync('demo', [a])
+        b = self.commit('b', 10, [('b.py', 2, 0, False)])
+        self.assertEqual(self.index.sync('demo', [b], prune=False), {'added': 1, 'updated': 0, 'removed': 0})
+        self.assertEqual(self.rows()[0], [('a' * 40, 1, 1), ('b' * 40, 1, 1)])
+
+    def test_trimmed_commit_gets_its_full_file_list(self):
+        # Only the largest of three changes is stored on the commit
+        trimmed = self.commit('a', 9, [('big.py', 10, 0, False)], totals=(3, 12, 1))
+        requested = []
+
+        def full_files(commits):
+            requested.extend(commit.hash for commit in commits)
+            return {trimmed.hash: [('big.py', 10, 0, False), ('small.py', 2, 0, False), ('logo.png', 0, 0, True)]}
+
+        self.index.sync('demo', [trimmed], full_files=full_files)
+        self.assertEqual(requested, [trimmed.hash])
+        self.assertEqual(self.rows(), ([('a' * 40, 3, 3)],
+                                       [('a' * 40, 'big.py', 10, 0, 0), ('a' * 40, 'logo.png', 0, 0, 1),
+                                        ('a' * 40, 'small.py', 2, 0, 0)]))
+        # Complete now, so it is neither re-read nor rewritten
+        self.assertEqual(self.index.sync('demo', [trimmed], full_files=full_files),
+                         {'added': 0, 'updated': 0, 'removed': 0})
+        self.assertEqual(requested, [trimmed.hash])
+
+    def test_trimmed_commit_without_full_files_is_written_again_later(self):
+        trimmed = self.commit('a', 9, [('big.py', 10, 0, False)], totals=(3, 12, 1))
+        self.index.sync('demo', [trimmed])
+        self.assertEqual(self.rows()[0], [('a' * 40, 3, 1)])
+        self.assertEqual(self.index.sync('demo', [trimmed]), {'added': 0, 'updated': 1, 'removed': 0})
+
+    def test_date_bounds_are_read_as_utc(self):
+        # 23:00 on May 1 at -07:00 is 06:00 on May 2 in UTC
+        self.index.sync('demo', [self.commit('a', 23, [('a.py', 1, 0, False)], offset=-7)])
+        self.assertEqual(len(self.index.commits_by_author('Dev', since='2024-05-02', until='2024-05-03')), 1)
+        self.assertEqual(len(self.index.commits_by_author('Dev', until='2024-05-02')), 0)
+        # Bounds with an offset keep it
+        self.assertEqual(len(self.index.commits_by_author('Dev', since='2024-05-01T00:00:00-07:00',
+                                                          until='2024-05-02T00:00:00-07:00')), 1)
+        self.assertEqual(CommitIndex._range('2024-05-02', None), [1714608000, 2 ** 62])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Tests for the Markdown rendering of the DEVLOG."""
+
+import os
+import re
+import subprocess
+import unittest
+
+from devlog_testing import GitRepo, TempDirTestCase
+
+from devlog.builder import DevlogBuilder
+
+
+class DeduplicatedLayoutTest(TempDirTestCase, unittest.TestCase):
+    def test_anchors_are_unique_across_repositories_sharing_commits(self):
+        upstream = GitRepo(self.tmp, 'upstream')
+        shared = upstream.commit('Shared change', {'a.txt': 'a\n'}, '2024-05-01T10:00:00 +0000')
+        fork = os.path.join(self.tmp, 'fork')
+        subprocess.run(['git', 'clone', '-q', upstream.path, fork], check=True)
+        config = self.config(upstream, layout='deduplicated')
+        config.repos['fork'] = dict(upstream.repo_config(), path=fork)
+
+        output = os.path.join(self.tmp, 'DEVLOG.md')
+        DevlogBuilder(config, data_dir=os.path.join(self.tmp, 'data')).render(output)
+        with open(output, encoding='utf-8') as f:
+            text = f.read()
+        anchors = re.findall(r'<a name="(c-[^"]+)"></a>', text)
+        links = re.findall(r'\]\(#(c-[^)]+)\)', text)
+        self.assertEqual(sorted(anchors), [f'c-fork-{shared[:7]}', f'c-upstream-{shared[:7]}'])
+        self.assertEqual(sorted(links), sorted(anchors))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Tests for the rule matching and reductions in optimize-prompt.py."""
+
+import importlib.util
+import os
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location('optimize_prompt', os.path.join(project_root, 'optimize-prompt.py'))
+optimizer = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(optimizer)
+
+
+def rule(name, find, where=None):
+    rule = {'name': name, 'find': find, 'action': 'remove_section'}
+    if where:
+        rule['in'] = where
+    return rule
+
+
+class RuleMatcherTest(unittest.TestCase):
+    def scan(self, rules, line):
+        return [(rule['name'], end) for rule, end in optimizer.RuleMatcher(rules).scan(line)]
+
+    def test_overlapping_finds(self):
+        rules = [rule('prefix', 'ChatResponse_'), rule('suffix', 'Response_Table')]
+        self.assertEqual(self.scan(rules, '**ChatResponse_Table**'),
+                         [('prefix', 15), ('suffix', 20)])
+
+    def test_find_that_is_a_prefix_of_another(self):
+        rules = [rule('long', 'Mobile Optimizations'), rule('short', 'Mobile')]
+        self.assertEqual(self.scan(rules, '## Mobile Optimizations'),
+                         [('short', 9), ('long', 23)])
+
+    def test_find_inside_another(self):
+        rules = [rule('outer', 'shadcn/ui Component'), rule('inner', 'ui Comp')]
+        self.assertEqual(sorted(self.scan(rules, 'shadcn/ui Component Usage')),
+                         [('inner', 14), ('outer', 19)])
+
+    def test_each_rule_reported_once_at_its_first_find(self):
+        rules = [rule('both', ['Visual', 'Design'])]
+        self.assertEqual(self.scan(rules, 'Design and Visual Design'), [('both', 6)])
+
+    def test_no_rules(self):
+        self.assertEqual(self.scan([], 'anything'), [])
+
+    def test_overlapping_heading_finds_all_hit(self):
+        rules = [rule('mobile', 'Mobile Optimizations', 'heading'),
+                 rule('optimizations', 'Optimizations for', 'heading')]
+        content = "# Guide\n\n## Mobile Optimizations for Tablets\n\nTouch targets.\n"
+        tree = optimizer.parse_sections(content, optimizer.RuleMatcher(rules))
+        self.assertEqual(sorted(rule['name'] for rule, target in tree.hits), ['mobile', 'optimizations'])
+        self.assertTrue(all(target.title == 'Mobile Optimizations for Tablets' for rule, target in tree.hits))
+
+
+class SectionTreeTest(unittest.TestCase):
+    content = ("# Prompt é\n\nIntro.\n\n"
+               "## Überblick 🚀\nText ü\n"
+               "### Child\nBody\n```\n## fenced heading\n**fenced label**\n```\n**Label**\nafter\n\n"
+               "## Next\nEnd\n")
+
+    def setUp(self):
+        self.tree = optimizer.parse_sections(self.content)
+        self.sections = {section.title: section for section in self.tree.walk()}
+
+    def test_offsets_in_characters_and_bytes(self):
+        encoded = self.content.encode('utf-8')
+        self.assertEqual(self.tree.chars, len(self.content))
+        self.assertEqual(self.tree.bytes, len(encoded))
+        for section in self.tree.walk():
+            text = self.content[section.start:section.end]
+            self.assertEqual(section.chars, len(text))
+            self.assertEqual(section.bytes, len(text.encode('utf-8')))
+            self.assertEqual(encoded[section.byte_start:section.byte_end].decode('utf-8'), text)
+
+    def test_nesting_and_body_end(self):
+        self.assertEqual(list(self.sections), ['Header', 'Prompt é', 'Überblick 🚀', 'Child', 'Next'])
+        overview, child = self.sections['Überblick 🚀'], self.sections['Child']
+        self.assertEqual(overview.children, [child])
+        self.assertEqual(overview.end, self.sections['Next'].start)
+        self.assertEqual(self.content[overview.body_start:overview.body_end], "Text ü\n")
+        self.assertEqual(child.body_end, child.end)
+
+    def test_fences_hide_headings_and_labels(self):
+        child = self.sections['Child']
+        self.assertEqual([block.label for block in child.blocks], ['**Label**'])
+        self.assertEqual(self.content[child.blocks[0].body_start:child.blocks[0].end], "after\n\n")
+
+    def test_fenced_lines_are_not_matched(self):
+        tree = optimizer.parse_sections(self.content, optimizer.RuleMatcher([rule('fenced', 'fenced')]))
+        self.assertEqual(tree.hits, [])
+
+
+class ApplyOptimizationsTest(unittest.TestCase):
+    def optimize(self, rules, content):
+        return optimizer.apply_optimizations(content, optimizer.parse_sections(content, optimizer.RuleMatcher(rules)))
+
+    def test_simplify_drops_fenced_blocks_whole(self):
+        rules = [{'name': 'examples', 'find': '**Response_', 'in': 'label', 'action': 'simplify', 'keep': 1}]
+        content = ("## Responses\n\n"
+                   "**Response_Table**\n```\n| a | b |\n```\n\n"
+                   "**Response_Chart**\n- Inline charts\n- Tooltips\n\n"
+                   "**Response_Code**\n```python\nx = 1\n```\n[Copy Code]\n[Run]\n\n"
+                   "### Next\nText.\n")
+        self.assertEqual(self.optimize(rules, content),
+                         "## Responses\n\n"
+                         "**Response_Table**\n\n"
+                         "**Response_Chart**\n- Inline charts\n\n"
+                         "**Response_Code**\n[Copy Code]\n\n"
+                         "### Next\nText.\n")
+
+    def test_condense_keeps_blank_line_before_next_label(self):
+        rules = [{'name': 'form', 'find': 'EditModal', 'in': 'label', 'action': 'condense',
+                  'replacement': '```tsx\n// Edit form\n```\n'}]
+        content = "**EditModal**:\n```tsx\n<Form>\n## not a heading\n</Form>\n```\n\n**Confirmation**\n- Toast\n"
+        self.assertEqual(self.optimize(rules, content),
+                         "**EditModal**:\n```tsx\n// Edit form\n```\n\n**Confirmation**\n- Toast\n")
+
+    def test_merge_keeps_blank_line_before_next_heading(self):
+        rules = [{'name': 'mobile', 'find': 'Mobile', 'in': 'heading', 'action': 'merge',
+                  'replacement': '- 48px minimum touch targets\n'}]
+        content = ("## Chat\n#### Mobile Optimizations\n- Fixed input\n- Swipe\n\n"
+                   "## Mobile-First\n- Thumbs\n\n### Tasks\nText.\n")
+        self.assertEqual(self.optimize(rules, content),
+                         "## Chat\n#### Mobile Optimizations\n- 48px minimum touch targets\n\n"
+                         "## Mobile-First\n- 48px minimum touch targets\n\n### Tasks\nText.\n")
+
+    def test_remove_section_takes_its_subsections(self):
+        rules = [{'name': 'guide', 'find': 'Usage Guide', 'in': 'heading', 'action': 'remove_section'}]
+        content = "# Prompt\n\n## Usage Guide\n### Install\nnpx\n\n## Styling\nColors.\n"
+        self.assertEqual(self.optimize(rules, content), "# Prompt\n\n## Styling\nColors.\n")
+
+
+if __name__ == '__main__':
+    unittest.main()